@@ -0,0 +1,167 @@
+import argparse
+import copy
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.ETL import ETL_json
+from src.utils.date_parser import EMPTY_RELEASE_DATE, parse_release_date, release_date_fields
+from src.utils.record_io import iter_data_file
+
+"""
+ETL_json 發售日期解析的效能比較：改寫前每筆以 strptime 解析單一格式，與 date_parser 的快取解析
+另列出價格與好評率計算佔整個檔案的比例：這部分只佔約 1–2%，即使改為整欄的 NumPy 運算也不影響每個檔案的耗時，
+因此數值欄位維持逐筆計算，只有發售日期改為快取解析
+
+python -m benchmarks.bench_etl_transform                        # 使用合成資料 (每個檔案 2000 筆)
+python -m benchmarks.bench_etl_transform --input data/raw/game_info/game_info_1.jsonl.zst
+"""
+
+# 合成資料的發售日期 (含改寫前無法解析的 "Oct 2020" 格式)
+SYNTHETIC_DATES = ["1 Jan, 2020", "15 Mar, 2019", "28 Nov, 2023", "5 Oct, 2017", "Oct 2020", "Dec 2024",
+                   "Coming soon", ""]
+
+
+def release_date_fields_reference(date_str: Optional[str]) -> Tuple[Optional[str], Optional[int],
+                                                                       Optional[int], Optional[int]]:
+    """改寫前 transform_game 的發售日期處理 (每筆都以 strptime 解析單一格式，不快取)"""
+    if not date_str:
+        return EMPTY_RELEASE_DATE
+    try:
+        release_date_obj = datetime.strptime(date_str, '%d %b, %Y')
+    except ValueError:
+        return EMPTY_RELEASE_DATE
+    return (release_date_obj.strftime('%Y-%m-%d'), int(release_date_obj.timestamp()),
+            release_date_obj.year, release_date_obj.month)
+
+
+def transform_reference(records: List[Tuple[dict, dict, dict]]) -> List[Optional[dict]]:
+    """以改寫前的日期處理執行 transform_batch"""
+    ETL_json.release_date_fields = release_date_fields_reference
+    try:
+        return [game for _, game in ETL_json.transform_batch(records)]
+    finally:
+        ETL_json.release_date_fields = release_date_fields
+
+
+def numeric_fields(games: List[Optional[dict]]) -> List[Tuple]:
+    """transform_game 的價格與好評率計算 (只用於量測這部分的耗時)"""
+    results = []
+    for game in games:
+        if game is None:
+            continue
+        price = game.get("price_initial")
+        price = float(price) / 100 if price is not None else None
+        total, pos = game.get("total_reviews", 0), game.get("total_positive", 0)
+        positive_rate = round(pos / total, 4) if isinstance(total, (int, float)) and total > 0 else 0.0
+        results.append((price, positive_rate, f"{positive_rate:.1%}"))
+    return results
+
+
+def transform_current(records: List[Tuple[dict, dict, dict]]) -> List[Optional[dict]]:
+    return [game for _, game in ETL_json.transform_batch(records)]
+
+
+def synthetic_record(app_id: int, rng: random.Random) -> Tuple[dict, dict, dict]:
+    """產生與 Steam appdetails / appreviews / steamspy 相似的 (info, review, tag)"""
+    total_reviews = rng.choice([0, rng.randint(1, 50), rng.randint(50, 200000)])
+    description = "<p>" + " ".join(rng.choice(["explore", "craft", "boss", "story", "co-op"])
+                                   for _ in range(400)) + "</p>"
+    info = {
+        "type": "game", "name": f"Game {app_id}", "steam_appid": app_id, "required_age": 0, "is_free": False,
+        "detailed_description": description, "about_the_game": description,
+        "short_description": "A short description.",
+        "supported_languages": "English<strong>*</strong>, French<br><strong>*</strong>languages with full audio support",
+        "pc_requirements": {"minimum": "<strong>OS:</strong> Windows 10", "recommended": "<strong>GPU</strong>"},
+        "mac_requirements": [], "linux_requirements": [],
+        "developers": ["Dev"], "publishers": ["Pub"],
+        "price_overview": rng.choice([None, {"currency": "USD", "initial": rng.randint(99, 6999), "final": 99}]),
+        "platforms": {"windows": True, "mac": False, "linux": rng.random() < 0.3},
+        "metacritic": {"score": rng.randint(40, 95)} if rng.random() < 0.2 else None,
+        "categories": [{"description": "Single-player"}, {"description": "Steam Achievements"}],
+        "genres": [{"description": "Action"}, {"description": "Indie"}],
+        "release_date": {"coming_soon": False, "date": rng.choice(SYNTHETIC_DATES)},
+    }
+    review = {"query_summary": {"num_reviews": 0, "review_score": 7, "review_score_desc": "Very Positive",
+                                "total_positive": rng.randint(0, total_reviews), "total_negative": 0,
+                                "total_reviews": total_reviews}}
+    tag = {"appid": app_id, "name": f"Game {app_id}", "languages": "English",
+           "tags": {name: 100 for name in ["Action", "Indie", "RPG", "Strategy"]}}
+    return {str(app_id): {"success": True, "data": info}, "appid": app_id}, review, tag
+
+
+def time_it(func: Callable[[List], List], make_input: Callable[[], List], repeat: int):
+    """回傳 (最佳耗時秒數, 輸出)；每次都以新的輸入並清空快取後執行 (轉換會就地修改資料)"""
+    best, outputs = float("inf"), []
+    for _ in range(repeat):
+        inputs = make_input()
+        parse_release_date.cache_clear()
+        release_date_fields.cache_clear()
+        start = time.perf_counter()
+        outputs = func(inputs)
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較改寫前後 ETL_json 發售日期解析的速度")
+    parser.add_argument("--input", type=Path, default=None, help="game_info raw 資料檔 (預設使用合成資料)")
+    parser.add_argument("--records", type=int, default=2000, help="合成資料筆數 (約一個輸出檔)")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    args = parser.parse_args()
+
+    if args.input:
+        # 只有 game_info 時 review / tag 以空字典代替
+        records = [(record, {}, {}) for record in iter_data_file(args.input)]
+    else:
+        rng = random.Random(0)
+        records = [synthetic_record(app_id, rng) for app_id in range(10, 10 + args.records)]
+    print(f"{len(records)} 筆資料")
+
+    # 發售日期欄位：只量測日期字串的解析
+    date_strs = []
+    for single_data, _, _ in records:
+        info = next(iter(single_data.values()), None)
+        release_info = (info.get("data") or {}).get("release_date") if isinstance(info, dict) else None
+        if release_info and not release_info.get("coming_soon"):
+            date_strs.append(release_info.get("date") or None)
+
+    old_seconds, _ = time_it(lambda batch: [release_date_fields_reference(date_str) for date_str in batch],
+                             lambda: date_strs, args.repeat)
+    new_seconds, _ = time_it(lambda batch: [release_date_fields(date_str) for date_str in batch],
+                             lambda: date_strs, args.repeat)
+    print(f"發售日期欄位    改寫前: {old_seconds * 1000:.1f} ms，快取解析: {new_seconds * 1000:.1f} ms "
+          f"(加速 {old_seconds / new_seconds:.1f} 倍)")
+
+    # 整個檔案：文字欄位清洗 + 數值 / 日期欄位
+    def copy_records():
+        return copy.deepcopy(records)
+
+    old_file_seconds, old_outputs = time_it(transform_reference, copy_records, args.repeat)
+    new_file_seconds, new_outputs = time_it(transform_current, copy_records, args.repeat)
+    print(f"整個檔案        改寫前: {old_file_seconds * 1000:.1f} ms，快取解析: {new_file_seconds * 1000:.1f} ms "
+          f"(加速 {old_file_seconds / new_file_seconds:.2f} 倍)")
+    numeric_seconds, _ = time_it(numeric_fields, lambda: new_outputs, args.repeat)
+    print(f"價格 / 好評率    {numeric_seconds * 1000:.1f} ms (佔整個檔案 {numeric_seconds / new_file_seconds:.1%})")
+
+    # 除了改寫前無法解析的發售日期以外，輸出必須完全相同
+    newly_parsed = mismatches = 0
+    for old, new in zip(old_outputs, new_outputs):
+        if old == new and (old is None or list(old) == list(new)):
+            continue
+        if (old is not None and new is not None
+                and old.get("release_date") is None and new.get("release_date") is not None
+                and {k: v for k, v in old.items() if not k.startswith("release_date")}
+                == {k: v for k, v in new.items() if not k.startswith("release_date")}):
+            newly_parsed += 1
+            continue
+        mismatches += 1
+    print(f"新增解析的發售日期 {newly_parsed} 筆，其他輸出不一致 {mismatches} 筆")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.utils.html_text import clean_text
+from src.utils.record_io import iter_data_file
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    # 未安裝 beautifulsoup4 時只量測新版的速度，無法比對輸出
+    BeautifulSoup = None
+
+"""
+HTML 轉文字效能比較：原本的 BeautifulSoup(html.parser) 與 src.utils.html_text
+
+python -m benchmarks.bench_html_to_text                        # 使用合成的 Steam 商店頁描述
+python -m benchmarks.bench_html_to_text --input data/raw/game_info/game_info_1.jsonl.zst
+"""
+
+# ETL_json 會清理的 HTML 欄位
+DESCRIPTIVE_COLS = ['detailed_description', 'about_the_game', 'short_description', 'supported_languages']
+HARDWARE_COLS = ['pc_requirements', 'mac_requirements', 'linux_requirements']
+
+
+def clean_text_bs4(raw_str: Optional[str]) -> str:
+    """改寫前 ETL_json 的清理流程 (clean_html_tag + 壓縮空白 + 移除 * 與修正 " , ")"""
+    if raw_str is None:
+        return ""
+    text = BeautifulSoup(raw_str, "html.parser").get_text(separator=" ").strip()
+    text = " ".join(text.split())
+    return text.replace("*", "").replace(" , ", ", ").strip()
+
+
+def synthetic_game_info(app_id: int, rng: random.Random) -> Dict:
+    """產生與 Steam appdetails 相似的 HTML 欄位"""
+    words = ["adventure", "explore", "dungeon", "co-op", "craft", "story", "boss", "open world",
+             "roguelike", "puzzle", "策略", "劇情", "多人連線", "探索"]
+
+    def sentence() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(6, 18))).capitalize() + "."
+
+    sections = []
+    for _ in range(rng.randint(2, 6)):
+        sections.append(f'<h2 class="bb_tag">{sentence()}</h2>'
+                        f'<p class="bb_paragraph">{sentence()} {sentence()} &amp; {sentence()}</p>'
+                        f'<img class="bb_img" src="https://cdn.akamai.steamstatic.com/steam/apps/{app_id}/'
+                        f'extras/{rng.randint(1, 99)}.gif?t=1700000000"><br><br>'
+                        f'<ul class="bb_ul"><li>{sentence()}</li><li><strong>{sentence()}</strong></li>'
+                        f'<li>{sentence()} &#8212; <i>{sentence()}</i></li></ul>')
+    description = "".join(sections)
+    requirements = ('<strong>Minimum:</strong><br><ul class="bb_ul"><li>Requires a 64-bit processor and '
+                    'operating system<br></li><li><strong>OS *:</strong> Windows&reg; 10 64-bit<br></li>'
+                    '<li><strong>Processor:</strong> Intel Core i5-4460 , AMD FX-6300<br></li>'
+                    f'<li><strong>Memory:</strong> {rng.choice([4, 8, 16])} GB RAM<br></li>'
+                    '<li><strong>Storage:</strong> 50 GB available space</li></ul>')
+    return {
+        "steam_appid": app_id,
+        "detailed_description": description,
+        "about_the_game": description,
+        "short_description": sentence() + " " + sentence(),
+        "supported_languages": "English<strong>*</strong>, French, 繁體中文<strong>*</strong>"
+                               "<br><strong>*</strong>languages with full audio support",
+        "pc_requirements": {"minimum": requirements, "recommended": requirements.replace("Minimum", "Recommended")},
+        "mac_requirements": [],
+        "linux_requirements": {"minimum": requirements},
+    }
+
+
+def load_html_fields(records: List[Dict]) -> List[Optional[str]]:
+    """取出所有需要清理的 HTML 字串 (與 ETL_json 清理的欄位相同)"""
+    fields = []
+    for record in records:
+        fields.extend(record.get(col) for col in DESCRIPTIVE_COLS)
+        for hardware in HARDWARE_COLS:
+            if isinstance(record.get(hardware), dict):
+                fields.extend(record[hardware].values())
+    return fields
+
+
+def time_it(func: Callable[[Optional[str]], str], fields: List[Optional[str]], repeat: int):
+    """回傳 (最佳耗時秒數, 輸出)"""
+    best, outputs = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [func(field) for field in fields]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 BeautifulSoup 與 html_text 的 HTML 轉文字速度")
+    parser.add_argument("--input", type=Path, default=None, help="game_info raw 資料檔 (預設使用合成資料)")
+    parser.add_argument("--records", type=int, default=2000, help="合成資料筆數")
+    parser.add_argument("--repeat", type=int, default=3, help="重複次數 (取最佳值)")
+    args = parser.parse_args()
+
+    if args.input:
+        # raw game_info 每筆格式為 {appid: {"success": ..., "data": {...}}}
+        records = [(value or {}).get("data") or {}
+                   for record in iter_data_file(args.input) for value in record.values()]
+    else:
+        rng = random.Random(0)
+        records = [synthetic_game_info(app_id, rng) for app_id in range(10, 10 + args.records)]
+
+    fields = load_html_fields(records)
+    total_mb = sum(len(field) for field in fields if isinstance(field, str)) / 1024 / 1024
+    print(f"{len(records)} 筆資料，{len(fields)} 個 HTML 欄位，共 {total_mb:.1f} MB")
+
+    new_seconds, new_outputs = time_it(clean_text, fields, args.repeat)
+    print(f"html_text      : {new_seconds:.3f} 秒 ({total_mb / new_seconds:.1f} MB/s)")
+    if BeautifulSoup is None:
+        print("未安裝 beautifulsoup4，略過比較")
+        return
+
+    old_seconds, old_outputs = time_it(clean_text_bs4, fields, args.repeat)
+    print(f"BeautifulSoup  : {old_seconds:.3f} 秒 ({total_mb / old_seconds:.1f} MB/s)")
+
+    mismatches = [i for i, (old, new) in enumerate(zip(old_outputs, new_outputs)) if old != new]
+    print(f"加速 {old_seconds / new_seconds:.1f} 倍，輸出不一致 {len(mismatches)} 筆")
+    if mismatches:
+        print(f"第一筆不一致的欄位: {fields[mismatches[0]]!r:.300}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import copy
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+from benchmarks.bench_etl_transform import synthetic_record
+from src.ETL.ETL_json import transform_batch
+from src.utils.fast_json import decode, encode_pretty, msgspec_available, typed_decoder
+from src.utils.record_io import open_jsonl
+from src.utils.steam_schema import RAW_RECORD_TYPES
+
+"""
+raw 資料解碼與 processed 資料寫出的效能比較：json 模組 vs fast_json (msgspec + steam_schema 型別)
+
+python -m benchmarks.bench_json_codec                        # 使用合成資料 (含 screenshots、movies 等大型欄位)
+python -m benchmarks.bench_json_codec --input data/raw/game_info/game_info_1.jsonl.zst
+"""
+
+
+def heavy_fields(app_id: int, rng: random.Random) -> dict:
+    """appdetails 中 ETL 不使用的大型欄位 (數量與實際資料相近)"""
+    return {
+        "screenshots": [{"id": i, "path_thumbnail": f"https://cdn/{app_id}/ss_{i}.600x338.jpg",
+                         "path_full": f"https://cdn/{app_id}/ss_{i}.1920x1080.jpg"} for i in range(rng.randint(5, 20))],
+        "movies": [{"id": i, "name": f"Trailer {i}", "thumbnail": f"https://cdn/{app_id}/movie_{i}.jpg",
+                    "webm": {"480": f"https://cdn/{app_id}/movie480_{i}.webm", "max": f"https://cdn/{app_id}/max_{i}.webm"},
+                    "mp4": {"480": f"https://cdn/{app_id}/movie480_{i}.mp4", "max": f"https://cdn/{app_id}/max_{i}.mp4"},
+                    "highlight": True} for i in range(rng.randint(1, 4))],
+        "package_groups": [{"name": "default", "title": f"Buy Game {app_id}", "subs": [
+            {"packageid": app_id * 10 + i, "option_text": f"Edition {i} - $19.99", "price_in_cents_with_discount": 1999}
+            for i in range(3)]}],
+        "achievements": {"total": 40, "highlighted": [{"name": f"Achievement {i}", "path": f"https://cdn/a_{i}.jpg"}
+                                                      for i in range(10)]},
+        "header_image": f"https://cdn/{app_id}/header.jpg", "website": f"https://game{app_id}.example.com",
+        "legal_notice": "Copyright " * 30,
+    }
+
+
+def synthetic_lines(count: int) -> List[str]:
+    rng = random.Random(0)
+    lines = []
+    for app_id in range(10, 10 + count):
+        info, _, _ = synthetic_record(app_id, rng)
+        info[str(app_id)]["data"].update(heavy_fields(app_id, rng))
+        lines.append(json.dumps(info, ensure_ascii=False))
+    return lines
+
+
+def measure(func: Callable[[], object], repeat: int):
+    """回傳 (最佳耗時秒數, 記憶體峰值 bytes, 結果)"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 json 模組與 fast_json 的解碼 / 寫出速度與記憶體")
+    parser.add_argument("--input", type=Path, default=None, help="game_info 的 JSONL 資料檔 (預設使用合成資料)")
+    parser.add_argument("--records", type=int, default=2000, help="合成資料筆數 (約一個輸出檔)")
+    parser.add_argument("--repeat", type=int, default=5, help="重複次數 (取最佳值)")
+    args = parser.parse_args()
+
+    if not msgspec_available():
+        raise SystemExit("未安裝 msgspec，fast_json 與 json 模組相同，無需比較")
+
+    if args.input:
+        with open_jsonl(args.input) as f:
+            lines = [line for line in f if line.strip()]
+    else:
+        lines = synthetic_lines(args.records)
+    print(f"{len(lines)} 筆 game_info ({sum(len(line) for line in lines) / 1e6:.1f} MB)")
+
+    # 解碼：完整解碼 vs 只建立 GameInfoRecord 定義的欄位
+    decode_typed = typed_decoder(RAW_RECORD_TYPES["game_info"])
+    old_seconds, old_peak, old_records = measure(lambda: [json.loads(line) for line in lines], args.repeat)
+    new_seconds, new_peak, new_records = measure(lambda: [decode_typed(line) for line in lines], args.repeat)
+    print(f"解碼  json.loads: {old_seconds * 1000:.1f} ms / {old_peak / 1e6:.1f} MB，"
+          f"typed_decoder: {new_seconds * 1000:.1f} ms / {new_peak / 1e6:.1f} MB "
+          f"(加速 {old_seconds / new_seconds:.1f} 倍，記憶體 {new_peak / old_peak:.0%})")
+
+    # 轉換結果必須相同
+    empty = [({}, {}) for _ in lines]
+    old_output = transform_batch([(record, *rest) for record, rest in zip(copy.deepcopy(old_records), empty)])
+    new_output = transform_batch([(record, *rest) for record, rest in zip(new_records, empty)])
+    mismatches = sum(1 for old, new in zip(old_output, new_output) if old != new or list(old[1] or {}) !=
+                     list(new[1] or {}))
+    print(f"轉換結果不一致 {mismatches} 筆")
+
+    # 寫出：processed json_data (indent=2)
+    json_data = {"update_date": "", "update_time": "", "data": [output for _, output in new_output if output]}
+    old_seconds, old_peak, old_bytes = measure(
+        lambda: json.dumps(json_data, ensure_ascii=False, indent=2).encode("utf-8"), args.repeat)
+    new_seconds, new_peak, new_bytes = measure(lambda: encode_pretty(json_data), args.repeat)
+    print(f"寫出  json.dumps: {old_seconds * 1000:.1f} ms / {old_peak / 1e6:.1f} MB，"
+          f"encode_pretty: {new_seconds * 1000:.1f} ms / {new_peak / 1e6:.1f} MB "
+          f"(加速 {old_seconds / new_seconds:.1f} 倍，輸出{'相同' if old_bytes == new_bytes else '不同'})")
+    if mismatches or decode(new_bytes) != decode(old_bytes):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
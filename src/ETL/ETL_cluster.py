@@ -0,0 +1,189 @@
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config.constant import (DOCUMENT_CLUSTER_SETTINGS, DOCUMENT_CLUSTERS_PATH, EMBEDDING_CHANGES_PATH,
+                                 PROCESSED_DATA_PATH, PROJECT_ROOT)
+from src.utils.etl_manifest import emit_changes
+from src.utils.fast_json import read_json, write_json
+from src.utils.text_dedup import MinHasher, lsh_clusters, shingles, text_tokens
+
+# 近似重複遊戲分群：版本、重製、試玩版與換皮遊戲的描述幾乎相同，各自寫入向量資料庫會使索引變大，
+# 檢索時 top-k 也會被同一份內容佔滿。以 MinHash/LSH 將 document 的 context 近似重複者分群，
+# 每群以評論數最多的遊戲為代表 (canonical)，只有代表的文件寫入向量資料庫；其他成員的名稱、價格與發售日期
+# 記錄於代表文件的 metadata 並附加在其 context 最後，仍可依成員自己的名稱、價格或發售日期檢索到。
+
+# 代表文件的 metadata 中記錄同群其他 AppID 的欄位
+DUPLICATE_APPIDS_KEY = "duplicate_appids"
+# 代表文件的 metadata 中記錄同群其他成員摘要 (DUPLICATE_SUMMARY_COLS) 的欄位，context 中亦以此為欄位名稱
+DUPLICATES_KEY = "duplicates"
+# 同群其他成員保留的欄位
+DUPLICATE_SUMMARY_COLS = ["steam_appid", "name", "type", "is_free", "price_initial", "price_currency",
+                          "release_date"]
+
+# {appid: {"canonical": 代表的 AppID, "members": 同群所有 AppID, "duplicates": 其他成員的摘要}}
+# (不在任何群組的 AppID 不列入)
+ClusterIndex = Dict[int, Dict]
+
+
+def iter_documents() -> Iterator[dict]:
+    """依檔案編號逐份讀取 data/processed/document 的遊戲文件"""
+    folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("document")
+    file_num = 1
+    while (path := folder / f"document_{file_num}.json").exists():
+        yield from read_json(path)
+        file_num += 1
+
+
+def _review_total(metadata: dict) -> float:
+    total = metadata.get("total_reviews")
+    return total if isinstance(total, (int, float)) and total == total else 0
+
+
+def build_clusters(settings: Optional[dict] = None) -> List[Dict]:
+    """
+    計算所有遊戲文件的 MinHash 簽章並以 LSH 分群
+    :return: [{"canonical": 代表的 AppID, "members": [同群 AppID (由小到大)],
+              "duplicates": [代表以外成員的 DUPLICATE_SUMMARY_COLS (依 AppID 排序)]}]，只含兩個以上 AppID 的群組
+    """
+    settings = {**DOCUMENT_CLUSTER_SETTINGS, **(settings or {})}
+    hasher = MinHasher(num_perm=settings["num_perm"])
+
+    app_ids: List[int] = []
+    signatures: List[np.ndarray] = []
+    review_totals: Dict[int, float] = {}
+    summaries: Dict[int, dict] = {}
+    for document in iter_documents():
+        metadata = document.get("metadata") or {}
+        app_id = metadata.get("steam_appid")
+        if not app_id or app_id in review_totals:
+            continue
+        review_totals[app_id] = _review_total(metadata)
+        summaries[app_id] = {col: metadata.get(col) for col in DUPLICATE_SUMMARY_COLS}
+        tokens = text_tokens(document.get("context") or "")
+        # 太短的文件 (沒有描述，只有名稱與類別) 彼此很容易相似，不參與分群
+        if len(tokens) < settings["min_tokens"]:
+            continue
+        app_ids.append(app_id)
+        signatures.append(hasher.signature(shingles(tokens, settings["shingle_size"])))
+
+    if not signatures:
+        return []
+    groups = lsh_clusters(app_ids, np.stack(signatures), bands=settings["bands"], threshold=settings["threshold"])
+    clusters = []
+    for members in groups:
+        # 評論數最多者為代表 (通常是本體而非試玩版或 DLC 合輯)，相同時取 AppID 最小者
+        canonical = max(members, key=lambda app_id: (review_totals[app_id], -app_id))
+        members = sorted(members)
+        clusters.append({"canonical": canonical, "members": members,
+                         "duplicates": [summaries[member] for member in members if member != canonical]})
+    return sorted(clusters, key=lambda cluster: cluster["canonical"])
+
+
+def index_clusters(clusters: List[Dict]) -> ClusterIndex:
+    return {app_id: cluster for cluster in clusters for app_id in cluster["members"]}
+
+
+def _read_clusters(path: Path) -> ClusterIndex:
+    if not path.exists():
+        return {}
+    return index_clusters(read_json(path).get("clusters", []))
+
+
+def load_clusters() -> ClusterIndex:
+    """讀取寫入向量資料庫時使用的分群結果；停用分群或尚未分群時回傳空字典 (所有文件皆寫入)"""
+    if not DOCUMENT_CLUSTER_SETTINGS["enabled"]:
+        return {}
+    return _read_clusters(PROJECT_ROOT / DOCUMENT_CLUSTERS_PATH)
+
+
+def duplicates_context(duplicates: List[dict]) -> str:
+    """同群其他成員的摘要，以 context 相同的 "欄位: 值" 格式每個成員一行 (沒有值的欄位略過)"""
+    lines = []
+    for summary in duplicates:
+        fields = ", ".join(f"{col}: {value}" for col, value in summary.items() if value not in (None, ""))
+        lines.append(f"{DUPLICATES_KEY}: {fields}\n")
+    return "".join(lines)
+
+
+def apply_clusters(documents: List[dict], cluster_index: ClusterIndex) -> Tuple[List[dict], Set[int]]:
+    """
+    寫入向量資料庫前套用分群結果：略過非代表的文件，代表文件的 metadata 加上同群其他 AppID 與成員摘要，
+    成員摘要亦附加在 context 最後 (成員仍可依名稱、價格或發售日期檢索到代表文件)
+    :return: (要寫入的文件, 略過的 AppID)
+    """
+    if not cluster_index:
+        return documents, set()
+    kept, skipped = [], set()
+    for document in documents:
+        metadata = document.get("metadata") or {}
+        app_id = metadata.get("steam_appid")
+        cluster = cluster_index.get(app_id)
+        if cluster is None:
+            kept.append(document)
+        elif cluster["canonical"] != app_id:
+            skipped.add(app_id)
+        else:
+            duplicate_appids = [member for member in cluster["members"] if member != app_id]
+            # 舊版的分群檔案沒有成員摘要時只記錄 AppID
+            duplicates = cluster.get("duplicates") or [{"steam_appid": member} for member in duplicate_appids]
+            kept.append({**document,
+                         "context": (document.get("context") or "") + duplicates_context(duplicates),
+                         "metadata": {**metadata, DUPLICATE_APPIDS_KEY: duplicate_appids,
+                                      DUPLICATES_KEY: duplicates}})
+    return kept, skipped
+
+
+def update_document_clusters(removed_appids: Optional[Set[int]] = None,
+                             settings: Optional[dict] = None) -> Set[int]:
+    """
+    重新分群並寫出 DOCUMENT_CLUSTERS_PATH
+    :param removed_appids: 已自輸入移除的 AppID (不列入回傳值)
+    :return: 分群有變動的 AppID (代表、同群成員或成員摘要改變，需要重新寫入或刪除向量資料庫中的文件)
+    """
+    start_time = time.perf_counter()
+    settings = {**DOCUMENT_CLUSTER_SETTINGS, **(settings or {})}
+    path = PROJECT_ROOT / DOCUMENT_CLUSTERS_PATH
+    previous = _read_clusters(path)
+
+    clusters = build_clusters(settings)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(path, {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "settings": settings,
+        "clusters": clusters,
+    })
+
+    current = index_clusters(clusters)
+    changed = {app_id for app_id in set(previous) | set(current)
+               if previous.get(app_id) != current.get(app_id)} - set(removed_appids or ())
+    skipped_count = sum(len(cluster["members"]) - 1 for cluster in clusters)
+    print(f"近似重複分群: {len(clusters)} 群，{skipped_count} 份重複的遊戲文件併入代表文件，"
+          f"分群變動 {len(changed)} 筆 ({time.perf_counter() - start_time:.1f} 秒)")
+    return changed
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="以 MinHash/LSH 將近似重複的遊戲文件分群 (ETL_document 結束時會自動執行)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="估計的 Jaccard 相似度下限 (預設 DOCUMENT_CLUSTER_SETTINGS)")
+    parser.add_argument("--show", type=int, default=0, help="列出成員數最多的前 N 群")
+    args = parser.parse_args(argv)
+
+    settings = {"threshold": args.threshold} if args.threshold is not None else None
+    changed = update_document_clusters(settings=settings)
+    changes = emit_changes(PROJECT_ROOT / EMBEDDING_CHANGES_PATH, changed, [])
+    print(f"待向量化: 變動 {len(changes['changed'])} 筆、移除 {len(changes['removed'])} 筆")
+
+    if args.show:
+        clusters = read_json(PROJECT_ROOT / DOCUMENT_CLUSTERS_PATH)["clusters"]
+        for cluster in sorted(clusters, key=lambda c: -len(c["members"]))[:args.show]:
+            print(f"代表 {cluster['canonical']}: {cluster['members']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,226 @@
-import json
+import argparse
 import logging
+import time
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 
 # 假設這些常數已在 src.config.constant 定義
-from src.config.constant import CONTEXT_COLS, METADATA_COLS, PROCESSED_DATA_PATH, PROJECT_ROOT
+from src.config.constant import (CONTEXT_COLS, CONTEXT_DEDUP_COLS, CONTEXT_DEDUP_SETTINGS, DOCUMENT_CLUSTER_SETTINGS,
+                                 DOCUMENT_CLUSTERS_PATH, EMBEDDING_CHANGES_PATH, ETL_MANIFEST_PATH, GAME_DOC_TYPE,
+                                 METADATA_COLS, PRICE_COLS, PROCESSED_DATA_PATH, PROJECT_ROOT)
+from src.ETL.ETL_cluster import update_document_clusters
+from src.utils.etl_manifest import DOCUMENT_STAGE, EtlManifest, content_hash, emit_changes
+from src.utils.fast_json import DecodeError, read_json, write_json
+from src.utils.price_overlay import apply_price_to_metadata
+from src.utils.text_dedup import count_tokens, redundant_fields
 
 # 設定簡單的日誌記錄 (保險機制：記錄錯誤但不中斷程式)
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
+# 文件產生邏輯的版本 (納入 manifest 的輸入雜湊)：文件內容改變時遞增，已產生的文件會自動重新產生
+DOCUMENT_VERSION = 3
+
 
 def read_file(input_path: Path):
     try:
-        with open(input_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return read_json(input_path)
+    except DecodeError as e:
         logging.error(f"讀取檔案 {input_path} 時發生錯誤: {e}")
         return None
 
 
-input_file_num = 1
-
-# [新加入] 確保儲存資料夾存在
-save_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("document")
-save_folder.mkdir(parents=True, exist_ok=True)
-
-while True:
-    input_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("json_data")
-    input_file = f"json_data_{input_file_num}.json"
-    input_path = input_folder / input_file
-
-    if not input_path.exists():
-        print(f"已處理完所有檔案！(共處理 {input_file_num - 1} 個檔案)")
-        break
-
-    print(f"正在處理第 {input_file_num} 個檔案...")
-
-    # 讀取json資料
-    json_data = read_file(input_path=input_path)
-
-    # [新加入] 防呆：檢查資料內容是否有效
-    if json_data is None or not isinstance(json_data.get("data"), list):
-        logging.warning(f"檔案 {input_file} 格式不正確，跳過此檔案。")
-        input_file_num += 1
-        continue
-
+def build_context(single_data: dict) -> Tuple[str, Dict[str, str]]:
+    """
+    組合 context 文字；CONTEXT_DEDUP_COLS 中內容與其他欄位相同或幾乎相同的欄位不放入
+    :return: (context, {略過的欄位: 涵蓋其內容的欄位})
+    """
+    dropped = redundant_fields({col: single_data.get(col) for col in CONTEXT_DEDUP_COLS},
+                               shingle_size=CONTEXT_DEDUP_SETTINGS["shingle_size"],
+                               threshold=CONTEXT_DEDUP_SETTINGS["threshold"])
+    context = ""
+    for col in CONTEXT_COLS:
+        if col in dropped:
+            continue
+        # [新加入] 防呆：避免 col 不存在時產生的 NoneType 錯誤
+        val = single_data.get(col, "N/A")
+        context += f"{col}: {val}\n"
+    return context, dropped
+
+
+def build_document(single_data: dict, dedup_stats: Optional[Dict[str, int]] = None) -> dict:
+    """
+    將單筆 json_data 轉為文件 (context + metadata)
+    :param dedup_stats: 傳入 {"fields": 0, "tokens": 0} 時累加略過的重複欄位數與節省的 token 數
+    """
+    # 將硬體需求欄位名加入metadata欄位列表
+    key_list = list(single_data.keys())
+    requirement_keys = [key for key in key_list if "requirements" in key]
+    new_metadata_cols = METADATA_COLS + requirement_keys
+
+    doc_data = {
+        "context": "",
+        "metadata": {"doc_type": GAME_DOC_TYPE}
+    }
+
+    # 處理 Metadata (doc_type 區分遊戲文件與同一個 collection 中的評論文件)
+    for col in new_metadata_cols:
+        doc_data["metadata"][col] = single_data.get(col, None)
+
+    # 處理 Context (組合文字資訊，略過重複的描述欄位)
+    doc_data["context"], dropped = build_context(single_data)
+    if dedup_stats is not None and dropped:
+        dedup_stats["fields"] += len(dropped)
+        dedup_stats["tokens"] += sum(count_tokens(f"{col}: {single_data.get(col)}\n") for col in dropped)
+
+    return doc_data
+
+
+def input_hash_of(single_data: dict) -> str:
+    """文件的輸入雜湊：價格欄位 (PRICE_COLS) 不納入，只有價格變動時沿用文件並更新 metadata，不需重新向量化"""
+    # 文件產生邏輯的版本一併納入雜湊，版本變更後所有文件都會重新產生
+    return content_hash([DOCUMENT_VERSION, {key: value for key, value in single_data.items()
+                                            if key not in PRICE_COLS}])
+
+
+def price_of(single_data: dict) -> Dict:
+    """json_data 單筆資料的價格 (與 document metadata 的價格欄位相同，無價格時為 None)"""
+    return {"price_initial": single_data.get("price_initial"),
+            "price_currency": single_data.get("price_currency")}
+
+
+def process_file(manifest: EtlManifest, input_file_num: int, json_data_list: List[dict],
+                 incremental: bool, run_started: float) -> Tuple[int, Set[int], Dict[int, Dict], Dict[str, int]]:
+    """
+    轉換並寫出單一檔案，輸入雜湊與 manifest 相同的資料沿用上次的文件 (價格不同時只更新 metadata)
+    :return: (文件數, 文件有變動的 AppID, 只有價格變動的 {AppID: 價格}, 本次產生的文件略過的重複欄位數與節省的 token 數)
+    """
+    save_path = PROJECT_ROOT / PROCESSED_DATA_PATH.format("document") / f"document_{input_file_num}.json"
+
+    app_ids = [single_data.get("steam_appid") for single_data in json_data_list]
+    previous = manifest.get_many(DOCUMENT_STAGE, [app_id for app_id in app_ids if app_id]) if incremental else {}
+
+    entries = []
     document_list = []
-    json_data_list = json_data.get("data")
-
-    for single_data in json_data_list:
-        # 將硬體需求欄位名加入metadata欄位列表
-        key_list = list(single_data.keys())
-        requirement_keys = [key for key in key_list if "requirements" in key]
-        new_metadata_cols = METADATA_COLS + requirement_keys
-
-        doc_data = {
-            "context": "",
-            "metadata": {}
-        }
-
-        # 處理 Metadata
-        for col in new_metadata_cols:
-            doc_data["metadata"][col] = single_data.get(col, None)
-
-        # 處理 Context (組合文字資訊)
-        for col in CONTEXT_COLS:
-            # [新加入] 防呆：避免 col 不存在時產生的 NoneType 錯誤
-            val = single_data.get(col, "N/A")
-            doc_data["context"] += f"{col}: {val}\n"
-
+    changed_appids: Set[int] = set()
+    repriced: Dict[int, Dict] = {}
+    dedup_stats = {"fields": 0, "tokens": 0}
+    for app_id, single_data in zip(app_ids, json_data_list):
+        input_hash = input_hash_of(single_data)
+        if app_id in previous and previous[app_id][0] == input_hash:
+            doc_data = previous[app_id][2]
+            # 價格批次更新或價格覆蓋層失效時只有價格改變：更新 metadata 並記錄於 manifest，向量資料庫就地更新
+            price_patch = price_of(single_data)
+            changed = apply_price_to_metadata(doc_data["metadata"], price_patch)
+            if changed:
+                repriced[app_id] = price_patch
+        else:
+            doc_data, changed = build_document(single_data, dedup_stats), True
+            if app_id:
+                changed_appids.add(app_id)
         document_list.append(doc_data)
+        if app_id:
+            entries.append((app_id, input_hash, doc_data, changed))
+
+    if dedup_stats["fields"]:
+        print(f"document_{input_file_num}.json: 本次產生的文件略過 {dedup_stats['fields']} 個重複的描述欄位，"
+              f"節省約 {dedup_stats['tokens']} tokens")
+
+    if (incremental and not changed_appids and not repriced and len(entries) == len(document_list) and save_path.exists()
+            and manifest.file_appids(DOCUMENT_STAGE, input_file_num) == {entry[0] for entry in entries}):
+        print(f"document_{input_file_num}.json 沒有變動 ({len(document_list)} 份文件)，略過寫入。")
+    else:
+        try:
+            write_json(save_path, document_list)
+            print(f"已成功儲存 document_{input_file_num}.json 資料！"
+                  f"(變動 {len(changed_appids)} 份，只有價格變動 {len(repriced)} 份)")
+        except Exception as e:
+            logging.error(f"儲存 document_{input_file_num}.json 時發生意外: {e}")
+            # 未寫出的變動不記錄於 manifest，下次重新轉換
+            return len(document_list), set(), {}, dedup_stats
+
+    manifest.update_file(DOCUMENT_STAGE, input_file_num, entries, seen_at=run_started)
+    return len(document_list), changed_appids, repriced, dedup_stats
+
+
+def run_document_etl(incremental: bool = True) -> Optional[Dict]:
+    """
+    將 data/processed/json_data 轉為 data/processed/document，
+    並將文件有變動 / 已移除 / 只有價格變動的 AppID 合併至待向量化的變動清單 (EMBEDDING_CHANGES_PATH)
+    :param incremental: 依 manifest 沿用未變動的文件 (False 時全部重新轉換，所有文件都列為變動)
+    :return: 變動清單
+    """
+    # [新加入] 確保儲存資料夾存在
+    save_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("document")
+    save_folder.mkdir(parents=True, exist_ok=True)
+    input_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("json_data")
 
-    # 儲存處理完的檔案
-    file_name = f"document_{input_file_num}.json"
-    save_path = save_folder / file_name
+    run_started = time.time()
+    changed_appids: Set[int] = set()
+    repriced: Dict[int, Dict] = {}
+    has_failure = False
+    dedup_totals = {"fields": 0, "tokens": 0}
 
+    manifest = EtlManifest(PROJECT_ROOT / ETL_MANIFEST_PATH)
     try:
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(document_list, f, ensure_ascii=False, indent=2)
-        print(f"已成功儲存 {file_name} 資料！")
-    except Exception as e:
-        logging.error(f"儲存 {file_name} 時發生意外: {e}")
-
-    # [關鍵修正] 增加計數器，避免無限迴圈
-    input_file_num += 1
-
-print("--- ETL 轉換任務結束 ---")
+        input_file_num = 1
+        while True:
+            input_file = f"json_data_{input_file_num}.json"
+            input_path = input_folder / input_file
+
+            if not input_path.exists():
+                print(f"已處理完所有檔案！(共處理 {input_file_num - 1} 個檔案)")
+                break
+
+            print(f"正在處理第 {input_file_num} 個檔案...")
+
+            # 讀取json資料
+            json_data = read_file(input_path=input_path)
+
+            # [新加入] 防呆：檢查資料內容是否有效
+            if json_data is None or not isinstance(json_data.get("data"), list):
+                logging.warning(f"檔案 {input_file} 格式不正確，跳過此檔案。")
+                has_failure = True
+                input_file_num += 1
+                continue
+
+            _, file_changed, file_repriced, file_dedup = process_file(
+                manifest, input_file_num, json_data["data"], incremental, run_started)
+            changed_appids |= file_changed
+            repriced.update(file_repriced)
+            for key, value in file_dedup.items():
+                dedup_totals[key] += value
+
+            # [關鍵修正] 增加計數器，避免無限迴圈
+            input_file_num += 1
+
+        # 有檔案讀取失敗時，無法判斷哪些 AppID 已自輸入移除，保留其 manifest 紀錄
+        removed_appids = set() if has_failure else manifest.prune(DOCUMENT_STAGE, seen_before=run_started)
+    finally:
+        manifest.close()
+
+    # 近似重複分群 (文件沒有變動時沿用上次的結果)；分群變動的 AppID 一併列入待向量化清單
+    # (成員摘要含價格，只有價格變動時也需重新分群)
+    if DOCUMENT_CLUSTER_SETTINGS["enabled"] and not has_failure and (
+            changed_appids or repriced or removed_appids or not (PROJECT_ROOT / DOCUMENT_CLUSTERS_PATH).exists()):
+        changed_appids |= update_document_clusters(removed_appids)
+
+    changes = emit_changes(PROJECT_ROOT / EMBEDDING_CHANGES_PATH, changed_appids, removed_appids, repriced)
+    print(f"本次產生的文件共略過 {dedup_totals['fields']} 個重複的描述欄位，節省約 {dedup_totals['tokens']} tokens")
+    print(f"本次變動 {len(changed_appids)} 筆、移除 {len(removed_appids)} 筆、只有價格變動 {len(repriced)} 筆 "
+          f"(待向量化: 變動 {len(changes['changed'])} 筆、移除 {len(changes['removed'])} 筆、"
+          f"更新價格 {len(changes.get('repriced', {}))} 筆)")
+    print("--- ETL 轉換任務結束 ---")
+    return changes
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="將清洗後的 json_data 轉為文件 (context + metadata)")
+    parser.add_argument("--full", action="store_true",
+                        help="忽略 manifest，重新轉換所有文件 (所有 AppID 都列入待向量化清單)")
+    args = parser.parse_args(argv)
+
+    run_document_etl(incremental=not args.full)
+
+
+if __name__ == "__main__":
+    main()
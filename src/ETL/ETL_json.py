@@ -1,38 +1,55 @@
-import json
+import argparse
 import math
+import os
+import time
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 from datetime import datetime
-from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from bs4 import BeautifulSoup
+from src.config.constant import (APP_CATALOGUE_PATH, ETL_MANIFEST_PATH, INFO_MAIN_COLS,
+                                 PARQUET_COMPRESSION, PARQUET_OUTPUT_ENABLED, PRICE_OVERLAY_PATH,
+                                 PROCESSED_DATA_PATH, PROJECT_ROOT, RAW_DATA_PATH, RAW_STORE_ETL_CHUNK_SIZE,
+                                 RAW_STORE_PATH, REVIEW_MAIN_COLS, TAG_MAIN_COLS)
+from src.utils.app_catalogue import load_removed_appids
+from src.utils.date_parser import release_date_fields
+from src.utils.etl_manifest import JSON_STAGE, EtlManifest, content_hash
+from src.utils.fast_json import write_json
+from src.utils.html_text import clean_text
+from src.utils.parquet_store import parquet_available, table_path, write_game_table
+from src.utils.price_overlay import PriceOverlay, apply_price_to_record, load_price_overlay
+from src.utils.raw_store import QUERY_BATCH_SIZE, RawStore, open_raw_store, record_appid
+from src.utils.record_io import find_data_file, iter_data_file
+from src.utils.steam_schema import RAW_RECORD_TYPES
 
-from src.config.constant import (INFO_MAIN_COLS, PROCESSED_DATA_PATH,
-                                 PROJECT_ROOT, RAW_DATA_PATH, REVIEW_MAIN_COLS,
-                                 TAG_MAIN_COLS)
+# 自 raw 資料庫 (以 appid 為 key) 讀取的資料來源名稱
+RAW_STORE_SOURCE = "raw_store"
 
+# 轉換邏輯的版本 (納入 manifest 的輸入雜湊)：轉換結果改變時遞增，已處理的資料會自動重新轉換
+TRANSFORM_VERSION = 2
 
-def read_file(file_type: str, input_file_num: int):
-    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format(file_type)
-    input_file = f"{file_type}_{input_file_num}.json"
-    input_path = input_folder / input_file
+# 發售日期解析後的欄位
+RELEASE_DATE_COLS = ["release_date", "release_date_timestamp", "release_date_year", "release_date_month"]
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data
+# 增量 ETL 的單筆結果: (appid, input_hash, 轉換結果, 是否重新轉換)
+ManifestEntry = Tuple[Optional[int], Optional[str], Optional[dict], bool]
 
 
-def clean_html_tag(raw_str: str):
-    if raw_str is None:
-        return ""
-    soup = BeautifulSoup(raw_str, "html.parser")
-    return soup.get_text(separator=" ").strip()
+def read_file(file_type: str, input_file_num: int) -> Iterator[Dict]:
+    """
+    以串流方式逐筆讀取 raw 資料 (支援 JSONL 與舊版 JSON 格式)
+    依 steam_schema 的型別解碼，只建立轉換會用到的欄位；找不到檔案時拋出 FileNotFoundError
+    """
+    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format(file_type)
+    input_path = find_data_file(input_folder, file_type, input_file_num)
+    if input_path is None:
+        raise FileNotFoundError(f"找不到 {file_type}_{input_file_num} 資料檔")
+    return iter_data_file(input_path, RAW_RECORD_TYPES.get(file_type))
 
 
 def batch_clean_html(data: dict, col_list: list[str]):
     for col in col_list:
-        data[col] = clean_html_tag(raw_str=data.get(col, None))
-        data[col] = " ".join(data[col].split())
-        data[col] = data[col].replace("*", "").replace(" , ", ", ").strip()
+        data[col] = clean_text(data.get(col, None))
     return data
 
 
@@ -47,10 +64,7 @@ def clean_hardware_requirement(data):
         req_data = data[hardware]
         if isinstance(req_data, dict):
             for req_key, raw_value in req_data.items():
-                req_data[req_key] = clean_html_tag(raw_str=raw_value)
-                req_data[req_key] = " ".join(req_data[req_key].split())
-                req_data[req_key] = req_data[req_key].replace(
-                    "*", "").replace(" , ", ", ").strip()
+                req_data[req_key] = clean_text(raw_value)
     return data
 
 
@@ -96,272 +110,593 @@ def final_clean_nan(data):
             return None
         return data
     elif isinstance(data, str):
-        # 處理可能的字串型態 "nan" (雖然較少見，但預防萬一)
-        if data.lower() == "nan":
+        # 處理可能的字串型態 "nan" (雖然較少見，但預防萬一)；先比較長度，避免對長篇描述做 lower()
+        if len(data) == 3 and data.lower() == "nan":
             return None
         return data
     else:
         return data
 
 
-"""
-讀取檔案，並將三類資料合併
-"""
-# 設定起始檔案序號
-input_file_num = 1
+def transform_game(single_data: dict, raw_game_review: dict, raw_game_tag: dict) -> Optional[dict]:
+    """
+    將單一遊戲的 info / review / tag 原始資料合併並清洗
+    :param single_data: game info 原始資料 ({appid: {"success": ..., "data": {...}}})
+    :param raw_game_review: game review 原始資料 (找不到時傳入空字典)
+    :param raw_game_tag: game tag 原始資料 (找不到時傳入空字典)
+    :return: 清洗後的資料；info 無有效內容時回傳 None
+    """
+    # 保留info資料需要的欄位
+    key_list = list(single_data.keys())
+    if not key_list:
+        return None  # 防呆：空字典跳過
 
-while True:
-    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format("game_info")
-    input_file = f"game_info_{input_file_num}.json"
-    input_path = input_folder / input_file
+    appid = key_list[0]
+    raw_game_info = single_data.get(appid).get("data", {})
 
-    if not Path(input_path).exists():
-        print("已處理完所有檔案！")
-        break
+    # 若 raw_game_info 為 None (有些 Steam API 回傳 success: false)，則跳過
+    if not raw_game_info:
+        return None
 
-    print(f"正在處理第 {input_file_num} 個檔案...")  # 增加進度提示
+    new_game_info = {k: v for k,
+                     v in raw_game_info.items() if k in INFO_MAIN_COLS}
 
-    # 讀取json檔
-    try:
-        info_data = read_file(file_type="game_info",
-                              input_file_num=input_file_num)
-        tag_data = read_file(file_type="game_tag",
-                             input_file_num=input_file_num)
-        review_data = read_file(file_type="game_review",
-                                input_file_num=input_file_num)
-    except Exception as e:
-        print(f"讀取檔案 {input_file_num} 發生錯誤: {e}")
-        input_file_num += 1
-        continue
+    # 保留review資料需要的欄位 (使用 .get 避免 KeyError)
+    new_game_review = {
+        k: v for k, v in raw_game_review.items() if k in REVIEW_MAIN_COLS}
+
+    # 保留tag資料需要的欄位 (使用 .get 避免 KeyError)
+    new_game_tag = {k: v for k,
+                    v in raw_game_tag.items() if k in TAG_MAIN_COLS}
+
+    # 三類資料合併
+    new_game_info.update(new_game_review)
+    new_game_info.update(new_game_tag)
+    new_game_info.pop("appid", None)
 
-    # 取得data中的資料列表
-    info_list = info_data.get("data", [])
-    tag_list = tag_data.get("data", [])
-    review_list = review_data.get("data", [])
+    """
+    進行描述型欄位處理
+    """
+    new_game_info["supported_languages"] = clean_languages(
+        new_game_info.get("supported_languages", ""))
+
+    # 處理'detailed_description', 'about_the_game', 'short_description'
+    descriptive_col = ['detailed_description', 'about_the_game',
+                       'short_description', 'supported_languages']
+    new_game_info = batch_clean_html(
+        data=new_game_info, col_list=descriptive_col)
+
+    # 處理hardware_requirements
+    new_game_info = clean_hardware_requirement(data=new_game_info)
+    new_game_info = flatten_hardware_requirement(data=new_game_info)
+
+    """
+    進行數值與類別型欄位處理
+    """
+    # 處理category
+    new_category_list = []
+    if new_game_info.get("categories"):  # 檢查是否存在且不為 None
+        for category in new_game_info["categories"]:
+            new_category_list.append(category.get("description", ""))
+    new_game_info["categories"] = new_category_list
+
+    # 處理tags (增加安全檢查)
+    new_tag_list = []
+    if new_game_info.get("tags") and isinstance(new_game_info["tags"], dict):
+        n = 0
+        for tag in new_game_info["tags"]:
+            new_tag_list.append(tag)
+            n += 1
+            if n >= 15:
+                break
+    new_game_info["tags"] = new_tag_list
+
+    # 處理genres
+    new_genres_list = []
+    if new_game_info.get("genres"):
+        for genres in new_game_info["genres"]:
+            new_genres_list.append(genres.get("description", ""))
+    new_game_info["genres"] = new_genres_list
+
+    # 處理price_overview (增加 None 檢查)
+    price_cols = ['currency', 'initial']
+    price = new_game_info.get("price_overview")
+    if price:
+        price = {k: v for k, v in price.items() if k in price_cols}
+        # 確保 initial 存在且為數字
+        if 'initial' in price and price['initial'] is not None:
+            try:
+                price['initial'] = float(price['initial']) / 100
+            except (ValueError, TypeError):
+                price['initial'] = 0.0
+
+        price["price_initial"] = price.pop("initial", None)
+        price["price_currency"] = price.pop("currency", None)
+
+        new_game_info.update(price)
+        new_game_info.pop("price_overview", None)
+    else:
+        new_game_info["price_overview"] = None
+
+    # 處理platforms
+    platform_list = []
+    platforms = new_game_info.get('platforms', {})
+    if platforms:
+        for platform, is_supported in platforms.items():
+            if is_supported is True:
+                platform_list.append(platform)
+    new_game_info['platforms'] = ", ".join(platform_list)
+
+    # 處理metacritic (增加檢查)
+    if 'metacritic' in new_game_info and new_game_info['metacritic']:
+        new_game_info['metacritic_score'] = new_game_info['metacritic'].get(
+            'score')
+    else:
+        new_game_info['metacritic_score'] = None
+    new_game_info.pop('metacritic', None)
+
+    # 處理language
+    new_languages = new_game_info.get("supported_languages", [])
+    if type(new_languages) == str:
+        new_languages = new_languages.replace(
+            "languages with full audio support", "")
+        new_languages = new_languages.split(", ")
+        new_languages = [item.strip()
+                         for item in new_languages if type(item) == str]
+        new_game_info["languages"] = new_languages
+        new_game_info.pop("supported_languages", None)
+    else:
+        new_game_info["supported_languages"] = []
+        print(f"AppID {appid} 無語言資訊")
+
+    # 處理release_date (相同的日期字串只解析一次，結果由 date_parser 快取)
+    release_info = new_game_info.get('release_date', {})
+
+    if release_info.get("coming_soon"):
+        new_game_info['release_date'] = "coming_soon"
+    else:
+        release_date_str = release_info.get("date", "") or None
+        if release_date_str is not None and not isinstance(release_date_str, str):
+            raise TypeError(f"release_date 格式錯誤: {release_date_str!r}")
+        new_game_info.pop("release_date", None)
+        new_game_info.update(zip(RELEASE_DATE_COLS, release_date_fields(release_date_str)))
+
+    # 處理query_summary（review）
+    # 需先檢查是否拿到 query_summary，若無則給預設字典
+    review_overview = new_game_info.get("query_summary", {})
+    review_overview.pop('num_reviews', None)
+    review_overview.pop('review_score', None)
+
+    total = review_overview.get('total_reviews', 0)
+    # 確保 total 是數字
+    if not isinstance(total, (int, float)):
+        total = 0
+
+    pos = review_overview.get('total_positive', 0)
+    if not isinstance(pos, (int, float)):
+        pos = 0
+
+    positive_rate = round(pos / total, 4) if total > 0 else 0.0
+    review_overview["positive_rate"] = positive_rate
+    review_overview["rate_percentage"] = f"{positive_rate:.1%}"
+
+    new_game_info.update(review_overview)
+    # new_game_info["review"] = review_overview
+    new_game_info.pop("query_summary", None)
+
+    """最後清理NaN"""
+    return final_clean_nan(new_game_info)
+
+
+def read_split_records(input_file_num: int) -> Iterator[Tuple[dict, dict, dict]]:
+    """
+    讀取舊版分開爬取的三類資料 (同編號的 game_info / game_review / game_tag 檔案)
+    tag 與 review 先建立查詢表，info 則逐筆串流，回傳 (info, review, tag) 的迭代器
+    """
+    info_list = read_file(file_type="game_info", input_file_num=input_file_num)
 
     # 先轉換tag和review，添加app_id為key
-    tag_lookup = {str(item['appid']): item for item in tag_list}
-    review_lookup = {str(item['appid']): item for item in review_list}
+    tag_lookup = {str(item['appid']): item for item in read_file(
+        file_type="game_tag", input_file_num=input_file_num)}
+    review_lookup = {str(item['appid']): item for item in read_file(
+        file_type="game_review", input_file_num=input_file_num)}
+
+    def join_records():
+        for single_data in info_list:
+            appid = str(single_data.get("appid", next(iter(single_data), "")))
+            yield single_data, review_lookup.get(appid, {}), tag_lookup.get(appid, {})
+
+    return join_records()
+
 
-    final_json_data = {}
-    data_list = []
+def read_combined_records(input_file_num: int) -> Iterator[Tuple[dict, dict, dict]]:
+    """讀取合併爬蟲 (game_combined) 的資料，每筆已包含同一 AppID 的三類資料"""
+    for record in read_file(file_type="game_combined", input_file_num=input_file_num):
+        yield (record.get("game_info") or {},
+               record.get("game_review") or {},
+               record.get("game_tag") or {})
 
-    # 開始迴圈逐筆資料處理
-    for single_data in info_list:
+
+def read_store_records(input_file_num: int) -> Iterator[Tuple[dict, dict, dict]]:
+    """
+    自 raw 資料庫讀取第 input_file_num 批 AppID (依 appid 排序，每批 RAW_STORE_ETL_CHUNK_SIZE 筆)
+    info 逐筆串流，review 與 tag 每 QUERY_BATCH_SIZE 筆以主鍵批次查詢，
+    不論三類資料原本寫在哪個檔案都能正確合併，記憶體用量只與批次大小有關
+    """
+    store = RawStore(PROJECT_ROOT / RAW_STORE_PATH, read_only=True, typed=True)
+    chunk = store.chunk_range("game_info", input_file_num, RAW_STORE_ETL_CHUNK_SIZE)
+    if chunk is None:
+        store.close()
+        raise FileNotFoundError(f"raw 資料庫沒有第 {input_file_num} 批 game_info 資料")
+
+    def join_records():
         try:
-            # 保留info資料需要的欄位
-            key_list = list(single_data.keys())
-            if not key_list:
-                continue  # 防呆：空字典跳過
-
-            appid = key_list[0]
-            raw_game_info = single_data.get(appid).get("data", {})
-
-            # 若 raw_game_info 為 None (有些 Steam API 回傳 success: false)，則跳過
-            if not raw_game_info:
-                continue
-
-            new_game_info = {k: v for k,
-                             v in raw_game_info.items() if k in INFO_MAIN_COLS}
-
-            # 保留review資料需要的欄位 (使用 .get 避免 KeyError)
-            raw_game_review = review_lookup.get(appid, {})
-            new_game_review = {
-                k: v for k, v in raw_game_review.items() if k in REVIEW_MAIN_COLS}
-
-            # 保留tag資料需要的欄位 (使用 .get 避免 KeyError)
-            raw_game_tag = tag_lookup.get(appid, {})
-            new_game_tag = {k: v for k,
-                            v in raw_game_tag.items() if k in TAG_MAIN_COLS}
-
-            # 三類資料合併
-            new_game_info.update(new_game_review)
-            new_game_info.update(new_game_tag)
-            new_game_info.pop("appid", None)
-
-            """
-            進行描述型欄位處理
-            """
-            new_game_info["supported_languages"] = clean_languages(
-                new_game_info.get("supported_languages", ""))
-
-            # 處理'detailed_description', 'about_the_game', 'short_description'
-            descriptive_col = ['detailed_description', 'about_the_game',
-                               'short_description', 'supported_languages']
-            new_game_info = batch_clean_html(
-                data=new_game_info, col_list=descriptive_col)
-
-            # 處理hardware_requirements
-            new_game_info = clean_hardware_requirement(data=new_game_info)
-            new_game_info = flatten_hardware_requirement(data=new_game_info)
-
-            """
-            進行數值與類別型欄位處理
-            """
-            # 處理category
-            new_category_list = []
-            if new_game_info.get("categories"):  # 檢查是否存在且不為 None
-                for category in new_game_info["categories"]:
-                    new_category_list.append(category.get("description", ""))
-            new_game_info["categories"] = new_category_list
-
-            # 處理tags (增加安全檢查)
-            new_tag_list = []
-            if new_game_info.get("tags") and isinstance(new_game_info["tags"], dict):
-                n = 0
-                for tag in new_game_info["tags"]:
-                    new_tag_list.append(tag)
-                    n += 1
-                    if n >= 15:
-                        break
-            new_game_info["tags"] = new_tag_list
-
-            # 處理genres
-            new_genres_list = []
-            if new_game_info.get("genres"):
-                for genres in new_game_info["genres"]:
-                    new_genres_list.append(genres.get("description", ""))
-            new_game_info["genres"] = new_genres_list
-
-            # 處理price_overview (增加 None 檢查)
-            price_cols = ['currency', 'initial']
-            price = new_game_info.get("price_overview")
-            if price:
-                price = {k: v for k, v in price.items() if k in price_cols}
-                # 確保 initial 存在且為數字
-                if 'initial' in price and price['initial'] is not None:
-                    try:
-                        price['initial'] = float(price['initial']) / 100
-                    except (ValueError, TypeError):
-                        price['initial'] = 0.0
-
-                price["price_initial"] = price.pop("initial", None)
-                price["price_currency"] = price.pop("currency", None)
-
-                new_game_info.update(price)
-                new_game_info.pop("price_overview", None)
-            else:
-                new_game_info["price_overview"] = None
-
-            # 處理platforms
-            platform_list = []
-            platforms = new_game_info.get('platforms', {})
-            if platforms:
-                for platform, is_supported in platforms.items():
-                    if is_supported is True:
-                        platform_list.append(platform)
-            new_game_info['platforms'] = ", ".join(platform_list)
-
-            # 處理metacritic (增加檢查)
-            if 'metacritic' in new_game_info and new_game_info['metacritic']:
-                new_game_info['metacritic_score'] = new_game_info['metacritic'].get(
-                    'score')
-            else:
-                new_game_info['metacritic_score'] = None
-            new_game_info.pop('metacritic', None)
-
-            # 處理language
-            new_languages = new_game_info.get("supported_languages", [])
-            if type(new_languages) == str:
-                new_languages = new_languages.replace(
-                    "languages with full audio support", "")
-                new_languages = new_languages.split(", ")
-                new_languages = [item.strip()
-                                 for item in new_languages if type(item) == str]
-                new_game_info["languages"] = new_languages
-                new_game_info.pop("supported_languages", None)
-            else:
-                new_game_info["supported_languages"] = []
-                print(f"第{info_list.index(single_data)}筆資料無語言資訊")
-
-            # 處理release_date (增加格式錯誤處理)
-            release_info = new_game_info.get('release_date', {})
-            # 預設值
-            new_release_date = {
-                "release_date": None,
-                "release_date_timestamp": None,
-                "release_date_year": None,
-                "release_date_month": None,
-            }
-
-            if release_info.get("coming_soon"):
-                new_game_info['release_date'] = "coming_soon"
-            else:
-                release_date_str = release_info.get("date", "")
-                if release_date_str:
-                    try:
-                        release_date_obj = datetime.strptime(
-                            release_date_str, '%d %b, %Y')
-                        new_release_date.update({
-                            "release_date": release_date_obj.strftime('%Y-%m-%d'),
-                            "release_date_timestamp": int(release_date_obj.timestamp()),
-                            "release_date_year": release_date_obj.year,
-                            "release_date_month": release_date_obj.month,
-                        })
-                    except ValueError:
-                        # 遇到無法解析的日期格式 (如 "Oct 2020")，保留原始字串或設為 None
-                        pass
-                new_game_info.pop("release_date", None)
-                new_game_info.update(new_release_date)
-
-            # 處理query_summary（review）
-            # 需先檢查是否拿到 query_summary，若無則給預設字典
-            review_overview = new_game_info.get("query_summary", {})
-            review_overview.pop('num_reviews', None)
-            review_overview.pop('review_score', None)
-
-            total = review_overview.get('total_reviews', 0)
-            # 確保 total 是數字
-            if not isinstance(total, (int, float)):
-                total = 0
-
-            pos = review_overview.get('total_positive', 0)
-            if not isinstance(pos, (int, float)):
-                pos = 0
-
-            positive_rate = round(pos / total, 4) if total > 0 else 0.0
-            review_overview["positive_rate"] = positive_rate
-            review_overview["rate_percentage"] = f"{positive_rate:.1%}"
-
-            new_game_info.update(review_overview)
-            # new_game_info["review"] = review_overview
-            new_game_info.pop("query_summary", None)
-
-            """最後清理NaN"""
-            new_game_info = final_clean_nan(new_game_info)
-
-            # 加入列表
-            data_list.append(new_game_info)
+            for batch in iter_shards(store.iter_range("game_info", *chunk), QUERY_BATCH_SIZE):
+                app_ids = [app_id for app_id, _ in batch]
+                review_lookup = store.get_many("game_review", app_ids)
+                tag_lookup = store.get_many("game_tag", app_ids)
+                for app_id, single_data in batch:
+                    yield single_data, review_lookup.get(app_id, {}), tag_lookup.get(app_id, {})
+        finally:
+            store.close()
+
+    return join_records()
 
+
+def detect_source_type() -> str:
+    """
+    優先使用已匯入既有資料的 raw 資料庫；其次為合併爬蟲的資料，否則讀取分開爬取的三類檔案
+    (raw 資料庫尚未執行 SteamRawStore import 時，只有之後爬取的資料，不作為來源)
+    """
+    store = open_raw_store(PROJECT_ROOT / RAW_STORE_PATH)
+    if store is not None:
+        try:
+            if store.count("game_info"):
+                return RAW_STORE_SOURCE
+        finally:
+            store.close()
+    if find_data_file(PROJECT_ROOT / RAW_DATA_PATH.format("game_combined"), "game_combined", 1) is None:
+        return "game_info"
+    return "game_combined"
+
+
+def list_input_file_nums(source_type: str) -> List[int]:
+    """依序列出存在的原始資料檔編號 (遇到缺號即停止，與爬蟲的輸出方式一致)；raw 資料庫則為批次編號"""
+    if source_type == RAW_STORE_SOURCE:
+        store = RawStore(PROJECT_ROOT / RAW_STORE_PATH, read_only=True)
+        try:
+            return list(range(1, math.ceil(store.count("game_info") / RAW_STORE_ETL_CHUNK_SIZE) + 1))
+        finally:
+            store.close()
+    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format(source_type)
+    file_nums = []
+    while find_data_file(input_folder, source_type, len(file_nums) + 1) is not None:
+        file_nums.append(len(file_nums) + 1)
+    return file_nums
+
+
+def read_records(source_type: str, input_file_num: int) -> Iterator[Tuple[dict, dict, dict]]:
+    if source_type == RAW_STORE_SOURCE:
+        return read_store_records(input_file_num=input_file_num)
+    if source_type == "game_combined":
+        return read_combined_records(input_file_num=input_file_num)
+    return read_split_records(input_file_num=input_file_num)
+
+
+# 已下架的 AppID、是否比對 manifest、本次執行的開始時間、價格覆蓋層與已失效的覆蓋層 AppID
+# (由 init_worker 於每個 worker 程序設定一次，避免每個任務重複傳送)
+_removed_appids: Set[int] = set()
+_incremental = False
+_run_started = 0.0
+_price_overlay: Dict[int, Dict] = {}
+_superseded_prices: Set[int] = set()
+
+
+def init_worker(removed_appids: Set[int], incremental: bool = False, run_started: Optional[float] = None,
+                price_overlay: Optional[Dict[int, Dict]] = None, superseded_prices: Optional[Set[int]] = None):
+    global _removed_appids, _incremental, _run_started, _price_overlay, _superseded_prices
+    _removed_appids = removed_appids
+    _incremental = incremental
+    _run_started = run_started if run_started is not None else time.time()
+    _price_overlay = price_overlay or {}
+    _superseded_prices = superseded_prices or set()
+
+
+def transform_batch(records: List[Tuple[dict, dict, dict]],
+                    start_index: int = 0) -> List[Tuple[bool, Optional[dict]]]:
+    """
+    逐筆轉換 (info, review, tag)，單筆失敗只印出錯誤，不中斷整批：回傳 [(是否成功, 轉換結果)]
+    """
+    results: List[Tuple[bool, Optional[dict]]] = []
+    for data_index, (single_data, raw_game_review, raw_game_tag) in enumerate(records, start_index):
+        try:
+            results.append((True, transform_game(
+                single_data=single_data, raw_game_review=raw_game_review, raw_game_tag=raw_game_tag)))
         except Exception as e:
             # 捕捉單筆資料處理失敗，印出錯誤但不中斷整個迴圈
             print(
-                f"處理第 {info_list.index(single_data)} 筆資料時時發生錯誤: {e}")
+                f"處理第 {data_index} 筆資料時時發生錯誤: {e}")
             traceback.print_exc()  # 如果需要詳細錯誤訊息可以取消註解
-            continue
+            results.append((False, None))
+    return results
+
 
+def transform_entries(records: Iterable[Tuple[dict, dict, dict]]) -> List[ManifestEntry]:
     """
-    儲存處理完的檔案 (移出迴圈外)
+    整批轉換並附上輸入雜湊，回傳 [(appid, input_hash, 輸出, 是否重新轉換)]
+    增量模式下輸入雜湊與 manifest 相同者直接沿用上次的輸出；
+    轉換失敗或已下架者 input_hash 為 None (不記錄於 manifest，下次重新轉換)
     """
-    if data_list:  # 確保有資料才寫入
-        update_date = datetime.now().strftime("%Y-%m-%d")
-        update_time = datetime.now().strftime("%H:%M:%S")
+    entries: List[ManifestEntry] = []
+    manifest = EtlManifest(PROJECT_ROOT / ETL_MANIFEST_PATH, read_only=True) if _incremental else None
+    try:
+        for batch in iter_shards(records, QUERY_BATCH_SIZE):
+            # 轉換邏輯的版本一併納入雜湊，版本變更後所有資料都會重新轉換
+            keyed = [(record_appid(record[0]) if record[0] else None,
+                      content_hash([TRANSFORM_VERSION, *record]), record)
+                     for record in batch]
+            previous = manifest.get_many(
+                JSON_STAGE, [app_id for app_id, _, _ in keyed if app_id is not None]) if manifest else {}
+
+            batch_entries: List[Optional[ManifestEntry]] = []
+            pending = []
+            for app_id, input_hash, record in keyed:
+                if app_id in _removed_appids:
+                    # 只有 manifest 仍有紀錄 (上次有輸出) 時才算變動，否則每次增量執行都會重寫含下架 AppID 的檔案
+                    batch_entries.append((app_id, None, None, app_id in previous))
+                elif app_id in previous and previous[app_id][0] == input_hash:
+                    batch_entries.append((app_id, input_hash, previous[app_id][2], False))
+                else:
+                    batch_entries.append(None)
+                    pending.append((len(batch_entries) - 1, app_id, input_hash, record))
+
+            results = transform_batch([record for _, _, _, record in pending], start_index=len(entries))
+            for (position, app_id, input_hash, _), (ok, new_game_info) in zip(pending, results):
+                if new_game_info is not None and new_game_info.get("steam_appid") in _removed_appids:
+                    ok, new_game_info = False, None
+                batch_entries[position] = (app_id, input_hash if ok else None, new_game_info, True)
+            entries.extend(batch_entries)
+    finally:
+        if manifest is not None:
+            manifest.close()
+    return entries
+
+
+def save_json_data(input_file_num: int, data_list: List[dict]):
+    """儲存處理完的檔案 (與輸入檔案同編號)"""
+    if not data_list:  # 確保有資料才寫入
+        print(f"檔案 {input_file_num} 無有效資料，跳過寫入。")
+        return
 
-        final_json_data["update_date"] = update_date
-        final_json_data["update_time"] = update_time
-        final_json_data["data"] = data_list
+    final_json_data = {
+        "update_date": datetime.now().strftime("%Y-%m-%d"),
+        "update_time": datetime.now().strftime("%H:%M:%S"),
+        "data": data_list,
+    }
 
-        json_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("json_data")
-        # 確保目標資料夾存在
-        json_folder.mkdir(parents=True, exist_ok=True)
+    json_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("json_data")
+    # 確保目標資料夾存在
+    json_folder.mkdir(parents=True, exist_ok=True)
 
-        json_file_name = f"json_data_{input_file_num}.json"
-        save_path = json_folder / json_file_name
+    save_path = json_folder / f"json_data_{input_file_num}.json"
+    print(f"正在寫入檔案: {save_path}")
+    write_json(save_path, final_json_data)
+
+
+def save_parquet_data(input_file_num: int, data_list: List[dict]):
+    """同時輸出欄位式的 Parquet 檔案 (與 json_data 同編號)，供下游只讀取需要的欄位"""
+    if not data_list or not PARQUET_OUTPUT_ENABLED or not parquet_available():
+        return
+    write_game_table(table_path(PROJECT_ROOT, input_file_num), data_list, compression=PARQUET_COMPRESSION)
 
-        print(f"正在寫入檔案: {save_path}")
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(final_json_data, f, ensure_ascii=False, indent=2)
-    else:
-        print(f"檔案 {input_file_num} 無有效資料，跳過寫入。")
 
-    input_file_num += 1
+def apply_price_overlay(output: dict) -> dict:
+    """
+    套用價格覆蓋層 (SteamPriceRefresher 取得、比 raw 資料新的價格)
+    回傳複本，manifest 仍記錄 raw 資料的轉換結果
+    """
+    price_patch = _price_overlay.get(output.get("steam_appid"))
+    if price_patch is None:
+        return output
+    output = dict(output)
+    apply_price_to_record(output, price_patch)
+    return output
+
+
+def save_entries(input_file_num: int, entries: List[ManifestEntry]) -> int:
+    """
+    寫出單一檔案並更新 manifest；增量模式下所有資料都未變動且檔案內容相同時略過寫入
+    (價格覆蓋層失效的 AppID 檔案中仍是覆蓋層的價格，需重新寫出)
+    :return: 輸出筆數
+    """
+    data_list = [apply_price_overlay(output) for _, _, output, _ in entries if output is not None]
+    changed_count = sum(1 for _, _, _, changed in entries if changed)
+
+    manifest = EtlManifest(PROJECT_ROOT / ETL_MANIFEST_PATH)
+    try:
+        save_path = PROJECT_ROOT / PROCESSED_DATA_PATH.format("json_data") / f"json_data_{input_file_num}.json"
+        output_appids = {app_id for app_id, _, output, _ in entries if output is not None}
+        unchanged = (_incremental and changed_count == 0 and save_path.exists()
+                     and not output_appids & _superseded_prices
+                     and manifest.file_appids(JSON_STAGE, input_file_num) == output_appids)
+        if unchanged:
+            print(f"檔案 {input_file_num} 沒有變動 ({len(data_list)} 筆)，略過寫入。")
+        else:
+            save_json_data(input_file_num, data_list)
+            if _incremental:
+                reused_count = sum(1 for _, _, output, changed in entries if not changed and output is not None)
+                print(f"檔案 {input_file_num}: 重新轉換 {changed_count} 筆，沿用 {reused_count} 筆")
+        if not unchanged or not table_path(PROJECT_ROOT, input_file_num).exists():
+            save_parquet_data(input_file_num, data_list)
+        manifest.update_file(JSON_STAGE, input_file_num,
+                             [entry for entry in entries if entry[0] is not None], seen_at=_run_started)
+    finally:
+        manifest.close()
+    return len(data_list)
+
+
+def process_file(source_type: str, input_file_num: int) -> Tuple[int, Optional[int]]:
+    """
+    讀取、轉換並寫出單一原始資料檔 (檔案層級平行時於 worker 程序中執行)
+    :return: (檔案編號, 輸出筆數)；讀取失敗時輸出筆數為 None
+    """
+    print(f"正在處理第 {input_file_num} 個檔案...")  # 增加進度提示
+
+    # 讀取資料檔 (逐筆串流處理)
+    try:
+        record_list = read_records(source_type, input_file_num)
+    except Exception as e:
+        print(f"讀取檔案 {input_file_num} 發生錯誤: {e}")
+        return input_file_num, None
+
+    return input_file_num, save_entries(input_file_num, transform_entries(record_list))
+
+
+def iter_shards(records: Iterator, shard_size: int) -> Iterator[List]:
+    shard = []
+    for record in records:
+        shard.append(record)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def process_file_sharded(executor: ProcessPoolExecutor, source_type: str, input_file_num: int,
+                         shard_size: int, max_pending: int, ordered: bool) -> Tuple[int, Optional[int]]:
+    """
+    將單一檔案切成每 shard_size 筆一個分片，交由 worker 轉換後合併寫出
+    (檔案數少於 worker 數、或單檔很大時使用)；同時進行中的分片數上限為 max_pending，避免整檔載入記憶體
+    :param ordered: True 時輸出依原始順序排列，False 時依完成順序 (不需等待較慢的分片)
+    """
+    print(f"正在處理第 {input_file_num} 個檔案 (每個分片 {shard_size} 筆)...")
+    try:
+        record_list = read_records(source_type, input_file_num)
+    except Exception as e:
+        print(f"讀取檔案 {input_file_num} 發生錯誤: {e}")
+        return input_file_num, None
+
+    results: Dict[int, List[ManifestEntry]] = {}
+    completed: List[ManifestEntry] = []
+    pending = {}
+
+    def collect(done_futures):
+        for future in done_futures:
+            shard_index = pending.pop(future)
+            if ordered:
+                results[shard_index] = future.result()
+            else:
+                completed.extend(future.result())
+
+    for shard_index, shard in enumerate(iter_shards(record_list, shard_size)):
+        if len(pending) >= max_pending:
+            done_futures, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done_futures)
+        pending[executor.submit(transform_entries, shard)] = shard_index
+    collect(wait(pending).done)
+
+    entries = completed
+    if ordered:
+        entries = [entry for shard_index in sorted(results) for entry in results[shard_index]]
+    return input_file_num, save_entries(input_file_num, entries)
+
+
+def run_etl(workers: Optional[int] = None, shard_size: Optional[int] = None,
+            ordered: bool = True, source_type: Optional[str] = None,
+            incremental: bool = True) -> Dict[int, int]:
+    """
+    執行 ETL：合併並清洗 raw 資料，輸出至 data/processed/json_data/json_data_N.json
+    HTML 清洗為 CPU 密集的工作，以 ProcessPoolExecutor 分散至多個核心
+    :param workers: worker 程序數 (預設為 CPU 核心數；1 代表在目前程序中依序執行)
+    :param shard_size: 指定時將每個檔案切成分片平行處理，否則以檔案為單位平行處理
+    :param ordered: 依輸入順序輸出 (檔案層級為完成報告的順序，分片層級為檔案內的資料順序)
+    :param source_type: 資料來源 ('raw_store'、'game_combined' 或 'game_info')，預設自動偵測
+    :param incremental: 依 manifest 略過輸入未變動的資料 (False 時全部重新轉換，仍會更新 manifest)
+    :return: {檔案編號: 輸出筆數}
+    """
+    source_type = source_type or detect_source_type()
+    workers = workers or os.cpu_count() or 1
+    print(f"資料來源: {source_type}，worker 數: {workers}，{'增量' if incremental else '完整'}模式")
+
+    # AppID 目錄中已自 Steam 下架的遊戲不再輸出
+    removed_appids = load_removed_appids(PROJECT_ROOT / APP_CATALOGUE_PATH)
+    if removed_appids:
+        print(f"略過 {len(removed_appids)} 筆已下架的 AppID")
+
+    # 價格批次更新 (SteamPriceRefresher) 的價格覆蓋於 raw 資料之上；之後重新爬取的 AppID 以 raw 資料為準
+    price_overlay, superseded_prices = load_price_overlay(PROJECT_ROOT / PRICE_OVERLAY_PATH, PROJECT_ROOT)
+    if price_overlay or superseded_prices:
+        print(f"套用 {len(price_overlay)} 筆價格更新 ({len(superseded_prices)} 筆已由重新爬取的資料取代)")
+
+    file_nums = list_input_file_nums(source_type)
+    run_started = time.time()
+    start_time = time.perf_counter()
+    output_counts: Dict[int, Optional[int]] = {}
+
+    # 寫出檔案 (save_entries) 可能在主程序中執行，主程序也需設定
+    init_worker(removed_appids, incremental, run_started, price_overlay, superseded_prices)
+    if workers <= 1:
+        for input_file_num in file_nums:
+            output_counts[input_file_num] = process_file(source_type, input_file_num)[1]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(removed_appids, incremental, run_started,
+                                           price_overlay, superseded_prices)) as executor:
+            if shard_size:
+                for input_file_num in file_nums:
+                    output_counts[input_file_num] = process_file_sharded(
+                        executor, source_type, input_file_num, shard_size,
+                        max_pending=workers * 2, ordered=ordered)[1]
+            else:
+                futures = [executor.submit(process_file, source_type, input_file_num)
+                           for input_file_num in file_nums]
+                for future in (futures if ordered else as_completed(futures)):
+                    input_file_num, data_count = future.result()
+                    output_counts[input_file_num] = data_count
+                    print(f"檔案 {input_file_num} 完成 ({data_count} 筆)")
+
+    failed_files = [file_num for file_num, count in output_counts.items() if count is None]
+    if failed_files:
+        # 有檔案讀取失敗時，無法判斷哪些 AppID 已自輸入移除，保留其 manifest 紀錄
+        print(f"以下檔案讀取失敗，本次不清理 manifest: {failed_files}")
+    else:
+        manifest = EtlManifest(PROJECT_ROOT / ETL_MANIFEST_PATH)
+        try:
+            manifest.prune(JSON_STAGE, seen_before=run_started)
+        finally:
+            manifest.close()
+        # 已失效的價格都已重新寫出，自覆蓋層刪除
+        if superseded_prices:
+            overlay = PriceOverlay(PROJECT_ROOT / PRICE_OVERLAY_PATH)
+            try:
+                overlay.remove(superseded_prices)
+            finally:
+                overlay.close()
+
+    output_counts = {file_num: count or 0 for file_num, count in output_counts.items()}
+    print(f"已處理完所有檔案！(共 {len(file_nums)} 個檔案，{sum(output_counts.values())} 筆，"
+          f"耗時 {time.perf_counter() - start_time:.1f} 秒)")
+    return output_counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="合併並清洗 raw 資料 (info / review / tag)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker 程序數 (預設為 CPU 核心數，1 代表不使用程序池)")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help="將每個檔案切成指定筆數的分片平行處理 (檔案數少於 worker 數時使用)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="依完成順序輸出，不等待較慢的檔案或分片")
+    parser.add_argument("--source", choices=[RAW_STORE_SOURCE, "game_combined", "game_info"], default=None,
+                        help="資料來源 (預設：raw 資料庫已匯入時優先使用，其次為 game_combined)")
+    parser.add_argument("--full", action="store_true",
+                        help="忽略 manifest，重新轉換所有資料 (轉換邏輯變更後使用)")
+    args = parser.parse_args(argv)
+
+    run_etl(workers=args.workers, shard_size=args.shard_size,
+            ordered=not args.unordered, source_type=args.source, incremental=not args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from src.config.constant import (APP_CATALOGUE_PATH, ETL_MANIFEST_PATH, PROCESSED_DATA_PATH, PROJECT_ROOT,
+                                 RAW_DATA_PATH, REVIEW_DOC_TYPE, REVIEW_DOCUMENT_MAX_CHARS,
+                                 REVIEW_EMBEDDING_CHANGES_PATH)
+from src.utils.app_catalogue import load_removed_appids
+from src.utils.etl_manifest import REVIEW_STAGE, EtlManifest, content_hash, emit_changes
+from src.utils.fast_json import write_json
+from src.utils.parquet_store import iter_processed_columns
+from src.utils.record_io import find_data_file, iter_data_file
+
+RAW_TYPE = "game_review_text"
+
+# 評論文件產生邏輯的版本 (納入 manifest 的輸入雜湊)：文件內容改變時遞增，已產生的文件會自動重新產生
+REVIEW_VERSION = 1
+
+# Steam 評論使用 BBCode ([b]、[h1]、[url=...]、[spoiler] 等)
+BBCODE_PATTERN = re.compile(r"\[/?[a-zA-Z0-9*]+(?:=[^\]]*)?\]")
+
+
+def clean_review_text(raw_str: str) -> str:
+    """去除 BBCode 標籤並壓縮空白"""
+    if not raw_str:
+        return ""
+    return " ".join(BBCODE_PATTERN.sub(" ", raw_str).split())
+
+
+def load_game_names() -> Dict[int, str]:
+    """從 processed 資料建立 {steam_appid: 遊戲名稱} 查詢表 (有 Parquet 時只讀取這兩個欄位)"""
+    names = {}
+    for record in iter_processed_columns(PROJECT_ROOT, ["steam_appid", "name"]):
+        if record.get("steam_appid"):
+            names[record["steam_appid"]] = record.get("name")
+    return names
+
+
+def format_review(review: Dict) -> str:
+    """單則評論的文字：推薦與否、評論時遊玩時數、認同人數與內文"""
+    verdict = "推薦" if review.get("voted_up") else "不推薦"
+    playtime_hours = round((review.get("playtime_at_review") or 0) / 60, 1)
+    return (f"[{verdict} | 遊玩 {playtime_hours} 小時 | {review.get('votes_up') or 0} 人認同] "
+            f"{clean_review_text(review.get('review'))}")
+
+
+def build_review_documents(record: Dict, name: str) -> List[Dict]:
+    """
+    將單一 AppID 的評論轉為文件：依語言分組、依有用程度排序，
+    合併至 REVIEW_DOCUMENT_MAX_CHARS 字元為一份文件 (context + metadata，與 document 檔案格式相同)
+    """
+    app_id = record.get("appid")
+    reviews_by_language: Dict[str, List[Dict]] = {}
+    for review in record.get("reviews") or []:
+        if clean_review_text(review.get("review")):
+            reviews_by_language.setdefault(review.get("language") or "unknown", []).append(review)
+
+    documents = []
+    for language, reviews in reviews_by_language.items():
+        reviews.sort(key=lambda r: float(r.get("weighted_vote_score") or 0), reverse=True)
+        header = f"name: {name}\nreview_language: {language}\n"
+
+        chunks: List[List[Dict]] = [[]]
+        chunk_chars = len(header)
+        for review in reviews:
+            review_chars = len(format_review(review)) + 1
+            if chunks[-1] and chunk_chars + review_chars > REVIEW_DOCUMENT_MAX_CHARS:
+                chunks.append([])
+                chunk_chars = len(header)
+            chunks[-1].append(review)
+            chunk_chars += review_chars
+
+        for chunk_index, chunk in enumerate(chunks):
+            timestamps = [r.get("timestamp_created") or 0 for r in chunk]
+            positive_count = sum(1 for r in chunk if r.get("voted_up"))
+            documents.append({
+                "context": header + "\n".join(format_review(r) for r in chunk) + "\n",
+                "metadata": {
+                    "doc_type": REVIEW_DOC_TYPE,
+                    "steam_appid": app_id,
+                    "name": name,
+                    "review_language": language,
+                    "review_chunk": chunk_index,
+                    "review_count": len(chunk),
+                    "positive_count": positive_count,
+                    "positive_rate": round(positive_count / len(chunk), 4),
+                    "review_timestamp_min": min(timestamps),
+                    "review_timestamp_max": max(timestamps),
+                }
+            })
+    return documents
+
+
+def iter_raw_files() -> Iterator:
+    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format(RAW_TYPE)
+    file_num = 1
+    while (input_path := find_data_file(input_folder, RAW_TYPE, file_num)) is not None:
+        yield file_num, input_path
+        file_num += 1
+
+
+def run_review_etl(incremental: bool = True) -> Dict:
+    """
+    將 data/raw/game_review_text 轉為 data/processed/review_document，
+    並將評論有變動 / 已移除的 AppID 合併至評論的待向量化變動清單 (REVIEW_EMBEDDING_CHANGES_PATH)
+    :param incremental: 依 manifest 沿用未變動 AppID 的評論文件 (False 時全部重新轉換，所有 AppID 都列為變動)
+    :return: 變動清單
+    """
+    save_folder = PROJECT_ROOT / PROCESSED_DATA_PATH.format("review_document")
+    save_folder.mkdir(parents=True, exist_ok=True)
+
+    game_names = load_game_names()
+    removed_appids = load_removed_appids(PROJECT_ROOT / APP_CATALOGUE_PATH)
+
+    # 同一 AppID 重新爬取時會附加在較後面的檔案，先找出每個 AppID 最新一筆所在的檔案 (只讀取 appid)
+    latest_file_nums: Dict[int, int] = {}
+    for file_num, input_path in iter_raw_files():
+        for record in iter_data_file(input_path):
+            if record.get("appid"):
+                latest_file_nums[record["appid"]] = file_num
+
+    run_started = time.time()
+    changed_appids: Set[int] = set()
+    # 變動後沒有任何評論文件的 AppID 改列為移除，向量化時才會刪除其舊的評論文件
+    emptied_appids: Set[int] = set()
+    has_failure = False
+
+    manifest = EtlManifest(PROJECT_ROOT / ETL_MANIFEST_PATH)
+    try:
+        for file_num, input_path in iter_raw_files():
+            print(f"正在處理第 {file_num} 個檔案: {input_path.name}")
+
+            latest_records: Dict[int, Dict] = {}
+            for record in iter_data_file(input_path):
+                app_id = record.get("appid")
+                if latest_file_nums.get(app_id) == file_num and app_id not in removed_appids:
+                    latest_records[app_id] = record
+
+            previous = manifest.get_many(REVIEW_STAGE, latest_records) if incremental else {}
+            entries = []
+            document_list = []
+            file_changed: Set[int] = set()
+            for app_id, record in latest_records.items():
+                name = game_names.get(app_id) or str(app_id)
+                # 遊戲名稱寫在每份評論文件中，一併納入雜湊
+                input_hash = content_hash([REVIEW_VERSION, name, record])
+                if app_id in previous and previous[app_id][0] == input_hash:
+                    documents = previous[app_id][2] or []
+                    entries.append((app_id, input_hash, documents, False))
+                else:
+                    try:
+                        documents = build_review_documents(record, name=name)
+                    except Exception as e:
+                        print(f"處理 AppID {app_id} 的評論時發生錯誤: {e}")
+                        # 不記錄於 manifest，下次重新轉換
+                        entries.append((app_id, None, None, True))
+                        continue
+                    entries.append((app_id, input_hash, documents, True))
+                    file_changed.add(app_id)
+                document_list.extend(documents)
+
+            save_path = save_folder / f"review_document_{file_num}.json"
+            if (incremental and not file_changed and save_path.exists()
+                    and manifest.file_appids(REVIEW_STAGE, file_num)
+                    == {entry[0] for entry in entries if entry[1] is not None}):
+                print(f"{save_path.name} 沒有變動 ({len(document_list)} 份評論文件)，略過寫入。")
+            else:
+                try:
+                    # 沒有有效評論時仍寫入空檔，避免保留舊的輸出且檔案編號保持連續
+                    write_json(save_path, document_list)
+                    print(f"已儲存 {save_path.name} ({len(document_list)} 份評論文件，變動 {len(file_changed)} 個 AppID)")
+                except Exception as e:
+                    print(f"儲存 {save_path.name} 時發生錯誤: {e}")
+                    has_failure = True
+                    continue
+
+            manifest.update_file(REVIEW_STAGE, file_num, entries, seen_at=run_started)
+            for app_id, _, documents, changed in entries:
+                if changed and documents is not None:
+                    (changed_appids if documents else emptied_appids).add(app_id)
+
+        # 有檔案寫入失敗時，無法判斷哪些 AppID 已自輸入移除，保留其 manifest 紀錄
+        pruned_appids = set() if has_failure else manifest.prune(REVIEW_STAGE, seen_before=run_started)
+    finally:
+        manifest.close()
+
+    changes = emit_changes(PROJECT_ROOT / REVIEW_EMBEDDING_CHANGES_PATH, changed_appids,
+                           emptied_appids | pruned_appids)
+    print(f"本次評論變動 {len(changed_appids)} 筆、移除 {len(emptied_appids | pruned_appids)} 筆 "
+          f"(待向量化: 變動 {len(changes['changed'])} 筆、移除 {len(changes['removed'])} 筆)")
+    print("--- 評論 ETL 轉換任務結束 ---")
+    return changes
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="將評論內文轉為評論文件 (context + metadata)")
+    parser.add_argument("--full", action="store_true",
+                        help="忽略 manifest，重新轉換所有評論文件 (所有 AppID 都列入待向量化清單)")
+    args = parser.parse_args(argv)
+
+    run_review_etl(incremental=not args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,184 @@ GAME_INFO_URL = "https://store.steampowered.com/api/appdetails?appids={}"
 # 爬取game review的API端點
 GAME_REVIEW_URL = "https://store.steampowered.com/appreviews/{}?json=1&language=all&num_per_page=0"
 
+# 爬取game review內文的API端點 (依 cursor 分頁，每頁最多 100 筆；cursor 需經 URL 編碼)
+GAME_REVIEW_TEXT_URL = ("https://store.steampowered.com/appreviews/{appid}?json=1&language={language}"
+                        "&filter={filter}&review_type={review_type}&purchase_type={purchase_type}"
+                        "&day_range={day_range}&num_per_page={num_per_page}&cursor={cursor}")
+# 評論內文爬蟲設定
+# (languages: 依序爬取的語言 (Steam 語言代碼，"all" 代表不限)，每個 AppID 的評論數上限依剩餘語言平均分配；
+#  filter: "all" 依有用程度排序 (day_range 天內)、"recent" 依發表時間排序；
+#  max_pages_per_language: 每種語言最多請求的頁數；min_review_length / min_votes_up: 過濾過短或無人認同的評論；
+#  max_review_age_days: 只保留指定天數內的評論，filter 為 "recent" 時遇到較舊的評論即停止分頁)
+REVIEW_TEXT_SETTINGS = {
+    "languages": ["english", "tchinese", "schinese"],
+    "filter": "all",
+    "review_type": "all",
+    "purchase_type": "all",
+    "day_range": 365,
+    "num_per_page": 100,
+    "max_reviews_per_app": 300,
+    "max_pages_per_language": 10,
+    "min_review_length": 20,
+    "min_votes_up": 0,
+    "max_review_age_days": None,
+}
+
 # 爬取game tag的API端點
 GAME_TAG_URL = "https://steamspy.com/api.php?request=appdetails&appid={}"
 
+# 批次價格更新的API端點 (filters=price_overview 時可一次查詢多個以逗號分隔的 appid)
+GAME_PRICE_URL = "https://store.steampowered.com/api/appdetails?appids={}&filters=price_overview"
+# 每次價格請求包含的 appid 數量
+PRICE_BATCH_SIZE = 100
+# 價格批次更新的結果 (ETL_json 輸出時套用於 raw 資料的價格之上)；
+# 之後 PRICE_SOURCE_TYPES 的爬蟲重新爬取同一個 AppID 時，以較新的 raw 資料為準
+PRICE_OVERLAY_PATH = "data/raw/price_overlay.sqlite"
+PRICE_SOURCE_TYPES = ["game_info", "game_combined"]
+# 價格欄位 (價格變動只更新文件 metadata，不計入 ETL_document 的輸入雜湊)
+PRICE_COLS = ["price_initial", "price_currency", "price_overview"]
+
+# 單次爬取合併的端點 (game_combined 爬蟲會同時請求以下三個端點)
+COMBINED_URL_TYPES = {
+    "game_info": GAME_INFO_URL,
+    "game_review": GAME_REVIEW_URL,
+    "game_tag": GAME_TAG_URL,
+}
+
+# 爬蟲請求標頭 (模擬瀏覽器，降低被擋機率)
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+# 各主機的請求速率 (rate: 初始每秒請求數, capacity: 允許瞬間爆發的請求數,
+# min_rate / max_rate: AIMD 自適應調整的下限與上限)
+HOST_RATE_LIMITS = {
+    "store.steampowered.com": {"rate": 0.66, "capacity": 10, "min_rate": 0.1, "max_rate": 1.5},  # 約 200 次 / 5 分鐘
+    "steamspy.com": {"rate": 1.0, "capacity": 1, "min_rate": 0.2, "max_rate": 1.0},  # 官方限制每秒 1 次
+    "api.steampowered.com": {"rate": 1.0, "capacity": 5, "min_rate": 0.1, "max_rate": 2.0},
+}
+
+# 非同步爬蟲同時進行中的請求數上限
+SCRAPER_CONCURRENCY = 8
+
+# 硬碟回應快取 (條件式請求) 路徑與新鮮時間 (秒，0 代表每次都向伺服器重新驗證)
+HTTP_CACHE_PATH = "data/cache/http_cache.sqlite"
+HTTP_CACHE_MAX_AGE = 0
+
+# 爬取失敗 AppID 的 dead-letter queue (所有爬蟲共用)
+DEAD_LETTER_PATH = "data/raw/dead_letter.sqlite"
+# 重試工作 (SteamRetry.py) 的策略：同時請求數、單次請求重試設定、
+# 第 n 次失敗後等待 backoff_base * 2^(n-1) 秒 (上限 backoff_max) 才再次重試，失敗達 max_attempts 次即放棄
+DEAD_LETTER_RETRY = {
+    "concurrency": 2,
+    "max_retries": 8,
+    "retry_delay_base": 30,
+    "backoff_base": 3600,
+    "backoff_max": 7 * 24 * 3600,
+    "max_attempts": 6,
+}
+
+# 分散式爬取工作佇列 ("sqlite": 單機多個 worker 程序, "postgres": 多台主機共用)
+WORK_QUEUE_BACKEND = os.environ.get("WORK_QUEUE_BACKEND", "sqlite")
+WORK_QUEUE_PATH = "data/raw/work_queue.sqlite"
+# 各爬蟲類型的 worker 吞吐量設定，未列出的項目使用 default
+# (batch_size: 每次租用的 AppID 數, concurrency: 同時請求數,
+#  lease_seconds: 租約長度, heartbeat_interval: 延長租約的間隔秒數)
+WORK_QUEUE_SETTINGS = {
+    "default": {"batch_size": 50, "concurrency": 8, "lease_seconds": 600, "heartbeat_interval": 60},
+    "game_info": {"batch_size": 50, "concurrency": 8},
+    "game_review": {"batch_size": 50, "concurrency": 8},
+    "game_tag": {"batch_size": 20, "concurrency": 2},  # steamspy 限制每秒 1 次
+    "game_combined": {"batch_size": 30, "concurrency": 8, "lease_seconds": 900},
+    "game_review_text": {"batch_size": 10, "concurrency": 4, "lease_seconds": 1800},
+}
+
+# 依熱門度與新鮮度排程的爬取 (SteamSchedule.py)，未列出的項目使用 default
+# 每個 AppID 的重新爬取間隔介於 min_interval_days (最重要) 與 max_interval_days (最不重要) 之間，
+# 重要度由評論數 (log 比例，達 reference_reviews 為滿分) 與發售時間 (每 recency_half_life_days 天減半，
+# 剛發售且沒有評論的遊戲重要度為 recency_weight) 合併而成；
+# daily_request_budget 為每日請求數上限 (合併爬蟲每個 AppID 需 3 次請求)
+CRAWL_SCHEDULE = {
+    "default": {
+        "daily_request_budget": 20000,
+        "min_interval_days": 1,
+        "max_interval_days": 120,
+        "reference_reviews": 100000,
+        "recency_half_life_days": 90,
+        "recency_weight": 0.6,
+    },
+    "game_review": {"min_interval_days": 0.5, "max_interval_days": 60},  # 評論數變動較快
+    "game_tag": {"daily_request_budget": 40000},  # steamspy 限制每秒 1 次
+    "game_combined": {"daily_request_budget": 30000},
+    # 評論內文需分頁請求，以平均每個 AppID 的請求數估算預算
+    "game_review_text": {"requests_per_app": 4, "min_interval_days": 7, "max_interval_days": 180},
+}
+
+# 爬蟲即時指標 (JSON 快照與 Prometheus textfile) 輸出路徑與更新間隔 (秒)
+METRICS_PATH = "data/metrics"
+METRICS_SNAPSHOT_INTERVAL = 30
+
 # raw game id資料存放路徑
 RAW_GAME_ID_SUBFOLDER = "data/raw/game_id"
 RAW_ID_METADATA_SUBFOLDER = "data/raw/game_id/metadata"
+# 增量爬取產生的待爬 AppID 清單 (work list) 存放路徑
+RAW_WORK_LIST_SUBFOLDER = "data/raw/game_id/worklist"
+# AppID 目錄 (appid / name / last_modified)，用於比對每次爬取的新增、修改與下架 AppID
+APP_CATALOGUE_PATH = "data/raw/game_id/catalogue.sqlite"
 
 # raw資料存放路徑
 RAW_DATA_PATH = "data/raw/{}"
 RAW_METADATA_PATH = "data/raw/{}/metadata"
 
+# raw資料輸出格式 ("jsonl": 一行一筆、僅附加寫入; "json": 舊版整檔覆寫)
+RAW_OUTPUT_FORMAT = "jsonl"
+# JSONL 單檔大小上限 (bytes)，超過即切換新檔
+RAW_MAX_BYTES_PER_FILE = 256 * 1024 * 1024
+# JSONL 的 zstd 壓縮等級 (輸出為 .jsonl.zst，每批資料一個 frame)，None 代表不壓縮
+RAW_COMPRESSION_LEVEL = 10
+
+# 以 (appid, source) 為 key 的 raw 資料庫：爬蟲寫入檔案時同步寫入，ETL 依 AppID 合併各類資料
+RAW_STORE_PATH = "data/raw/raw_store.sqlite"
+RAW_STORE_ENABLED = True
+# payload 的 zstd 壓縮等級 (每批寫入都需壓縮，使用較低的等級)，None 代表不壓縮
+RAW_STORE_COMPRESSION_LEVEL = 3
+# ETL 自 raw 資料庫讀取時，每個輸出檔 (json_data_N) 的 AppID 數
+RAW_STORE_ETL_CHUNK_SIZE = 2000
+
 # processed資料存放路徑
 PROCESSED_DATA_PATH = "data/processed/{}"
+# 增量 ETL 的 manifest (各階段每個 AppID 的輸入雜湊與輸出)
+ETL_MANIFEST_PATH = "data/processed/etl_manifest.sqlite"
+# ETL_document 輸出的待向量化變動清單 (text_embedding.py 完成後刪除)
+EMBEDDING_CHANGES_PATH = "data/processed/changes/document_changes.json"
+# ETL_review 輸出的評論文件待向量化變動清單 (格式與 EMBEDDING_CHANGES_PATH 相同)
+REVIEW_EMBEDDING_CHANGES_PATH = "data/processed/changes/review_changes.json"
+# ETL_json 同時輸出欄位式的 Parquet 檔案 (data/processed/game_table，需安裝 pyarrow)，
+# 下游可只讀取需要的欄位；壓縮方式為 None 代表不壓縮
+PARQUET_OUTPUT_ENABLED = True
+PARQUET_COMPRESSION = "zstd"
+
+# 近似重複遊戲分群 (src/ETL/ETL_cluster.py)：版本、重製、試玩版與換皮遊戲常有幾乎相同的描述，
+# 以 MinHash/LSH 將 context 近似重複的遊戲分群，每群只將一份文件寫入向量資料庫，其他 AppID 記錄於其 metadata
+# (num_perm: MinHash 簽章長度；bands: LSH 分段數 (num_perm 需可被整除)；shingle_size: 每個 shingle 的詞數；
+#  threshold: 估計的 Jaccard 相似度下限；min_tokens: token 數少於此值的文件 (例如沒有描述) 不參與分群)
+DOCUMENT_CLUSTERS_PATH = "data/processed/document_clusters.json"
+DOCUMENT_CLUSTER_SETTINGS = {
+    "enabled": True,
+    "num_perm": 128,
+    "bands": 16,
+    "shingle_size": 5,
+    "threshold": 0.8,
+    "min_tokens": 50,
+}
+
+# 串流模式 (src/embedding/stream_pipeline.py)：raw 資料逐筆經清洗、文件化、切割後直接寫入向量資料庫
+# (queue_size: 各階段之間佇列的項目數上限；slice_batch_size: 每次轉換 / 切割的遊戲數；
+#  write_batch_size: 每次寫入向量資料庫的文件數 (父+子))
+STREAM_PIPELINE_SETTINGS = {
+    "queue_size": 8,
+    "slice_batch_size": 64,
+    "write_batch_size": 32,
+}
 
 # 專案根目錄路徑
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -52,6 +217,20 @@ METADATA_COLS = ['type', 'name', 'steam_appid', 'required_age', 'is_free', 'supp
 CONTEXT_COLS = ['name', 'detailed_description', 'about_the_game',
                 'short_description', 'developers', 'publishers', 'categories', 'genres', 'tags']
 
+# 組合 context 時比較是否重複的描述欄位 (Steam 的 detailed_description 與 about_the_game 常常相同)：
+# 以連續 shingle_size 個詞為一個 shingle，欄位的 shingle 有 threshold 以上出現在較長的欄位中即視為重複、不放入 context
+CONTEXT_DEDUP_COLS = ['detailed_description', 'about_the_game', 'short_description']
+CONTEXT_DEDUP_SETTINGS = {
+    "shingle_size": 5,
+    "threshold": 0.8,
+}
+
+# 評論文件 (ETL_review.py)：每個 AppID 每種語言的評論依有用程度排序後合併，每份文件的字元數上限
+REVIEW_DOCUMENT_MAX_CHARS = 4000
+# 遊戲文件與評論文件的 doc_type，用於檢索時區分文件類型 (兩者寫入同一個 collection)
+GAME_DOC_TYPE = "game"
+REVIEW_DOC_TYPE = "review"
+
 # 本地Chroma向量資料庫
 CHROMA_COLLECTION_NAME = "steam_games_DB"
 CHROMA_PERSIST_DIR = PROJECT_ROOT / "data/vector"
@@ -65,9 +244,9 @@ SYSTEM_PROMPT = """
 ### **運作規則與限制**
 
 1. **範疇限制**：你只能回答與 **Steam 平台上的遊戲** 相關的問題或內容。若使用者的問題超出此範疇，請有禮貌地告知你無法提供該領域的協助。
-2. **工具使用規範 (`few_game_rag`)**：
+2. **工具使用規範 (`few_game_rag`、`game_review_rag`)**：
 * **優先檢查上下文**：在回答之前，請先檢視過去的對話記錄。如果現有資訊已足以回答問題，**嚴禁**再次調用工具。
-* **必要時調用**：若現有資訊不足，請調用 `few_game_rag` 工具查詢資料庫。
+* **必要時調用**：若現有資訊不足，請調用 `few_game_rag` 工具查詢資料庫；若問題是關於玩家的評價、心得或抱怨，請調用 `game_review_rag` 查詢玩家評論。
 * **次數限制**：在每一輪對話中，調用工具的次數 **不得超過 3 次**。若經過 3 次查詢仍無法獲得完整資訊，請根據已知內容回答，並說明限制。
 
 
@@ -0,0 +1,53 @@
+import argparse
+import logging
+
+from src.config.constant import PROJECT_ROOT, RAW_COMPRESSION_LEVEL
+from src.utils.record_io import ZSTD_SUFFIX, compress_data_file, data_file_suffix
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 需要轉換的 raw 資料類型 (work list 與 metadata 不轉換)
+RAW_TYPES = ["game_id", "game_info", "game_review", "game_tag", "game_combined"]
+
+
+def compress_raw_folder(data_type: str, level: int, keep_original: bool = False):
+    """將 data/raw/<type>/ 下編號的 JSON / JSONL 檔轉為 .jsonl.zst，編號維持不變"""
+    folder = PROJECT_ROOT / "data/raw" / data_type
+    if not folder.exists():
+        return
+
+    before_bytes = after_bytes = 0
+    for path in sorted(folder.glob(f"{data_type}_*")):
+        if data_file_suffix(path) not in (".json", ".jsonl"):
+            continue
+        if path.with_name(path.name[: -len(data_file_suffix(path))] + ZSTD_SUFFIX).exists():
+            logger.warning(f"{path.name} 已有對應的壓縮檔，略過")
+            continue
+
+        before_bytes += path.stat().st_size
+        output_path = compress_data_file(path, level=level, keep_original=keep_original)
+        after_bytes += output_path.stat().st_size
+        logger.info(f"{path.name} -> {output_path.name}")
+
+    if before_bytes:
+        logger.info(
+            f"[{data_type}] {before_bytes / 1024 ** 2:.1f} MB -> {after_bytes / 1024 ** 2:.1f} MB "
+            f"(壓縮比 {before_bytes / max(after_bytes, 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="將既有的 raw 資料檔轉為 zstd 壓縮的 JSONL")
+    parser.add_argument("--type", dest="data_types", action="append", choices=RAW_TYPES,
+                        help="要轉換的資料類型 (可重複指定，預設為全部)")
+    parser.add_argument("--level", type=int, default=RAW_COMPRESSION_LEVEL or 10,
+                        help="zstd 壓縮等級 (一次性轉換可使用較高等級，如 19)")
+    parser.add_argument("--keep", action="store_true", help="保留原始檔案")
+    args = parser.parse_args()
+
+    for raw_type in args.data_types or RAW_TYPES:
+        compress_raw_folder(raw_type, level=args.level, keep_original=args.keep)
@@ -0,0 +1,60 @@
+import argparse
+import logging
+
+from src.config.constant import APP_CATALOGUE_PATH, PG_COLLECTION, PROJECT_ROOT
+from src.utils.app_catalogue import AppCatalogue
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def prune_removed_apps(dry_run: bool = False) -> int:
+    """
+    將 AppID 目錄中已下架、但尚未處理的遊戲自向量資料庫刪除
+    刪除成功後才記錄 pruned_at，失敗時下次執行會再次嘗試
+    :param dry_run: 只列出數量，不實際刪除
+    :return: 刪除的 AppID 數量
+    """
+    catalogue = AppCatalogue(PROJECT_ROOT / APP_CATALOGUE_PATH)
+    try:
+        pending_appids = sorted(catalogue.removed_appids(pruned=False))
+        if not pending_appids:
+            logger.info("沒有需要自向量資料庫移除的 AppID")
+            return 0
+        if dry_run:
+            logger.info(f"有 {len(pending_appids)} 筆已下架的 AppID 待移除: {pending_appids[:20]}")
+            return 0
+
+        # 延遲載入，只查看狀態時不需要資料庫套件
+        from src.database import postgreSQL_conn as pgc
+
+        deleted_count = pgc.delete_vector_documents(pending_appids, collection_name=PG_COLLECTION)
+        catalogue.mark_pruned(pending_appids)
+        logger.info(f"已移除 {len(pending_appids)} 筆下架遊戲 (共 {deleted_count} 份向量文件)")
+        return len(pending_appids)
+    finally:
+        catalogue.close()
+
+
+def show_status():
+    catalogue = AppCatalogue(PROJECT_ROOT / APP_CATALOGUE_PATH)
+    try:
+        logger.info(f"AppID 目錄狀態: {catalogue.stats()}")
+    finally:
+        catalogue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steam AppID 目錄管理")
+    parser.add_argument("command", choices=["status", "prune"],
+                        help="status: 顯示目錄統計 / prune: 自向量資料庫刪除已下架的遊戲")
+    parser.add_argument("--dry-run", action="store_true", help="prune 時只列出待刪除的 AppID")
+    args = parser.parse_args()
+
+    if args.command == "prune":
+        prune_removed_apps(dry_run=args.dry_run)
+    show_status()
@@ -0,0 +1,18 @@
+import logging
+
+from src.utils.combined_scraper import SteamCombinedScraper
+from src.utils.scraper_base import parse_scraper_args
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+if __name__ == "__main__":
+    logging.info("收到指令，開始執行 Steam 合併 (info + review + tag) 爬蟲...")
+    combined_scraper = SteamCombinedScraper(
+        **parse_scraper_args("Steam 合併 (info + review + tag) 爬蟲"))
+    combined_scraper.run()
+    logging.info("Steam 合併爬蟲執行完畢！")
@@ -1,15 +1,24 @@
-import json
+import argparse
 import logging
 import os
+import shutil
 import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-from src.config.constant import GAME_ID_URL, RAW_GAME_ID_SUBFOLDER
+from src.config.constant import (APP_CATALOGUE_PATH, GAME_ID_URL, HOST_RATE_LIMITS, METRICS_PATH,
+                                 METRICS_SNAPSHOT_INTERVAL, RAW_GAME_ID_SUBFOLDER,
+                                 RAW_COMPRESSION_LEVEL, RAW_MAX_BYTES_PER_FILE, RAW_OUTPUT_FORMAT,
+                                 RAW_WORK_LIST_SUBFOLDER)
+from src.utils.app_catalogue import ADDED, MODIFIED, REMOVED, AppCatalogue
+from src.utils.crawl_metrics import CrawlMetrics
+from src.utils.fast_json import read_json, write_json
+from src.utils.http_client import get_session
+from src.utils.rate_limiter import HostRateLimiter, is_throttle_status, parse_retry_after
+from src.utils.record_io import JsonlWriter, append_jsonl, data_file_pattern
 
 
-import requests
 from dotenv import load_dotenv
 
 # 設定日誌格式
@@ -33,13 +42,28 @@ class CrawlerConfig:
 
     # 資料存儲路徑 (相對於 project_root)
     raw_data_sub_folder: str = RAW_GAME_ID_SUBFOLDER
+    work_list_sub_folder: str = RAW_WORK_LIST_SUBFOLDER
+    catalogue_path: str = APP_CATALOGUE_PATH
     max_result_per_request: int = 4000  # 每次 API 請求的筆數
     max_items_per_file: int = 4000     # 每個檔案最大儲存筆數
     max_retries: int = 5               # 最大重試次數
     retry_delay_multiplier: int = 10   # 重試等待時間倍數
+    output_format: str = RAW_OUTPUT_FORMAT           # 輸出格式 ('jsonl' 或 'json')
+    max_bytes_per_file: int = RAW_MAX_BYTES_PER_FILE  # JSONL 單檔大小上限
+    compression_level: Optional[int] = RAW_COMPRESSION_LEVEL  # zstd 壓縮等級 (None 代表不壓縮)
+    # 增量模式：只抓取上次成功爬取後有變動的 AppID，輸出為 work list
+    incremental: bool = False
 
 
 class SteamAppIDCrawler:
+    """
+    Steam AppID 清單爬蟲
+    完整模式會重新抓取所有 AppID，先寫入暫存資料夾，全部成功後才取代 game_id 檔案 (失敗時保留上次的清單)；
+    增量模式則以 if_modified_since 只抓取上次成功爬取後新增或修改的 AppID。
+    兩種模式皆會將結果合併至 AppID 目錄，新增或修改的 AppID 寫入 work list 供 info / review / tag 爬蟲使用，
+    完整模式另會將目錄中不再出現的 AppID 記錄為下架 (removed list)。
+    """
+
     def __init__(self, config: CrawlerConfig):
         self.config = config
         self.current_game_list: List[Dict] = []
@@ -49,20 +73,78 @@ class SteamAppIDCrawler:
         self.file_num: int = 1
         self.start_time: str = datetime.now().strftime("%H:%M:%S")
         self.search_result_status: bool = False
+        # 共用連線池，避免每次請求重新建立連線
+        self.session = get_session()
+        # AIMD 自適應速率控制 (取代固定的 time.sleep)
+        self.rate_limiter = HostRateLimiter(HOST_RATE_LIMITS)
+        self.throttled_count: int = 0
+        # 即時指標 (每頁筆數不固定，總數未知，因此不計算 ETA)
+        self.metrics = CrawlMetrics(
+            "game_id", self.config.project_root / METRICS_PATH,
+            snapshot_interval=METRICS_SNAPSHOT_INTERVAL)
 
         # 初始化路徑
         self.data_folder = self.config.project_root / self.config.raw_data_sub_folder
         self.metadata_folder = self.data_folder / "metadata"
+        self.state_path = self.metadata_folder / "crawl_state.json"
+        # 完整模式的 game_id 檔案先寫入暫存資料夾，成功後才取代正式檔案
+        self.part_folder = self.data_folder / "game_id.part"
         self._ensure_directories()
 
+        # 增量模式狀態：本次執行開始時間與上次成功爬取時間
+        self.crawl_started_at: int = int(time.time())
+        self.if_modified_since: Optional[int] = None
+        if self.config.incremental:
+            self.if_modified_since = self._load_state().get("last_crawl_time")
+
+        # AppID 目錄：與上次結果比對出的新增 / 修改 AppID 寫入 work list，下架的 AppID 寫入 removed list
+        self.catalogue = AppCatalogue(self.config.project_root / self.config.catalogue_path)
+        self.change_counts: Dict[str, int] = {ADDED: 0, MODIFIED: 0, REMOVED: 0}
+        work_list_folder = self.config.project_root / self.config.work_list_sub_folder
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.work_list_path: Path = work_list_folder / f"worklist_{stamp}.jsonl"
+        self.removed_list_path: Path = work_list_folder / f"removed_{stamp}.jsonl"
+
+        # JSONL 模式：每次搜尋結果直接附加到暫存檔案 (每次執行皆為完整清單，成功後取代舊檔)
+        self.jsonl_writer: Optional[JsonlWriter] = None
+        if not self.config.incremental:
+            # 清除上次中斷時留下的暫存檔案
+            shutil.rmtree(self.part_folder, ignore_errors=True)
+            self.part_folder.mkdir(parents=True)
+        if self.config.output_format == "jsonl" and not self.config.incremental:
+            self.jsonl_writer = JsonlWriter(
+                folder=self.part_folder,
+                prefix="game_id",
+                max_records_per_file=self.config.max_items_per_file,
+                max_bytes_per_file=self.config.max_bytes_per_file,
+                overwrite=True,
+                compression_level=self.config.compression_level)
+
     def _ensure_directories(self):
         """確保輸出目錄存在"""
         self.data_folder.mkdir(parents=True, exist_ok=True)
         self.metadata_folder.mkdir(parents=True, exist_ok=True)
 
+    def _load_state(self) -> Dict[str, Any]:
+        """讀取上次成功爬取的狀態 (last_crawl_time 等)"""
+        if not self.state_path.exists():
+            return {}
+        return read_json(self.state_path)
+
+    def _save_state(self):
+        """爬取成功後記錄本次開始時間，作為下次增量爬取的 if_modified_since"""
+        state = self._load_state()
+        state["last_crawl_time"] = self.crawl_started_at
+        state["last_crawl_date"] = datetime.fromtimestamp(
+            self.crawl_started_at).strftime("%Y-%m-%d %H:%M:%S")
+
+        write_json(self.state_path, state)
+
+        logger.info(f"爬取狀態已更新至: {self.state_path}")
+
     def _get_request_params(self) -> Dict[str, Any]:
         """產生 API 請求參數"""
-        return {
+        params = {
             'key': self.config.api_key,
             'include_games': 'true',
             'include_dlc': 'false',
@@ -71,16 +153,51 @@ class SteamAppIDCrawler:
             'max_results': self.config.max_result_per_request,
             'last_appid': self.last_appid
         }
+        if self.if_modified_since:
+            params['if_modified_since'] = self.if_modified_since
+        return params
 
     def _fetch_page(self) -> Optional[Dict]:
-        """執行單次 API 請求，包含重試機制"""
+        """執行單次 API 請求，包含重試機制 (限流時依 Retry-After 暫停並降低速率)"""
+        bucket = self.rate_limiter.bucket_for(self.config.base_url)
         tries = 1
         while tries <= self.config.max_retries:
+            if tries > 1:
+                self.metrics.record_retry(self.config.base_url)
             try:
+                bucket.acquire()
                 logger.info(f"開始第 {self.search_times + 1} 次資料搜尋...")
-                response = requests.get(
-                    self.config.base_url, params=self._get_request_params())
-                response.raise_for_status()  # 檢查 HTTP 錯誤
+                request_start = time.perf_counter()
+                try:
+                    response = self.session.get(
+                        self.config.base_url, params=self._get_request_params(), timeout=30)
+                except Exception:
+                    self.metrics.record_request(
+                        self.config.base_url, "error", time.perf_counter() - request_start)
+                    raise
+                self.metrics.record_request(
+                    self.config.base_url, response.status_code,
+                    time.perf_counter() - request_start, len(response.content))
+
+                if is_throttle_status(response.status_code):
+                    retry_after = parse_retry_after(
+                        response.headers.get("Retry-After"))
+                    # 降低速率並暫停 bucket，下一次 acquire 會等待
+                    bucket.on_throttle(
+                        retry_after, fallback_pause=tries * self.config.retry_delay_multiplier)
+                    self.throttled_count += 1
+                    self.metrics.record_event("throttled")
+                    logger.warning(
+                        f"遭到限流 (狀態碼: {response.status_code}, Retry-After: {retry_after})，"
+                        f"速率降為 {bucket.rate:.2f} 次/秒")
+                    if tries >= self.config.max_retries:
+                        logger.error("已達重試次數上限，終止當前請求")
+                        return None
+                    tries += 1
+                    continue
+
+                response.raise_for_status()  # 檢查其他 HTTP 錯誤
+                bucket.on_success()
                 return response.json()
 
             except Exception as e:
@@ -97,6 +214,16 @@ class SteamAppIDCrawler:
 
     def _save_current_chunk(self):
         """將目前累積的資料寫入 JSON 檔案"""
+        if self.config.incremental:
+            # 增量模式只有變動的 AppID，不覆寫完整的 game_id 檔案
+            self.data_count += len(self.current_game_list)
+            self.current_game_list.clear()
+            return
+
+        if self.jsonl_writer is not None:
+            self._append_current_chunk()
+            return
+
         now_date = datetime.now().strftime("%Y-%m-%d")
         now_time = datetime.now().strftime("%H:%M:%S")
 
@@ -107,16 +234,73 @@ class SteamAppIDCrawler:
         }
 
         file_name = f"game_id_{self.file_num}.json"
-        save_path = self.data_folder / file_name
+        save_path = self.part_folder / file_name
 
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(save_path, data)
 
         self.data_count += len(self.current_game_list)
 
         logger.info(
             f"第 {self.search_times} 次搜尋資料儲存完畢！(File: {file_name}, Count: {len(self.current_game_list)})")
 
+    def _append_current_chunk(self):
+        """JSONL 模式：只附加本次搜尋取得的資料，換檔由 writer 負責"""
+        chunk_size = len(self.current_game_list)
+        self.jsonl_writer.write_batch(self.current_game_list)
+        self.current_game_list.clear()
+        self.file_num = self.jsonl_writer.file_num
+        self.data_count += chunk_size
+
+        logger.info(
+            f"第 {self.search_times} 次搜尋資料儲存完畢！(File: {self.jsonl_writer.current_path.name}, Count: {chunk_size})")
+
+    def _append_work_list(self, changed_apps: List[Dict]):
+        """將與目錄比對後新增或修改的 AppID 附加至暫存 work list (成功結束後才改為正式檔名)"""
+        if changed_apps:
+            append_jsonl(self._work_list_part_path(), changed_apps)
+        for app in changed_apps:
+            self.change_counts[app["change"]] += 1
+
+        logger.info(
+            f"第 {self.search_times} 次搜尋取得 {len(changed_apps)} 筆變動資料 (Work list: {self.work_list_path.name})")
+
+    def _work_list_part_path(self) -> Path:
+        return self.work_list_path.with_name(self.work_list_path.name + ".part")
+
+    def _finalize_work_list(self):
+        """將暫存 work list 改為正式檔名，讓下游爬蟲可以讀取"""
+        part_path = self._work_list_part_path()
+        if not part_path.exists():
+            # 沒有任何變動時仍建立空檔，代表本次增量爬取已完成
+            part_path.parent.mkdir(parents=True, exist_ok=True)
+            part_path.touch()
+        part_path.replace(self.work_list_path)
+        logger.info(
+            f"Work list 已儲存至: {self.work_list_path} "
+            f"(新增 {self.change_counts[ADDED]} 筆，修改 {self.change_counts[MODIFIED]} 筆)")
+
+    def _save_removed_list(self):
+        """完整模式：目錄中本次未出現的 AppID 記錄為下架，寫入 removed list"""
+        removed_apps = self.catalogue.mark_removed()
+        self.change_counts[REMOVED] = len(removed_apps)
+        if removed_apps:
+            append_jsonl(self.removed_list_path, removed_apps)
+            logger.info(f"{len(removed_apps)} 筆 AppID 已自 Steam 下架 (Removed list: {self.removed_list_path})")
+
+    def _publish_game_id_files(self):
+        """完整模式成功後：以暫存檔案取代 game_id 檔案，並刪除本次未產生的舊檔案 (例如上次清單較長時編號更大的檔案)"""
+        published = set()
+        for part_path in sorted(self.part_folder.iterdir()):
+            part_path.replace(self.data_folder / part_path.name)
+            published.add(part_path.name)
+        pattern = data_file_pattern("game_id")
+        stale_paths = [path for path in self.data_folder.iterdir()
+                       if pattern.match(path.name) and path.name not in published]
+        for path in stale_paths:
+            path.unlink()
+        self.part_folder.rmdir()
+        logger.info(f"game_id 檔案已更新 ({len(published)} 個檔案，刪除 {len(stale_paths)} 個舊檔案)")
+
     def _check_and_rotate_file(self):
         """檢查是否達到單檔上限，若是則重置清單並增加檔案編號"""
         if len(self.current_game_list) >= self.config.max_items_per_file:
@@ -136,15 +320,21 @@ class SteamAppIDCrawler:
             "search_result": self.search_result_status,
             "max_result": self.config.max_result_per_request,
             "search_times": self.search_times,
+            "throttled_count": self.throttled_count,
             "data_count": self.data_count,
-            "last_appid": self.last_appid
+            "last_appid": self.last_appid,
+            "incremental": self.config.incremental,
+            "if_modified_since": self.if_modified_since,
+            "work_list": self.work_list_path.name if self.search_result_status else None,
+            "changes": self.change_counts,
+            "catalogue": self.catalogue.stats(),
+            "metrics": self.metrics.write()
         }
 
         metadata_file = f"{now_date_filename}_metadata_game_id.json"
         metadata_path = self.metadata_folder / metadata_file
 
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        write_json(metadata_path, metadata)
 
         logger.info(f"Metadata 已儲存至: {metadata_path}")
 
@@ -152,8 +342,11 @@ class SteamAppIDCrawler:
         """執行爬蟲主程序"""
         if not self.config.api_key:
             logger.error("未設定 STEAM_API_KEY，請檢查 .env 檔案。")
+            self.catalogue.close()
             return
 
+        # 整次爬取的目錄變動在同一個交易中，失敗時整批回復
+        self.catalogue.begin_run(time.time())
         while True:
             result = self._fetch_page()
 
@@ -173,16 +366,20 @@ class SteamAppIDCrawler:
 
             more_results = response_data.get("have_more_results")
 
+            # 合併至目錄 (同時去除分頁間重複的 AppID)，變動的 AppID 寫入 work list
+            fresh_apps, changed_apps = self.catalogue.merge(apps)
+            self._append_work_list(changed_apps)
+
             # 更新狀態
-            self.current_game_list.extend(apps)
+            self.current_game_list.extend(fresh_apps)
             self.search_times += 1
+            self.metrics.record_items(ok=len(apps))
+            self.metrics.set_gauge("rate_limit", self.rate_limiter.current_rates(), label="host")
+            self.metrics.maybe_write()
 
             # 存檔與輪替檢查
             self._save_current_chunk()
 
-            # 模擬人類行為稍微暫停
-            time.sleep(3)
-
             self._check_and_rotate_file()
 
             if not more_results:
@@ -190,13 +387,38 @@ class SteamAppIDCrawler:
                 self.search_result_status = True
                 break
 
+        if self.jsonl_writer is not None:
+            self.jsonl_writer.close()
+
+        # 只有完整抓取成功時才更新狀態與目錄，失敗時下次仍從上次成功的時間點開始重新比對
+        # (先輸出清單再提交目錄：兩者之間中斷時，下次只會重複輸出相同的變動)
+        if self.search_result_status:
+            if not self.config.incremental:
+                self._save_removed_list()
+                self._publish_game_id_files()
+            self._finalize_work_list()
+            self.catalogue.commit_run()
+            self._save_state()
+        else:
+            self.catalogue.rollback_run()
+            self._work_list_part_path().unlink(missing_ok=True)
+            if not self.config.incremental:
+                shutil.rmtree(self.part_folder, ignore_errors=True)
+                logger.warning("爬取未完成，保留上次的 game_id 檔案")
+
         # 最終儲存 Metadata
         self._save_metadata()
+        self.catalogue.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steam AppID 清單爬蟲")
+    parser.add_argument("--incremental", action="store_true",
+                        help="只抓取上次成功爬取後新增或修改的 AppID (不覆寫 game_id 檔案)")
+    args = parser.parse_args()
+
     # 初始化設定與爬蟲
-    config = CrawlerConfig()
+    config = CrawlerConfig(incremental=args.incremental)
     crawler = SteamAppIDCrawler(config)
 
     # 開始執行
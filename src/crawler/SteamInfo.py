@@ -1,7 +1,7 @@
 import logging
 
 from src.config.constant import GAME_INFO_URL
-from src.utils.scraper_base import SteamScraperBase
+from src.utils.scraper_base import SteamScraperBase, parse_scraper_args
 
 logging.basicConfig(
     level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
@@ -12,9 +12,10 @@ logging.basicConfig(
 
 logging.info("收到指令，開始執行 Steam info 爬蟲...")
 if __name__ == "__main__":
+    # 已完成的 AppID 由檢查點自動略過，中斷後直接重新執行即可續爬
+    # 加上 --incremental 則爬取所有尚未處理的 work list (worklist_*.jsonl) 中有變動的 AppID
     info_scraper = SteamScraperBase(
-        scraper_type="game_info", url_type=GAME_INFO_URL, max_input_files=11)
-    info_scraper.id_file_num = 24
-    info_scraper.output_file_num = 47
+        scraper_type="game_info", url_type=GAME_INFO_URL,
+        **parse_scraper_args("Steam info 爬蟲"))
     info_scraper.run()
     logging.info("Steam Info 爬蟲執行完畢！")
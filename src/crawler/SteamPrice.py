@@ -0,0 +1,23 @@
+import argparse
+import logging
+
+from src.utils.price_refresher import SteamPriceRefresher
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steam 價格批次更新")
+    parser.add_argument("--skip-vector", action="store_true",
+                        help="只更新 processed 檔案，不更新向量資料庫 metadata")
+    args = parser.parse_args()
+
+    logging.info("收到指令，開始執行 Steam 價格批次更新...")
+    price_refresher = SteamPriceRefresher(
+        update_vector_store=not args.skip_vector)
+    price_refresher.run()
+    logging.info("Steam 價格批次更新執行完畢！")
@@ -0,0 +1,103 @@
+import argparse
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Optional
+
+from src.config.constant import (GAME_INFO_URL, GAME_REVIEW_URL, GAME_TAG_URL, PROJECT_ROOT,
+                                 WORK_QUEUE_BACKEND, WORK_QUEUE_PATH, WORK_QUEUE_SETTINGS)
+from src.utils.combined_scraper import SteamCombinedScraper
+from src.utils.review_text_scraper import SteamReviewTextScraper
+from src.utils.scraper_base import SteamScraperBase, list_work_lists
+from src.utils.work_queue import create_work_queue
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 支援工作佇列的爬蟲類型
+SCRAPER_FACTORIES = {
+    "game_info": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_info", url_type=GAME_INFO_URL, **kwargs),
+    "game_review": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_review", url_type=GAME_REVIEW_URL, **kwargs),
+    "game_tag": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_tag", url_type=GAME_TAG_URL, **kwargs),
+    "game_combined": lambda **kwargs: SteamCombinedScraper(**kwargs),
+    "game_review_text": lambda **kwargs: SteamReviewTextScraper(**kwargs),
+}
+
+
+def enqueue(scraper_type: str, backend: str, work_list: Optional[Path] = None, incremental: bool = False) -> int:
+    """
+    將需要爬取的 AppID (已略過檢查點中已是最新者) 加入工作佇列
+    :param incremental: 加入所有尚未處理的增量 work list 中的 AppID
+    """
+    work_queue = create_work_queue(backend, PROJECT_ROOT / WORK_QUEUE_PATH)
+    try:
+        scraper = SCRAPER_FACTORIES[scraper_type](
+            work_list=work_list, work_queue=work_queue, use_raw_store=False, incremental=incremental)
+        try:
+            return scraper.enqueue_pending()
+        finally:
+            scraper.checkpoint.close()
+            scraper.dead_letters.close()
+    finally:
+        work_queue.close()
+
+
+def run_worker(scraper_type: str, backend: str):
+    """啟動一個 worker，持續租用 AppID 直到佇列清空"""
+    settings = {**WORK_QUEUE_SETTINGS["default"], **WORK_QUEUE_SETTINGS.get(scraper_type, {})}
+    work_queue = create_work_queue(backend, PROJECT_ROOT / WORK_QUEUE_PATH)
+    try:
+        scraper = SCRAPER_FACTORIES[scraper_type](
+            work_queue=work_queue, concurrency=settings["concurrency"])
+        scraper.run()
+    finally:
+        work_queue.close()
+
+
+def show_status(scraper_type: str, backend: str):
+    work_queue = create_work_queue(backend, PROJECT_ROOT / WORK_QUEUE_PATH)
+    try:
+        logger.info(f"[{scraper_type}] 工作佇列狀態: {work_queue.counts(scraper_type)}")
+    finally:
+        work_queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Steam 分散式爬取工作佇列")
+    parser.add_argument("command", choices=["enqueue", "work", "status"],
+                        help="enqueue: 加入待爬取的 AppID / work: 啟動 worker / status: 顯示佇列狀態")
+    parser.add_argument("--type", dest="scraper_type", required=True,
+                        choices=list(SCRAPER_FACTORIES), help="爬蟲類型")
+    parser.add_argument("--backend", default=WORK_QUEUE_BACKEND, choices=["sqlite", "postgres"],
+                        help=f"工作佇列類型 (預設 {WORK_QUEUE_BACKEND})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="enqueue 時只加入尚未處理的 work list 中的 AppID")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="work 時於本機啟動的 worker 程序數")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        if args.incremental and not list_work_lists():
+            raise SystemExit(
+                "找不到 work list，請先執行 python -m src.crawler.SteamGameID --incremental")
+        enqueue(args.scraper_type, args.backend, incremental=args.incremental)
+
+    elif args.command == "work":
+        if args.processes <= 1:
+            run_worker(args.scraper_type, args.backend)
+        else:
+            workers = [multiprocessing.Process(target=run_worker, args=(args.scraper_type, args.backend))
+                       for _ in range(args.processes)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+    show_status(args.scraper_type, args.backend)
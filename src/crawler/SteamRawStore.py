@@ -0,0 +1,82 @@
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, Iterable
+
+from src.config.constant import (PROJECT_ROOT, RAW_DATA_PATH, RAW_STORE_COMPRESSION_LEVEL,
+                                 RAW_STORE_PATH)
+from src.utils.raw_store import QUERY_BATCH_SIZE, RawStore, raw_store_entries, record_appid
+from src.utils.record_io import find_data_file, iter_data_file
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 可匯入 raw 資料庫的爬蟲輸出類型
+IMPORT_TYPES = ["game_info", "game_review", "game_tag", "game_combined", "game_review_text"]
+
+
+def import_type(store: RawStore, scraper_type: str) -> int:
+    """
+    依檔案編號順序匯入單一爬蟲類型的所有 raw 檔案，以檔案修改時間作為資料的取得時間，
+    同一 AppID 以較晚的檔案 / 較後面的資料為準，且不會覆蓋爬蟲之後寫入的資料
+    :return: 匯入的筆數
+    """
+    input_folder = PROJECT_ROOT / RAW_DATA_PATH.format(scraper_type)
+    imported_count = skipped_count = 0
+    file_num = 1
+    while (input_path := find_data_file(input_folder, scraper_type, file_num)) is not None:
+        fetched_at = input_path.stat().st_mtime
+        batch = []
+        for record in iter_data_file(input_path):
+            app_id = record_appid(record)
+            if app_id is None:
+                skipped_count += 1
+                continue
+            batch.extend(raw_store_entries(scraper_type, {**record, "appid": app_id}))
+            if len(batch) >= QUERY_BATCH_SIZE:
+                imported_count += store.put_many(batch, fetched_at=fetched_at)
+                batch = []
+        imported_count += store.put_many(batch, fetched_at=fetched_at)
+        logger.info(f"[{scraper_type}] 已匯入 {input_path.name} (累積 {imported_count} 筆)")
+        file_num += 1
+
+    if skipped_count:
+        logger.warning(f"[{scraper_type}] 略過 {skipped_count} 筆沒有 AppID 的資料")
+    return imported_count
+
+
+def import_raw_files(scraper_types: Iterable[str] = IMPORT_TYPES) -> Dict[str, int]:
+    """將既有的 raw 檔案匯入 raw 資料庫，完成後 ETL 才會以資料庫作為來源"""
+    store = RawStore(PROJECT_ROOT / RAW_STORE_PATH, compression_level=RAW_STORE_COMPRESSION_LEVEL)
+    try:
+        imported_counts = {scraper_type: import_type(store, scraper_type) for scraper_type in scraper_types}
+        store.set_meta("backfilled_at", datetime.now().isoformat(timespec="seconds"))
+        logger.info(f"匯入完成: {imported_counts}")
+        return imported_counts
+    finally:
+        store.close()
+
+
+def show_status():
+    store = RawStore(PROJECT_ROOT / RAW_STORE_PATH)
+    try:
+        logger.info(f"raw 資料庫狀態: {store.stats()}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="以 (appid, source) 為 key 的 raw 資料庫管理")
+    parser.add_argument("command", choices=["status", "import"],
+                        help="status: 顯示各資料類型筆數 / import: 匯入既有的 raw 檔案")
+    parser.add_argument("--type", dest="scraper_types", nargs="+", choices=IMPORT_TYPES, default=IMPORT_TYPES,
+                        help="要匯入的爬蟲類型 (預設為全部)")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_raw_files(args.scraper_types)
+    show_status()
@@ -0,0 +1,101 @@
+import argparse
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from src.config.constant import (DEAD_LETTER_PATH, DEAD_LETTER_RETRY, GAME_INFO_URL,
+                                 GAME_REVIEW_URL, GAME_TAG_URL, PROJECT_ROOT,
+                                 RAW_WORK_LIST_SUBFOLDER)
+from src.utils.combined_scraper import SteamCombinedScraper
+from src.utils.dead_letter import DeadLetterQueue, write_retry_work_list
+from src.utils.price_refresher import SteamPriceRefresher
+from src.utils.review_text_scraper import SteamReviewTextScraper
+from src.utils.scraper_base import SteamScraperBase
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 各爬蟲類型的建立方式 (重試時沿用一般爬蟲，成功的資料直接寫入正常輸出與檢查點)
+SCRAPER_FACTORIES: Dict[str, Callable[..., SteamScraperBase]] = {
+    "game_info": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_info", url_type=GAME_INFO_URL, **kwargs),
+    "game_review": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_review", url_type=GAME_REVIEW_URL, **kwargs),
+    "game_tag": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_tag", url_type=GAME_TAG_URL, **kwargs),
+    "game_combined": lambda **kwargs: SteamCombinedScraper(**kwargs),
+    "game_review_text": lambda **kwargs: SteamReviewTextScraper(**kwargs),
+    "game_price": lambda **kwargs: SteamPriceRefresher(**kwargs),
+}
+
+
+def retry_dead_letters(scraper_type: str, policy: Optional[Dict] = None,
+                       limit: Optional[int] = None) -> int:
+    """
+    重新爬取 dead-letter queue 中已到重試時間的 AppID
+    成功者由爬蟲寫入正常輸出並自 queue 移除；再次失敗者累加失敗次數，等待下一次退避時間
+    :param scraper_type: 爬蟲類型 (SCRAPER_FACTORIES 的 key)
+    :param policy: 重試策略，預設為 DEAD_LETTER_RETRY
+    :param limit: 本次最多重試的數量
+    :return: 本次重試的 AppID 數量
+    """
+    policy = {**DEAD_LETTER_RETRY, **(policy or {})}
+
+    dead_letters = DeadLetterQueue(PROJECT_ROOT / DEAD_LETTER_PATH)
+    try:
+        due_items = dead_letters.due(
+            scraper_type, max_attempts=policy["max_attempts"],
+            backoff_base=policy["backoff_base"], backoff_max=policy["backoff_max"], limit=limit)
+        given_up_count = dead_letters.count(
+            scraper_type, min_attempts=policy["max_attempts"])
+    finally:
+        dead_letters.close()
+
+    if given_up_count:
+        logger.warning(
+            f"[{scraper_type}] 有 {given_up_count} 筆 AppID 已失敗 {policy['max_attempts']} 次，不再自動重試")
+    if not due_items:
+        logger.info(f"[{scraper_type}] 沒有已到重試時間的 AppID")
+        return 0
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    work_list = PROJECT_ROOT / RAW_WORK_LIST_SUBFOLDER / f"retry_{scraper_type}_{stamp}.jsonl"
+    retry_count = write_retry_work_list(work_list, due_items)
+    logger.info(f"[{scraper_type}] 重試 {retry_count} 筆 AppID (清單: {work_list.name})")
+
+    try:
+        scraper = SCRAPER_FACTORIES[scraper_type](
+            work_list=work_list, concurrency=policy["concurrency"])
+        scraper.max_retries = policy["max_retries"]
+        scraper.retry_delay_base = policy["retry_delay_base"]
+        scraper.run()
+    finally:
+        # 結果已記錄於輸出檔案、檢查點與 dead-letter queue，暫存清單不需保留
+        work_list.unlink(missing_ok=True)
+
+    logger.info(
+        f"[{scraper_type}] 重試完成：成功 {scraper.data_count} 筆，失敗 {scraper.failed_count} 筆")
+    return retry_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重新爬取 dead-letter queue 中失敗的 AppID")
+    parser.add_argument("--type", dest="scraper_types", action="append",
+                        choices=list(SCRAPER_FACTORIES),
+                        help="要重試的爬蟲類型 (可重複指定，預設為全部)")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="每個爬蟲類型本次最多重試的數量")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help=f"同時請求數 (預設 {DEAD_LETTER_RETRY['concurrency']})")
+    args = parser.parse_args()
+
+    retry_policy = {}
+    if args.concurrency:
+        retry_policy["concurrency"] = args.concurrency
+
+    for retry_type in args.scraper_types or list(SCRAPER_FACTORIES):
+        retry_dead_letters(retry_type, policy=retry_policy, limit=args.limit)
@@ -1,7 +1,9 @@
 import logging
+from pathlib import Path
+from typing import Optional
 
 from src.config.constant import GAME_REVIEW_URL
-from src.utils.scraper_base import SteamScraperBase
+from src.utils.scraper_base import SteamScraperBase, parse_scraper_args
 
 logging.basicConfig(
     level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
@@ -10,10 +12,14 @@ logging.basicConfig(
 )
 
 
-def run_steam_review():
+def run_steam_review(work_list: Optional[Path] = None, use_cache: bool = False, incremental: bool = False):
     logging.info("收到指令，開始執行 Steam review 爬蟲...")
-    if __name__ == "__main__":
-        review_scraper = SteamScraperBase(
-            scraper_type="game_review", url_type=GAME_REVIEW_URL)
-        review_scraper.run()
-        logging.info("Steam review 爬蟲執行完畢！")
+    review_scraper = SteamScraperBase(
+        scraper_type="game_review", url_type=GAME_REVIEW_URL, work_list=work_list,
+        use_cache=use_cache, incremental=incremental)
+    review_scraper.run()
+    logging.info("Steam review 爬蟲執行完畢！")
+
+
+if __name__ == "__main__":
+    run_steam_review(**parse_scraper_args("Steam review 爬蟲"))
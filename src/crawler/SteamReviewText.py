@@ -0,0 +1,18 @@
+import logging
+
+from src.utils.review_text_scraper import SteamReviewTextScraper
+from src.utils.scraper_base import parse_scraper_args
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+
+if __name__ == "__main__":
+    logging.info("收到指令，開始執行 Steam 評論內文爬蟲...")
+    review_text_scraper = SteamReviewTextScraper(
+        **parse_scraper_args("Steam 評論內文爬蟲 (語言、數量上限等設定見 REVIEW_TEXT_SETTINGS)"))
+    review_text_scraper.run()
+    logging.info("Steam 評論內文爬蟲執行完畢！")
@@ -0,0 +1,79 @@
+import argparse
+import logging
+from datetime import datetime
+from typing import Optional
+
+from src.config.constant import (GAME_INFO_URL, GAME_REVIEW_URL, GAME_TAG_URL, PROJECT_ROOT,
+                                 RAW_WORK_LIST_SUBFOLDER)
+from src.utils.combined_scraper import SteamCombinedScraper
+from src.utils.crawl_scheduler import CrawlScheduler
+from src.utils.record_io import append_jsonl
+from src.utils.review_text_scraper import SteamReviewTextScraper
+from src.utils.scraper_base import SteamScraperBase
+
+logging.basicConfig(
+    level=logging.INFO,  # 設定為 INFO，這樣 Base Class 裡的 logger.info 才會顯示
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 支援排程爬取的爬蟲類型
+SCRAPER_FACTORIES = {
+    "game_info": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_info", url_type=GAME_INFO_URL, **kwargs),
+    "game_review": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_review", url_type=GAME_REVIEW_URL, **kwargs),
+    "game_tag": lambda **kwargs: SteamScraperBase(
+        scraper_type="game_tag", url_type=GAME_TAG_URL, **kwargs),
+    "game_combined": lambda **kwargs: SteamCombinedScraper(**kwargs),
+    "game_review_text": lambda **kwargs: SteamReviewTextScraper(**kwargs),
+}
+
+
+def run_schedule(scraper_type: str, budget: Optional[int] = None, plan_only: bool = False) -> int:
+    """
+    依熱門度與新鮮度排出本次要爬取的 AppID，並在請求數預算內依優先度爬取
+    :param scraper_type: 爬蟲類型 (SCRAPER_FACTORIES 的 key)
+    :param budget: 本次可用的請求數，預設為今日剩餘預算
+    :param plan_only: 只輸出排程清單，不執行爬蟲
+    :return: 排入清單的 AppID 數量
+    """
+    scheduler = CrawlScheduler(scraper_type)
+    scheduled_apps = scheduler.plan(budget=budget)
+    if not scheduled_apps:
+        logger.info(f"[{scraper_type}] 沒有需要重新爬取的 AppID")
+        return 0
+
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    work_list = PROJECT_ROOT / RAW_WORK_LIST_SUBFOLDER / f"schedule_{scraper_type}_{stamp}.jsonl"
+    append_jsonl(work_list, scheduled_apps)
+    logger.info(f"[{scraper_type}] 排入 {len(scheduled_apps)} 筆 AppID (清單: {work_list.name})")
+    if plan_only:
+        return len(scheduled_apps)
+
+    scraper = SCRAPER_FACTORIES[scraper_type](work_list=work_list)
+    try:
+        scraper.run()
+    finally:
+        # 以實際發出的請求數 (含重試，不含快取命中) 扣除今日預算
+        scheduler.record_usage(scraper.metrics.snapshot()["requests_total"])
+        work_list.unlink(missing_ok=True)
+
+    logger.info(
+        f"[{scraper_type}] 排程爬取完成：成功 {scraper.data_count} 筆，失敗 {scraper.failed_count} 筆，"
+        f"今日剩餘預算 {scheduler.remaining_budget()} 次請求")
+    return len(scheduled_apps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="依熱門度與新鮮度排程的 Steam 爬蟲")
+    parser.add_argument("--type", dest="scraper_type", required=True,
+                        choices=list(SCRAPER_FACTORIES), help="爬蟲類型")
+    parser.add_argument("--budget", type=int, default=None,
+                        help="本次可用的請求數 (預設為今日剩餘的 daily_request_budget)")
+    parser.add_argument("--plan-only", action="store_true",
+                        help="只輸出排程清單 (data/raw/game_id/worklist/schedule_<type>_<時間>.jsonl)，不執行爬蟲")
+    args = parser.parse_args()
+
+    run_schedule(args.scraper_type, budget=args.budget, plan_only=args.plan_only)
@@ -6,8 +6,11 @@ import psycopg2
 from dotenv import load_dotenv
 from ollama import Client
 from pgvector.psycopg2 import register_vector
+from psycopg2 import sql
 from psycopg2.extras import execute_values
 
+from src.config.constant import REVIEW_DOC_TYPE
+
 load_dotenv()
 
 PG_HOST = os.environ.get("PG_HOST")
@@ -31,6 +34,97 @@ def connect_to_pgSQL():
     return pg_url
 
 
+def get_pg_connection():
+    """建立 psycopg2 連線 (供直接執行 SQL 使用)"""
+    return psycopg2.connect(host=PG_HOST, database=DB_NAME, user=USER,
+                            password=PASSWORD, port=PORT)
+
+
+def patch_vector_metadata(patches, collection_name, batch_size=500):
+    """
+    依 steam_appid 就地更新向量資料庫中遊戲文件所有父 / 子文件的 metadata (jsonb 合併，不重新計算向量)
+    同一 AppID 的評論文件不更新 (價格等遊戲欄位不屬於評論文件)
+    :param patches: {steam_appid: {欄位: 新值}}
+    :param collection_name: PGVector collection 名稱
+    :return: 更新的文件數
+    """
+    patch_query = sql.SQL("""
+    UPDATE langchain_pg_embedding AS e
+    SET cmetadata = e.cmetadata || v.patch::jsonb
+    FROM (VALUES %s) AS v(steam_appid, patch), langchain_pg_collection AS c
+    WHERE e.collection_id = c.uuid
+      AND c.name = {collection}
+      AND e.cmetadata->>'steam_appid' = v.steam_appid
+      AND e.cmetadata->>'doc_type' IS DISTINCT FROM {review_doc_type};
+    """).format(collection=sql.Literal(collection_name), review_doc_type=sql.Literal(REVIEW_DOC_TYPE))
+
+    items = [(str(appid), json.dumps(patch, ensure_ascii=False))
+             for appid, patch in patches.items()]
+    updated_count = 0
+
+    conn = get_pg_connection()
+    try:
+        with conn.cursor() as cur:
+            for i in range(0, len(items), batch_size):
+                execute_values(cur, patch_query, items[i: i + batch_size],
+                               page_size=batch_size)
+                updated_count += cur.rowcount
+        conn.commit()
+    except Exception as e:
+        print(f"更新向量 metadata 時發生錯誤: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+    return updated_count
+
+
+def delete_vector_documents(steam_appids, collection_name, batch_size=500, keep_doc_types=None, keep_ids=None,
+                            doc_types=None):
+    """
+    依 steam_appid 刪除向量資料庫中所有父 / 子文件 (用於移除已自 Steam 下架的遊戲)
+    :param steam_appids: 要刪除的 steam_appid
+    :param collection_name: PGVector collection 名稱
+    :param doc_types: 只刪除這些 doc_type 的文件 (例如只重建評論文件時)；None 代表不限
+    :param keep_doc_types: 保留的 doc_type (例如只重建遊戲文件時保留評論文件)；舊版的遊戲文件沒有 doc_type
+    :param keep_ids: 保留的文件 ID (先寫入新文件、再刪除舊文件時傳入剛寫入的 ID)
+    :return: 刪除的文件數 (發生錯誤時 rollback 並拋出例外，呼叫端不應記錄為已刪除)
+    """
+    delete_query = sql.SQL("""
+    DELETE FROM langchain_pg_embedding AS e
+    USING langchain_pg_collection AS c
+    WHERE e.collection_id = c.uuid
+      AND c.name = {collection}
+      AND e.cmetadata->>'steam_appid' = ANY(%s)
+      AND COALESCE(e.cmetadata->>'doc_type', '') <> ALL(%s)
+      AND e.id <> ALL(%s)
+      {doc_type_filter};
+    """).format(collection=sql.Literal(collection_name),
+                doc_type_filter=sql.SQL("AND e.cmetadata->>'doc_type' = ANY(%s)" if doc_types else ""))
+
+    appids = [str(appid) for appid in steam_appids]
+    deleted_count = 0
+
+    conn = get_pg_connection()
+    try:
+        with conn.cursor() as cur:
+            for i in range(0, len(appids), batch_size):
+                params = [appids[i: i + batch_size], list(keep_doc_types or []), list(keep_ids or [])]
+                if doc_types:
+                    params.append(list(doc_types))
+                cur.execute(delete_query, params)
+                deleted_count += cur.rowcount
+        conn.commit()
+    except Exception as e:
+        print(f"刪除向量文件時發生錯誤: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return deleted_count
+
+
 def upsert_documents(documents, client, batch_size=20):
     conn, cur = connect_to_pgSQL()
 
@@ -0,0 +1,235 @@
+import argparse
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.config.constant import (APP_CATALOGUE_PATH, PG_COLLECTION, PROJECT_ROOT, REVIEW_DOC_TYPE,
+                                 STREAM_PIPELINE_SETTINGS)
+from src.database import postgreSQL_conn as pgc
+from src.embedding.text_embedding import create_splitters, create_vector_store, parent_document_slicer
+from src.ETL.ETL_cluster import ClusterIndex, apply_clusters, load_clusters
+from src.ETL.ETL_document import build_document
+from src.ETL.ETL_json import (RAW_STORE_SOURCE, detect_source_type, iter_shards, list_input_file_nums,
+                              read_records, transform_batch)
+from src.utils.app_catalogue import load_removed_appids
+
+# 串流模式：raw 資料 → 清洗合併 (ETL_json) → 文件 (ETL_document) → Parent-Document 切割 → 向量資料庫
+# 各階段為 generator，階段之間以有界佇列串接並在各自的執行緒中執行，
+# 下游較慢時上游自動暫停，記憶體用量與資料量無關，第一批向量在讀取第一批資料後即可寫入。
+# 不產生 json_data / document 中間檔案 (需要中間檔案或增量更新時仍使用原本的批次流程)。
+
+
+class _EndOfStream:
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+def buffered(iterable: Iterable, maxsize: int) -> Iterator:
+    """
+    在背景執行緒中執行上游 generator，以有界佇列傳遞結果 (佇列已滿時上游暫停)
+    上游的例外會在下游重新拋出；下游提前結束時上游也會停止
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_EndOfStream(e))
+            return
+        put(_EndOfStream())
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = items.get()
+            if isinstance(item, _EndOfStream):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_raw_records(source_type: str) -> Iterator[Tuple[dict, dict, dict]]:
+    """依檔案編號 (或 raw 資料庫的分批) 逐筆讀取 (info, review, tag)"""
+    for input_file_num in list_input_file_nums(source_type):
+        try:
+            yield from read_records(source_type, input_file_num)
+        except Exception as e:
+            print(f"讀取檔案 {input_file_num} 發生錯誤: {e}")
+
+
+# 已下架的 AppID (由 init_worker 於每個 worker 程序設定一次)
+_removed_appids: Set[int] = set()
+
+
+def init_worker(removed_appids: Set[int]):
+    global _removed_appids
+    _removed_appids = removed_appids
+
+
+def transform_documents(records: List[Tuple[dict, dict, dict]]) -> List[dict]:
+    """將一批 (info, review, tag) 轉為文件 (context + metadata)，略過失敗與已下架的資料"""
+    documents = []
+    for _, new_game_info in transform_batch(records):
+        if new_game_info is None or new_game_info.get("steam_appid") in _removed_appids:
+            continue
+        documents.append(build_document(new_game_info))
+    return documents
+
+
+def iter_document_batches(records: Iterator, batch_size: int, workers: int) -> Iterator[List[dict]]:
+    """
+    每 batch_size 筆轉換一次；workers > 1 時以程序池平行轉換，
+    同時進行中的批次數上限為 workers * 2，並依原始順序輸出
+    """
+    if workers <= 1:
+        for shard in iter_shards(records, batch_size):
+            yield transform_documents(shard)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(_removed_appids,)) as executor:
+        pending = []
+        for shard in iter_shards(records, batch_size):
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+            pending.append(executor.submit(transform_documents, shard))
+        for future in pending:
+            yield future.result()
+
+
+def iter_vector_batches(document_batches: Iterator[List[dict]], parent_splitter, child_splitter,
+                        cluster_index: Optional[ClusterIndex] = None) -> Iterator[Tuple[Set[int], List[Document]]]:
+    """
+    將每批文件切割為父 / 子文件，回傳 (這批的 steam_appid, 切割後的文件)
+    有近似重複分群時只切割代表的文件；略過的 AppID 仍列入這批的 steam_appid，以刪除其舊的文件
+    """
+    for documents in document_batches:
+        if not documents:
+            continue
+        app_ids = {d.get("metadata", {}).get("steam_appid") for d in documents
+                   if d.get("metadata", {}).get("steam_appid")}
+        documents, _ = apply_clusters(documents, cluster_index or {})
+        doc_list = [Document(page_content=d.get("context", ""), metadata=d.get("metadata", {}))
+                    for d in documents]
+        # 逐份遊戲切割，父文件編號在每個遊戲內從 0 開始，與所在的批次無關
+        total_docs = []
+        for doc in doc_list:
+            total_docs.extend(parent_document_slicer([doc], parent_splitter, child_splitter, verbose=False))
+        yield app_ids, total_docs
+
+
+def write_vector_batches(vector_store, vector_batches: Iterator[Tuple[Set[int], List[Document]]],
+                         write_batch_size: int) -> Tuple[int, int, int]:
+    """
+    寫入向量資料庫：每批每 write_batch_size 份寫入一次 (相同 ID 覆寫)，全部寫入成功後
+    才刪除這些遊戲不再存在的舊遊戲文件 (保留評論文件)；寫入失敗時保留舊文件，遊戲不會自索引中消失
+    :return: (遊戲數, 寫入的文件數, 失敗的批次數)
+    """
+    game_count = written_count = failed_count = 0
+    failed_appids: Set[int] = set()
+    start_time = time.perf_counter()
+    for app_ids, total_docs in vector_batches:
+        batch_failed = False
+        for i in range(0, len(total_docs), write_batch_size):
+            batch_docs = total_docs[i: i + write_batch_size]
+            try:
+                vector_store.add_documents(
+                    documents=batch_docs,
+                    ids=[doc.metadata["doc_id"] for doc in batch_docs]
+                )
+                if written_count == 0:
+                    print(f"第一批向量已寫入 (開始後 {time.perf_counter() - start_time:.1f} 秒)")
+                written_count += len(batch_docs)
+            except Exception as e:
+                print(f"\n寫入批次時發生錯誤: {e}")
+                failed_count += 1
+                batch_failed = True
+
+        if batch_failed:
+            failed_appids |= app_ids
+        elif app_ids:
+            try:
+                pgc.delete_vector_documents(app_ids, PG_COLLECTION, keep_doc_types=[REVIEW_DOC_TYPE],
+                                            keep_ids=[doc.metadata["doc_id"] for doc in total_docs])
+            except Exception as e:
+                # 新文件已寫入，只是多留下舊的文件，下次重新寫入時會一併刪除
+                print(f"刪除舊的遊戲文件時發生錯誤 ({len(app_ids)} 個遊戲): {e}")
+                failed_count += 1
+                failed_appids |= app_ids
+
+        game_count += len(app_ids)
+        print(f"已寫入 {game_count} 個遊戲、{written_count} 份文件 "
+              f"({time.perf_counter() - start_time:.1f} 秒)")
+    if failed_appids:
+        print(f"以下 {len(failed_appids)} 個遊戲未完整更新 (已保留舊的文件)，請重新執行: {sorted(failed_appids)}")
+    return game_count, written_count, failed_count
+
+
+def run_pipeline(source_type: Optional[str] = None, workers: int = 1,
+                 settings: Optional[dict] = None) -> Tuple[int, int, int]:
+    """
+    以串流方式將 raw 資料寫入向量資料庫 (遊戲文件)
+    :param source_type: 資料來源 ('raw_store'、'game_combined' 或 'game_info')，預設自動偵測
+    :param workers: 轉換階段的 worker 程序數 (1 代表在背景執行緒中執行)
+    :return: (遊戲數, 寫入的文件數, 失敗的批次數)
+    """
+    settings = {**STREAM_PIPELINE_SETTINGS, **(settings or {})}
+    source_type = source_type or detect_source_type()
+    print(f"資料來源: {source_type}，轉換 worker 數: {workers}")
+
+    init_worker(load_removed_appids(PROJECT_ROOT / APP_CATALOGUE_PATH))
+    vector_store = create_vector_store()
+    parent_splitter, child_splitter = create_splitters()
+    # 沿用批次流程 (ETL_document) 上次的分群結果；串流模式無法在寫入前看到所有文件，不重新分群
+    cluster_index = load_clusters()
+
+    queue_size = settings["queue_size"]
+    # 讀取 → 轉換 → 切割 → 寫入，每個箭頭為一個有界佇列 (讀取、轉換、切割各在一個背景執行緒，寫入在目前的執行緒)
+    records = buffered(iter_raw_records(source_type), maxsize=queue_size * settings["slice_batch_size"])
+    document_batches = buffered(
+        iter_document_batches(records, settings["slice_batch_size"], workers), maxsize=queue_size)
+    vector_batches = buffered(
+        iter_vector_batches(document_batches, parent_splitter, child_splitter, cluster_index), maxsize=queue_size)
+
+    game_count, written_count, failed_count = write_vector_batches(
+        vector_store, vector_batches, settings["write_batch_size"])
+    print(f"--- 串流寫入結束: {game_count} 個遊戲、{written_count} 份文件，失敗 {failed_count} 批 ---")
+    return game_count, written_count, failed_count
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="串流模式：raw 資料逐筆清洗、文件化、切割後直接寫入向量資料庫")
+    parser.add_argument("--source", choices=[RAW_STORE_SOURCE, "game_combined", "game_info"], default=None,
+                        help="資料來源 (預設與 ETL_json 相同：raw 資料庫已匯入時優先使用)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="轉換階段的 worker 程序數 (HTML 清洗為 CPU 密集的工作)")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="各階段之間佇列的批次數上限 (預設 STREAM_PIPELINE_SETTINGS)")
+    args = parser.parse_args(argv)
+
+    settings = {"queue_size": args.queue_size} if args.queue_size else None
+    run_pipeline(source_type=args.source, workers=args.workers, settings=settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import json
+import argparse
 import time
 import uuid
 from pathlib import Path
@@ -14,10 +14,14 @@ from openai import OpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 from tqdm import tqdm
 
-from src.config.constant import (PG_COLLECTION, PROJECT_ROOT, TEI_LOCAL)
+from src.config.constant import (EMBEDDING_CHANGES_PATH, PG_COLLECTION, PROJECT_ROOT, REVIEW_DOC_TYPE,
+                                 REVIEW_EMBEDDING_CHANGES_PATH, TEI_LOCAL)
 # EMBEDDING_MODEL, OLLAMA_LOCAL, OLLAMA_URL
 
 from src.database import postgreSQL_conn as pgc
+from src.ETL.ETL_cluster import apply_clusters, load_clusters
+from src.utils.etl_manifest import load_changes
+from src.utils.fast_json import read_json
 
 """
 定義類別及函式
@@ -66,20 +70,35 @@ def connect_to_vector_db(embeddings, connection, collection_name=PG_COLLECTION):
     )
 
 
-def parent_document_slicer(doc_list, parent_splitter, child_splitter):
+def document_base_id(metadata):
     """
-    執行 Parent-Document 切割
+    文件 ID 的前綴：遊戲文件為 steam_appid，評論文件為 (steam_appid, 語言, 段落編號)，
+    與文件在檔案中的位置無關，重新寫入同一份文件時 ID 不變 (覆寫而不是新增)
+    """
+    steam_appid = metadata.get("steam_appid")
+    if not steam_appid:
+        return str(uuid.uuid4())
+    # 評論文件與同一遊戲的遊戲文件使用不同的 ID，避免互相覆蓋
+    if metadata.get("doc_type") == REVIEW_DOC_TYPE:
+        return f"{steam_appid}_{REVIEW_DOC_TYPE}_{metadata.get('review_language')}_{metadata.get('review_chunk')}"
+    return str(steam_appid)
+
+
+def parent_document_slicer(doc_list, parent_splitter, child_splitter, verbose=True):
+    """
+    執行 Parent-Document 切割 (父文件編號在每份文件內從 0 開始)
     """
     all_docs_to_vectorize = []
 
-    parent_docs = parent_splitter.split_documents(doc_list)
+    parent_docs = []
+    parent_indexes = []
+    for doc in doc_list:
+        split_parents = parent_splitter.split_documents([doc])
+        parent_docs.extend(split_parents)
+        parent_indexes.extend(range(len(split_parents)))
 
-    for pi, doc in enumerate(parent_docs):
-        steam_appid = doc.metadata.get("steam_appid")
-        if not steam_appid:
-            base_id = str(uuid.uuid4())
-        else:
-            base_id = str(steam_appid)
+    for pi, doc in zip(parent_indexes, parent_docs):
+        base_id = document_base_id(doc.metadata)
 
         current_parent_doc_id = base_id + f"_p0{str(pi)}"
 
@@ -97,18 +116,14 @@ def parent_document_slicer(doc_list, parent_splitter, child_splitter):
             sdoc.metadata["is_parent"] = False
             all_docs_to_vectorize.append(sdoc)
 
-    print(f"原始父文件數：{len(parent_docs)}")
-    print(f"處理後總文件數 (父+子)：{len(all_docs_to_vectorize)}")
+    if verbose:
+        print(f"原始父文件數：{len(parent_docs)}")
+        print(f"處理後總文件數 (父+子)：{len(all_docs_to_vectorize)}")
 
     return all_docs_to_vectorize
 
 
-"""
-主流程開始
-"""
-
-
-def main():
+def create_vector_store():
     print("正在連線 Embedding 模型...")
     # embeddings = OllamaEmbeddings(
     #     model=EMBEDDING_MODEL,
@@ -121,9 +136,12 @@ def main():
     )
 
     pg_url = pgc.connect_to_pgSQL()
-    vector_store = connect_to_vector_db(
+    return connect_to_vector_db(
         embeddings=embeddings, connection=pg_url)
 
+
+def create_splitters():
+    """Parent-Document 切割使用的 (父文件, 子文件) splitter"""
     parent_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=250,
@@ -136,18 +154,34 @@ def main():
         length_function=tiktoken_len,
         separators=["\n\n", "\n", "。", "！", "？", " ", ""]
     )
+    return parent_splitter, child_splitter
 
+
+def embed_folder(vector_store, folder_name, parent_splitter, child_splitter, only_appids=None, cluster_index=None,
+                 doc_types=None, keep_doc_types=None):
+    """
+    將 data/processed/<folder_name>/<folder_name>_N.json 依序切割並寫入向量資料庫
+    每個檔案先寫入新的文件 (相同 ID 覆寫)，寫入成功的 AppID 才刪除其不再存在的舊文件；
+    寫入失敗時保留舊的文件，遊戲不會在下次成功寫入前自索引中消失
+    :param only_appids: 指定時只寫入這些 steam_appid 的文件 (增量更新)
+    :param cluster_index: 近似重複分群 (ETL_cluster.load_clusters)，每群只寫入代表的文件，
+                          代表寫入成功後才刪除非代表 AppID 的舊文件
+    :param doc_types: 刪除舊文件時只刪除這些 doc_type (例如寫入評論文件時只刪除評論文件)
+    :param keep_doc_types: 刪除舊文件時保留的 doc_type (例如寫入遊戲文件時保留評論文件)
+    :return: 是否全部寫入成功
+    """
     input_num = 1
+    all_succeeded = True
 
     while True:
         try:
-            current_folder = Path(PROJECT_ROOT) / "data/processed/document"
+            current_folder = Path(PROJECT_ROOT) / "data/processed" / folder_name
             # 如果你的環境資料夾結構不同，請在此調整
             if not current_folder.exists():
                 print(f"路徑不存在: {current_folder}，請確認路徑配置")
                 break
 
-            input_file = f"document_{input_num}.json"
+            input_file = f"{folder_name}_{input_num}.json"
             input_path = current_folder / input_file
 
             if not input_path.exists():
@@ -155,11 +189,19 @@ def main():
                 break
 
             print(f"正在讀取: {input_file} ...")
-            with open(input_path, "r", encoding="utf-8") as f:
-                data_list = json.load(f)
-
-            if not data_list:
-                print(f"警告: {input_file} 是空的，跳過。")
+            data_list = read_json(input_path)
+
+            if only_appids is not None:
+                data_list = [d for d in data_list
+                             if d.get("metadata", {}).get("steam_appid") in only_appids]
+            skipped_appids = set()
+            if cluster_index:
+                data_list, skipped_appids = apply_clusters(data_list, cluster_index)
+                if skipped_appids:
+                    print(f"略過 {len(skipped_appids)} 份近似重複的文件 (已記錄於代表文件的 metadata)")
+
+            if not data_list and not skipped_appids:
+                print(f"警告: {input_file} 沒有需要寫入的文件，跳過。")
                 input_num += 1
                 continue
 
@@ -173,6 +215,7 @@ def main():
 
             # 2. 輸入PostgreSQL資料庫
             batch_size = 32
+            failed_appids = set()
             for i in tqdm(range(0, len(total_docs), batch_size), desc=f"寫入進度 ({input_file})"):
                 batch_docs = total_docs[i: i + batch_size]
                 batch_ids = ids[i: i + batch_size]
@@ -187,6 +230,26 @@ def main():
                 except Exception as e:
                     # 這裡捕捉到的錯誤會顯示出來，不會讓程式崩潰
                     print(f"\n寫入批次 {i} 時發生錯誤: {e}")
+                    failed_appids |= {doc.metadata.get("steam_appid") for doc in batch_docs}
+                    all_succeeded = False
+
+            # 3. 刪除舊的文件：寫入成功的 AppID，以及代表文件已寫入成功的非代表 AppID
+            written_appids = {doc.metadata.get("steam_appid") for doc in total_docs} - failed_appids - {None}
+            stale_appids = written_appids | {app_id for app_id in skipped_appids
+                                             if cluster_index[app_id]["canonical"] not in failed_appids}
+            if stale_appids:
+                try:
+                    deleted_count = pgc.delete_vector_documents(
+                        stale_appids, PG_COLLECTION, doc_types=doc_types, keep_doc_types=keep_doc_types,
+                        keep_ids=[doc_id for doc, doc_id in zip(total_docs, ids)
+                                  if doc.metadata.get("steam_appid") in written_appids])
+                    print(f"刪除 {deleted_count} 份舊的文件")
+                except Exception as e:
+                    # 新文件已寫入，只是多留下舊的文件，保留變動清單讓下次重新寫入時一併刪除
+                    print(f"刪除舊的文件時發生錯誤 ({len(stale_appids)} 個 AppID): {e}")
+                    all_succeeded = False
+            if failed_appids:
+                print(f"以下 {len(failed_appids)} 個 AppID 寫入失敗 (已保留舊的文件): {sorted(failed_appids)}")
 
             print(f"成功處理: {input_file}")
             input_num += 1
@@ -194,8 +257,73 @@ def main():
 
         except Exception as e:
             print(f"處理檔案 {input_num} 時發生未預期的錯誤: {e}")
+            all_succeeded = False
             break
 
+    return all_succeeded
+
+
+"""
+主流程開始
+"""
+
+
+def embed_changes(vector_store, folder_name, changes_path, full, parent_splitter, child_splitter,
+                  cluster_index=None, doc_types=None, keep_doc_types=None):
+    """
+    依變動清單寫入一種文件 (遊戲文件或評論文件)：只有已移除的 AppID 事先刪除，
+    變動的 AppID 先寫入新文件，成功後才刪除其舊文件；只有價格變動的 AppID 就地更新 metadata，不重新向量化；
+    全部寫入成功後才刪除變動清單
+    :param full: 寫入所有文件 (忽略變動清單)；找不到變動清單時亦同
+    :return: 是否全部寫入成功
+    """
+    changes = None if full else load_changes(changes_path)
+    if not full and changes is None:
+        print(f"找不到變動清單 {changes_path}，寫入所有 {folder_name} 文件")
+
+    only_appids = None
+    if changes is not None:
+        only_appids = set(changes["changed"])
+        removed_appids = set(changes["removed"])
+        deleted_count = pgc.delete_vector_documents(
+            removed_appids, PG_COLLECTION, doc_types=doc_types,
+            keep_doc_types=keep_doc_types) if removed_appids else 0
+        print(f"{folder_name} 增量更新: 變動 {len(only_appids)} 筆、移除 {len(removed_appids)} 筆 "
+              f"(刪除 {deleted_count} 份已移除 AppID 的文件)")
+
+    all_succeeded = embed_folder(vector_store, folder_name, parent_splitter, child_splitter, only_appids,
+                                 cluster_index, doc_types=doc_types, keep_doc_types=keep_doc_types)
+
+    repriced = changes.get("repriced", {}) if changes is not None else {}
+    if repriced:
+        patched_count = pgc.patch_vector_metadata(repriced, PG_COLLECTION)
+        print(f"{folder_name} 價格更新: {len(repriced)} 筆 AppID，更新 {patched_count} 份文件的 metadata")
+
+    if changes is not None:
+        if all_succeeded:
+            changes_path.unlink(missing_ok=True)
+        else:
+            print(f"部分文件寫入失敗，保留變動清單 {changes_path}，下次執行時重新寫入")
+    return all_succeeded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="將文件切割後寫入 PGVector 向量資料庫")
+    parser.add_argument("--full", action="store_true",
+                        help="寫入所有遊戲與評論文件 (預設只寫入 ETL_document / ETL_review 變動清單中的 AppID)")
+    args = parser.parse_args(argv)
+
+    vector_store = create_vector_store()
+    parent_splitter, child_splitter = create_splitters()
+    cluster_index = load_clusters()
+
+    # 遊戲文件與評論文件 (ETL_review.py) 依序寫入同一個 collection，以 metadata 的 doc_type 區分，
+    # 各自有變動清單；刪除舊文件時只刪除同一種文件 (非代表 AppID 已寫入的遊戲文件在其代表寫入成功後刪除)
+    embed_changes(vector_store, "document", PROJECT_ROOT / EMBEDDING_CHANGES_PATH, args.full,
+                  parent_splitter, child_splitter, cluster_index, keep_doc_types=[REVIEW_DOC_TYPE])
+    embed_changes(vector_store, "review_document", PROJECT_ROOT / REVIEW_EMBEDDING_CHANGES_PATH, args.full,
+                  parent_splitter, child_splitter, doc_types=[REVIEW_DOC_TYPE])
+
 
 if __name__ == "__main__":
     main()
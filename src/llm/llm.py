@@ -18,7 +18,7 @@ from openai import APIConnectionError, OpenAI
 from src.config.constant import (LM_STUDIO_IP, PG_COLLECTION, SYSTEM_PROMPT,
                                  TEI_URL)
 from src.database import postgreSQL_conn as pgc
-from src.rag.tools import create_few_game_rag_tool
+from src.rag.tools import create_few_game_rag_tool, create_game_review_rag_tool
 
 # EMBEDDING_MODEL, OLLAMA_LOCAL, OLLAMA_URL, PROJECT_ROOT
 
@@ -101,7 +101,8 @@ def get_llm(model_option: str):
 def init_bot(model_option: str):
     llm = get_llm(model_option)
     few_game_rag = create_few_game_rag_tool(vector_store)
-    tools = [few_game_rag]
+    game_review_rag = create_game_review_rag_tool(vector_store)
+    tools = [few_game_rag, game_review_rag]
     return stream_chat_bot(llm, tools)
 
 
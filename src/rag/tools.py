@@ -1,6 +1,8 @@
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
+from src.config.constant import GAME_DOC_TYPE, REVIEW_DOC_TYPE
+
 """
 RAG工具
 """
@@ -27,8 +29,8 @@ def create_few_game_rag_tool(vector_store):
         Returns:
             documents: 檢索到的相似文件列表。
         """
-        # 檢索子文件
-        child_docs = vector_store.similarity_search(question, k=n)
+        # 檢索子文件 (只檢索遊戲文件，評論文件由 game_review_rag 檢索)
+        child_docs = vector_store.similarity_search(question, k=n, filter={"doc_type": {"$eq": GAME_DOC_TYPE}})
 
         # 提取父文件id
         unique_parent_ids = list(dict.fromkeys([
@@ -44,8 +46,38 @@ def create_few_game_rag_tool(vector_store):
         parent_documents = vector_store.similarity_search(
             query=question,
             k=len(target_ids),
-            filter={"doc_id": {"$in": target_ids}}  # 假設支援 $in 運算子
+            filter={"doc_id": {"$in": target_ids}, "doc_type": {"$eq": GAME_DOC_TYPE}}  # 假設支援 $in 運算子
         )
 
         return parent_documents
-    return few_game_rag
\ No newline at end of file
+    return few_game_rag
+
+
+class GameReviewInput(BaseModel):
+    question: str = Field(description="查詢的問題文字 (建議包含遊戲名稱)")
+    k: int = Field(default=3, description="要回傳的評論文件數量")
+
+
+def create_game_review_rag_tool(vector_store):
+
+    @tool("game_review_rag", args_schema=GameReviewInput)
+    def game_review_rag(question, k=3):
+        """
+        當使用者詢問『玩家對某款遊戲的評價』時使用。
+        例如：玩家覺得好不好玩、常見的抱怨、優化問題、是否值得購買等。
+        這會回傳依有用程度排序的玩家評論摘錄 (含推薦與否與遊玩時數)。
+
+        Args:
+            question (str): 查詢的問題文字。
+            k (int): 要回傳的評論文件數量，預設為 3。
+
+        Returns:
+            documents: 檢索到的評論文件列表。
+        """
+        # 只檢索評論文件的父文件 (父文件已包含完整的評論段落)
+        return vector_store.similarity_search(
+            query=question,
+            k=k,
+            filter={"doc_type": {"$eq": REVIEW_DOC_TYPE}, "is_parent": {"$eq": True}}
+        )
+    return game_review_rag
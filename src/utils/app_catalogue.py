@@ -0,0 +1,160 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+# 變動類型
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+
+
+class AppCatalogue:
+    """
+    Steam AppID 目錄
+    以 SQLite (依 appid 排序的 B-tree) 保存所有 AppID 的名稱與 last_modified，
+    每次爬取時合併新清單並找出新增、修改與下架 (完整清單中不再出現) 的 AppID。
+    同一次爬取的合併在單一交易中完成，爬取失敗時整批回復，下次重新比對不會漏掉變動。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: SQLite 檔案路徑
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 自行控制交易範圍 (begin_run / commit_run)
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS apps (
+                appid INTEGER PRIMARY KEY,
+                name TEXT,
+                last_modified INTEGER,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                removed_at REAL,
+                pruned_at REAL
+            )
+            """
+        )
+        self.seen_at = None
+
+    def begin_run(self, seen_at: float):
+        """開始一次爬取，seen_at 為本次爬取的開始時間"""
+        self.seen_at = seen_at
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def merge(self, apps: Iterable[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        將一頁 API 結果合併至目錄
+        :return: (本次爬取中首次出現的 AppID (已去除重複), 新增或修改的 AppID (附 change 欄位))
+        """
+        fresh_apps, changed_apps = [], []
+        for app in apps:
+            app_id = app.get("appid")
+            if not app_id:
+                continue
+            row = self.conn.execute(
+                "SELECT last_modified, last_seen, removed_at FROM apps WHERE appid = ?", (app_id,)
+            ).fetchone()
+
+            if row is None:
+                change = ADDED
+            elif row[1] == self.seen_at:
+                # 同一次爬取中重複出現的 AppID
+                continue
+            elif row[2] is not None:
+                # 曾經下架又重新出現，視為新增
+                change = ADDED
+            elif row[0] != app.get("last_modified"):
+                change = MODIFIED
+            else:
+                change = None
+
+            self.conn.execute(
+                """
+                INSERT INTO apps (appid, name, last_modified, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (appid) DO UPDATE SET
+                    name = excluded.name, last_modified = excluded.last_modified,
+                    last_seen = excluded.last_seen, removed_at = NULL, pruned_at = NULL
+                """,
+                (app_id, app.get("name"), app.get("last_modified"), self.seen_at, self.seen_at)
+            )
+            fresh_apps.append(app)
+            if change is not None:
+                changed_apps.append({**app, "change": change})
+        return fresh_apps, changed_apps
+
+    def mark_removed(self) -> List[Dict]:
+        """
+        完整爬取成功後呼叫：本次未出現的 AppID 視為已自 Steam 下架
+        (增量爬取只會回傳有變動的 AppID，不可呼叫)
+        """
+        removed_apps = [
+            {"appid": app_id, "name": name, "last_modified": last_modified, "change": REMOVED}
+            for app_id, name, last_modified in self.conn.execute(
+                "SELECT appid, name, last_modified FROM apps "
+                "WHERE last_seen < ? AND removed_at IS NULL ORDER BY appid",
+                (self.seen_at,))
+        ]
+        self.conn.execute(
+            "UPDATE apps SET removed_at = ? WHERE last_seen < ? AND removed_at IS NULL",
+            (time.time(), self.seen_at))
+        return removed_apps
+
+    def commit_run(self):
+        self.conn.execute("COMMIT")
+
+    def rollback_run(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    def iter_active(self) -> Iterator[Tuple[int, int]]:
+        """依 appid 順序逐筆產生目前仍在 Steam 上的 (AppID, last_modified)"""
+        yield from self.conn.execute(
+            "SELECT appid, last_modified FROM apps WHERE removed_at IS NULL ORDER BY appid")
+
+    def removed_appids(self, pruned: bool = None) -> Set[int]:
+        """
+        已下架的 AppID
+        :param pruned: True 只回傳已自向量資料庫移除者，False 只回傳尚未移除者，None 代表全部
+        """
+        query = "SELECT appid FROM apps WHERE removed_at IS NOT NULL"
+        if pruned is True:
+            query += " AND pruned_at IS NOT NULL"
+        elif pruned is False:
+            query += " AND pruned_at IS NULL"
+        return {row[0] for row in self.conn.execute(query)}
+
+    def mark_pruned(self, app_ids: Iterable[int]):
+        """記錄已自向量資料庫移除的 AppID"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE apps SET pruned_at = ? WHERE appid = ?",
+                [(now, int(app_id)) for app_id in app_ids])
+
+    def stats(self) -> Dict[str, int]:
+        row = self.conn.execute(
+            "SELECT COUNT(*), SUM(removed_at IS NULL), SUM(removed_at IS NOT NULL), "
+            "SUM(pruned_at IS NOT NULL) FROM apps"
+        ).fetchone()
+        return {"total": row[0], "active": row[1] or 0, "removed": row[2] or 0, "pruned": row[3] or 0}
+
+    def close(self):
+        self.rollback_run()
+        self.conn.close()
+
+
+def load_removed_appids(db_path: Path) -> Set[int]:
+    """讀取已下架的 AppID (目錄不存在時回傳空集合)，供 ETL 排除"""
+    if not db_path.exists():
+        return set()
+    catalogue = AppCatalogue(db_path)
+    try:
+        return catalogue.removed_appids()
+    finally:
+        catalogue.close()
@@ -0,0 +1,70 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+
+class CrawlCheckpoint:
+    """
+    爬蟲進度檢查點
+    以 SQLite 記錄已成功寫入檔案的 AppID 與寫入時間，重新啟動時可自動略過已完成的 AppID。
+    另記錄已處理完畢的增量 work list，下次增量爬取只讀取尚未處理的清單。
+    每個爬蟲類型各自一個資料庫檔案 (存放於 data/raw/<type>/metadata)。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: SQLite 檔案路徑
+        """
+        self.db_path = db_path
+        # 非同步爬蟲在背景執行緒中寫入 (同一時間只有一個執行緒使用連線)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL 模式下寫入不會阻塞讀取，且每次 commit 皆已落地
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fetched (
+                appid INTEGER PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS consumed_work_lists (
+                name TEXT PRIMARY KEY,
+                consumed_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def load_done(self) -> Dict[int, float]:
+        """讀取所有已完成的 AppID，回傳 {appid: 完成時間 (epoch 秒)}"""
+        rows = self.conn.execute("SELECT appid, fetched_at FROM fetched")
+        return {appid: fetched_at for appid, fetched_at in rows}
+
+    def mark_done(self, app_ids: Iterable[int]):
+        """將一批 AppID 標記為已完成 (需在資料確實寫入檔案後呼叫)"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO fetched (appid, fetched_at) VALUES (?, ?)",
+                [(int(app_id), now) for app_id in app_ids]
+            )
+
+    def consumed_work_lists(self) -> Set[str]:
+        """已處理完畢的 work list 檔名"""
+        return {name for (name,) in self.conn.execute("SELECT name FROM consumed_work_lists")}
+
+    def mark_work_lists_consumed(self, names: Iterable[str]):
+        """將 work list 標記為已處理完畢 (清單中所有 AppID 皆已寫入或移至 dead-letter queue 後呼叫)"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO consumed_work_lists (name, consumed_at) VALUES (?, ?)",
+                [(name, now) for name in names]
+            )
+
+    def close(self):
+        self.conn.close()
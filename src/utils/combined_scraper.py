@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from src.config.constant import COMBINED_URL_TYPES
+from src.utils.scraper_base import SteamScraperBase
+
+logger = logging.getLogger(__name__)
+
+
+class SteamCombinedScraper(SteamScraperBase):
+    """
+    Steam 合併爬蟲
+    對每個 AppID 同時請求 info / review / tag 三個端點，並寫成一筆合併資料：
+    {"appid": 10, "game_info": {...}, "game_review": {...}, "game_tag": {...}}
+    每筆資料的耗時取決於最慢的端點，且 ETL 不再需要依檔案編號對齊三類資料。
+    """
+
+    def __init__(self, scraper_type: str = "game_combined",
+                 url_types: Optional[Dict[str, str]] = None, **kwargs):
+        """
+        :param scraper_type: 爬蟲類型 (用於資料夾命名)
+        :param url_types: {資料類型: API URL 模板}，預設為 COMBINED_URL_TYPES
+        :param kwargs: 其餘參數同 SteamScraperBase (max_input_files, use_async, work_list...)
+        """
+        self.url_types = url_types or COMBINED_URL_TYPES
+        super().__init__(scraper_type=scraper_type,
+                         url_type=self.url_types["game_info"], **kwargs)
+
+    def _join_results(self, app_id: int, results: Dict[str, Optional[Dict]],
+                      reasons: Dict[str, Dict[int, str]]) -> Optional[Dict]:
+        """
+        合併各端點結果；任一端點失敗則整筆視為失敗，留待下次重新爬取
+        :param reasons: {資料類型: 該端點的失敗原因字典} (各端點同時請求，分開記錄才不會互相覆寫)
+        """
+        failed_types = [
+            data_type for data_type, data in results.items() if not data]
+        if failed_types:
+            logger.warning(f"AppID {app_id} 以下端點爬取失敗: {failed_types}")
+            self.failure_reasons[app_id] = "; ".join(
+                f"{data_type} 失敗: {reasons[data_type].get(app_id)}" for data_type in failed_types)
+            return None
+
+        joined_data = {"appid": app_id}
+        joined_data.update(results)
+        return joined_data
+
+    def _fetch_single_data(self, app_id: int) -> Optional[Dict]:
+        """同步模式：依序請求各端點"""
+        reasons = {data_type: {} for data_type in self.url_types}
+        results = {
+            data_type: self._fetch_url(url_type.format(app_id), app_id, reasons[data_type])
+            for data_type, url_type in self.url_types.items()
+        }
+        return self._join_results(app_id, results, reasons)
+
+    async def _fetch_single_data_async(self, client, app_id: int) -> Optional[Dict]:
+        """非同步模式：同時請求各端點，各自受所屬主機的速率限制"""
+        data_types = list(self.url_types.keys())
+        reasons = {data_type: {} for data_type in data_types}
+        responses = await asyncio.gather(*(
+            self._fetch_url_async(
+                client, self.url_types[data_type].format(app_id), app_id, reasons[data_type])
+            for data_type in data_types
+        ))
+        return self._join_results(app_id, dict(zip(data_types, responses)), reasons)
@@ -0,0 +1,272 @@
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from src.utils.fast_json import encode_pretty
+
+# 請求延遲直方圖的上界 (秒)，最後一格為 +Inf
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint_label(url: str) -> str:
+    """將 URL 轉為端點名稱 (主機 + 路徑，路徑中的數字 AppID 以 {} 取代，避免標籤數量無限增加)"""
+    parts = urlsplit(url)
+    path = re.sub(r"/\d+(?=/|$)", "/{}", parts.path)
+    return f"{parts.hostname or ''}{path}"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """產生 Prometheus 標籤字串 (跳脫反斜線與雙引號)"""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _write_atomic(path: Path, content: str):
+    """先寫入暫存檔再取代，讓讀取端 (如 node_exporter) 不會讀到寫到一半的檔案"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class CrawlMetrics:
+    """
+    爬蟲即時指標
+    記錄每秒請求數、各端點的延遲直方圖、重試次數、HTTP 狀態碼分布、下載量與預估剩餘時間，
+    並定期輸出為 JSON 快照與 Prometheus textfile (可由 node_exporter 的 textfile collector 讀取)。
+    """
+
+    def __init__(self, name: str, output_folder: Path, total: Optional[int] = None,
+                 snapshot_interval: float = 30, window_seconds: float = 60):
+        """
+        :param name: 爬蟲名稱 (輸出檔名與 Prometheus 的 scraper 標籤)
+        :param output_folder: 輸出資料夾
+        :param total: 預計處理的項目總數 (用於計算 ETA，未知時為 None)
+        :param snapshot_interval: 定期輸出的間隔秒數
+        :param window_seconds: 計算即時速率的時間窗口秒數
+        """
+        self.name = name
+        self.output_folder = output_folder
+        self.total = total
+        self.snapshot_interval = snapshot_interval
+        self.window_seconds = window_seconds
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+
+        self.started_at = time.time()
+        self._last_written = 0.0
+        self._lock = threading.Lock()
+
+        # {(端點, 狀態碼): 次數}
+        self.status_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        # {端點: [各 bucket 次數..., +Inf 次數]}
+        self.latency_buckets: Dict[str, List[int]] = {}
+        self.latency_sum: Dict[str, float] = defaultdict(float)
+        self.retry_counts: Dict[str, int] = defaultdict(int)
+        self.bytes_counts: Dict[str, int] = defaultdict(int)
+        # 其他事件 (throttled, unavailable...)
+        self.event_counts: Dict[str, int] = defaultdict(int)
+        self.items_ok = 0
+        self.items_failed = 0
+        # 其他即時數值，例如各主機目前的速率 {指標名稱: (標籤名稱, {標籤值: 數值})}
+        self.gauges: Dict[str, Tuple[str, Dict[str, float]]] = {}
+
+        # 時間窗口內的請求 / 完成時間點，用於計算即時速率
+        self._request_times: Deque[float] = deque()
+        self._item_times: Deque[Tuple[float, int]] = deque()
+
+    @property
+    def json_path(self) -> Path:
+        return self.output_folder / f"{self.name}.json"
+
+    @property
+    def prom_path(self) -> Path:
+        return self.output_folder / f"{self.name}.prom"
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._request_times and self._request_times[0] < cutoff:
+            self._request_times.popleft()
+        while self._item_times and self._item_times[0][0] < cutoff:
+            self._item_times.popleft()
+
+    def record_request(self, url: str, status, latency: float, num_bytes: int = 0):
+        """
+        記錄一次 HTTP 請求
+        :param status: 狀態碼，連線錯誤等例外可傳入 'error'
+        :param latency: 請求耗時 (秒)
+        """
+        endpoint = endpoint_label(url)
+        now = time.time()
+        with self._lock:
+            self.status_counts[(endpoint, str(status))] += 1
+            buckets = self.latency_buckets.setdefault(
+                endpoint, [0] * (len(LATENCY_BUCKETS) + 1))
+            for i, upper in enumerate(LATENCY_BUCKETS):
+                if latency <= upper:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            self.latency_sum[endpoint] += latency
+            self.bytes_counts[endpoint] += num_bytes
+            self._request_times.append(now)
+            self._trim(now)
+
+    def record_retry(self, url: str):
+        with self._lock:
+            self.retry_counts[endpoint_label(url)] += 1
+
+    def record_event(self, event: str, count: int = 1):
+        with self._lock:
+            self.event_counts[event] += count
+
+    def record_items(self, ok: int = 0, failed: int = 0):
+        """記錄完成的項目數 (AppID、批次或頁數，依爬蟲而定)"""
+        now = time.time()
+        with self._lock:
+            self.items_ok += ok
+            self.items_failed += failed
+            self._item_times.append((now, ok + failed))
+            self._trim(now)
+
+    def set_gauge(self, name: str, values: Dict[str, float], label: str = "key"):
+        """設定即時數值，例如 set_gauge("rate_limit", {"steamspy.com": 1.0}, label="host")"""
+        with self._lock:
+            self.gauges[name] = (label, dict(values))
+
+    def snapshot(self) -> Dict:
+        """產生目前的指標快照"""
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            elapsed = max(now - self.started_at, 1e-9)
+            window = min(self.window_seconds, elapsed)
+            total_requests = sum(self.status_counts.values())
+            items_done = self.items_ok + self.items_failed
+
+            # 即時速率以時間窗口計算，窗口內沒有資料時退回整體平均
+            recent_items = sum(n for _, n in self._item_times)
+            items_per_sec = recent_items / window if recent_items else items_done / elapsed
+
+            eta_seconds = None
+            remaining = None
+            if self.total is not None:
+                remaining = max(self.total - items_done, 0)
+                if items_per_sec > 0:
+                    eta_seconds = round(remaining / items_per_sec, 1)
+
+            endpoints = {}
+            for endpoint, buckets in self.latency_buckets.items():
+                count = sum(buckets)
+                endpoints[endpoint] = {
+                    "requests": count,
+                    "status": {status: n for (ep, status), n in self.status_counts.items()
+                               if ep == endpoint},
+                    "retries": self.retry_counts.get(endpoint, 0),
+                    "bytes": self.bytes_counts.get(endpoint, 0),
+                    "latency_avg": round(self.latency_sum[endpoint] / count, 4) if count else None,
+                    "latency_buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], buckets)),
+                }
+
+            return {
+                "scraper": self.name,
+                "updated_at": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+                "elapsed_seconds": round(elapsed, 1),
+                "requests_total": total_requests,
+                "requests_per_sec": round(len(self._request_times) / window, 3),
+                "requests_per_sec_avg": round(total_requests / elapsed, 3),
+                "items_ok": self.items_ok,
+                "items_failed": self.items_failed,
+                "items_total": self.total,
+                "items_remaining": remaining,
+                "items_per_sec": round(items_per_sec, 3),
+                "eta_seconds": eta_seconds,
+                "retries_total": sum(self.retry_counts.values()),
+                "bytes_total": sum(self.bytes_counts.values()),
+                "events": dict(self.event_counts),
+                "gauges": {name: dict(values) for name, (_, values) in self.gauges.items()},
+                "endpoints": endpoints,
+            }
+
+    def to_prometheus(self, snapshot: Optional[Dict] = None) -> str:
+        """轉為 Prometheus text exposition 格式"""
+        snapshot = snapshot or self.snapshot()
+        base = {"scraper": self.name}
+        lines: List[str] = []
+
+        def metric(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict, float]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels({**base, **labels})} {value}")
+
+        endpoints = snapshot["endpoints"]
+        metric("steam_crawler_requests_total", "counter", "HTTP 請求次數 (依端點與狀態碼)",
+               [({"endpoint": ep, "status": status}, n)
+                for ep, info in endpoints.items() for status, n in info["status"].items()])
+        metric("steam_crawler_retries_total", "counter", "重試次數",
+               [({"endpoint": ep}, info["retries"]) for ep, info in endpoints.items()])
+        metric("steam_crawler_response_bytes_total", "counter", "下載的回應大小 (bytes)",
+               [({"endpoint": ep}, info["bytes"]) for ep, info in endpoints.items()])
+
+        histogram_samples = []
+        for ep, info in endpoints.items():
+            cumulative = 0
+            for upper, n in info["latency_buckets"].items():
+                cumulative += n
+                histogram_samples.append(({"endpoint": ep, "le": upper}, cumulative))
+        lines.append("# HELP steam_crawler_request_duration_seconds 請求延遲")
+        lines.append("# TYPE steam_crawler_request_duration_seconds histogram")
+        for labels, value in histogram_samples:
+            lines.append(
+                f"steam_crawler_request_duration_seconds_bucket{_format_labels({**base, **labels})} {value}")
+        for ep, info in endpoints.items():
+            labels = _format_labels({**base, "endpoint": ep})
+            lines.append(
+                f"steam_crawler_request_duration_seconds_sum{labels} {round(self.latency_sum[ep], 6)}")
+            lines.append(
+                f"steam_crawler_request_duration_seconds_count{labels} {info['requests']}")
+
+        metric("steam_crawler_items_total", "counter", "完成的項目數",
+               [({"result": "ok"}, snapshot["items_ok"]), ({"result": "failed"}, snapshot["items_failed"])])
+        metric("steam_crawler_events_total", "counter", "限流、無資料等事件次數",
+               [({"event": event}, n) for event, n in snapshot["events"].items()])
+        metric("steam_crawler_requests_per_second", "gauge", "時間窗口內的每秒請求數",
+               [({}, snapshot["requests_per_sec"])])
+        metric("steam_crawler_items_per_second", "gauge", "時間窗口內的每秒完成項目數",
+               [({}, snapshot["items_per_sec"])])
+        if snapshot["items_remaining"] is not None:
+            metric("steam_crawler_items_remaining", "gauge", "剩餘項目數",
+                   [({}, snapshot["items_remaining"])])
+        if snapshot["eta_seconds"] is not None:
+            metric("steam_crawler_eta_seconds", "gauge", "預估剩餘秒數",
+                   [({}, snapshot["eta_seconds"])])
+        for name, (label, values) in self.gauges.items():
+            metric(f"steam_crawler_{name}", "gauge", name,
+                   [({label: key}, value) for key, value in values.items()])
+        metric("steam_crawler_last_update_timestamp_seconds", "gauge", "最後更新時間",
+               [({}, round(time.time(), 3))])
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> Dict:
+        """輸出 JSON 快照與 Prometheus textfile"""
+        snapshot = self.snapshot()
+        _write_atomic(self.json_path, encode_pretty(snapshot).decode("utf-8"))
+        _write_atomic(self.prom_path, self.to_prometheus(snapshot))
+        self._last_written = time.time()
+        return snapshot
+
+    def maybe_write(self) -> Optional[Dict]:
+        """距離上次輸出超過 snapshot_interval 時才輸出，適合在爬取迴圈中頻繁呼叫"""
+        if time.time() - self._last_written < self.snapshot_interval:
+            return None
+        return self.write()
@@ -0,0 +1,181 @@
+import logging
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.config.constant import (APP_CATALOGUE_PATH, COMBINED_URL_TYPES, CRAWL_SCHEDULE,
+                                 PROJECT_ROOT, RAW_DATA_PATH, RAW_METADATA_PATH)
+from src.utils.app_catalogue import AppCatalogue
+from src.utils.checkpoint import CrawlCheckpoint
+from src.utils.fast_json import read_json, write_json
+from src.utils.parquet_store import iter_processed_columns
+from src.utils.record_io import find_data_file, iter_data_file
+
+logger = logging.getLogger(__name__)
+
+# 從未爬取過的 AppID 視為極度過期，排在所有已爬取的 AppID 之前 (彼此之間仍依重要度排序)
+NEVER_FETCHED_STALENESS = 1e6
+
+DAY_SECONDS = 24 * 3600
+
+
+class CrawlScheduler:
+    """
+    依熱門度與新鮮度排程的爬取清單
+    每個 AppID 依評論數 (total_reviews) 與發售時間算出重要度，重要度決定重新爬取的間隔；
+    距上次爬取 (檢查點的完成時間) 超過間隔者視為到期，依過期程度 × 重要度排序，
+    並在每日請求數預算內產生 work list 交給 SteamScraperBase 依序爬取。
+    """
+
+    def __init__(self, scraper_type: str, root: Path = PROJECT_ROOT, settings: Optional[Dict] = None):
+        """
+        :param scraper_type: 爬蟲類型 (決定檢查點、預算與重新爬取間隔)
+        :param root: 專案根目錄
+        :param settings: 覆寫 CRAWL_SCHEDULE 中的設定
+        """
+        self.scraper_type = scraper_type
+        self.root = root
+        self.settings = {**CRAWL_SCHEDULE["default"], **CRAWL_SCHEDULE.get(scraper_type, {}),
+                         **(settings or {})}
+        # 合併爬蟲每個 AppID 會請求 info / review / tag 三個端點；分頁爬蟲可於設定中指定平均請求數
+        self.requests_per_app = self.settings.get("requests_per_app") or (
+            len(COMBINED_URL_TYPES) if scraper_type == "game_combined" else 1)
+
+        self.metadata_folder = root / RAW_METADATA_PATH.format(scraper_type)
+        self.metadata_folder.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.metadata_folder / "schedule_state.json"
+
+    def _iter_candidates(self) -> Iterator[Tuple[int, int]]:
+        """候選 AppID 與 last_modified：優先使用 AppID 目錄 (已排除下架者)，否則讀取 game_id 檔案"""
+        catalogue_path = self.root / APP_CATALOGUE_PATH
+        if catalogue_path.exists():
+            catalogue = AppCatalogue(catalogue_path)
+            try:
+                yield from catalogue.iter_active()
+            finally:
+                catalogue.close()
+            return
+
+        id_folder = self.root / RAW_DATA_PATH.format("game_id")
+        file_num = 1
+        while (id_file_path := find_data_file(id_folder, "game_id", file_num)) is not None:
+            for game in iter_data_file(id_file_path):
+                if game.get("appid"):
+                    yield game["appid"], game.get("last_modified") or 0
+            file_num += 1
+
+    def _load_popularity(self) -> Dict[int, Tuple[int, Optional[int]]]:
+        """從 processed 資料讀取每個 AppID 的 (total_reviews, release_date_timestamp) (有 Parquet 時只讀取這些欄位)"""
+        popularity = {}
+        for record in iter_processed_columns(
+                self.root, ["steam_appid", "total_reviews", "release_date_timestamp"]):
+            if record.get("steam_appid"):
+                popularity[record["steam_appid"]] = (
+                    record.get("total_reviews") or 0, record.get("release_date_timestamp"))
+        return popularity
+
+    def _load_fetched(self) -> Dict[int, float]:
+        checkpoint_path = self.metadata_folder / "checkpoint.sqlite"
+        if not checkpoint_path.exists():
+            return {}
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+        try:
+            return checkpoint.load_done()
+        finally:
+            checkpoint.close()
+
+    def importance(self, total_reviews: int, release_timestamp: Optional[int], now: float) -> float:
+        """
+        重要度 (0 ~ 1)：評論數取 log 比例，發售時間依半衰期遞減
+        兩者以「任一項高即重要」的方式合併，熱門的老遊戲與剛發售的新遊戲都會經常更新
+        """
+        popularity = min(1.0, math.log1p(max(total_reviews, 0)) /
+                         math.log1p(self.settings["reference_reviews"]))
+        recency = 0.0
+        if release_timestamp:
+            age_days = max(now - release_timestamp, 0) / DAY_SECONDS
+            recency = 0.5 ** (age_days / self.settings["recency_half_life_days"])
+
+        return 1 - (1 - popularity) * (1 - self.settings["recency_weight"] * recency)
+
+    def interval_days(self, importance: float) -> float:
+        """重新爬取間隔：在最長與最短間隔之間依重要度以等比方式內插"""
+        min_interval = self.settings["min_interval_days"]
+        max_interval = self.settings["max_interval_days"]
+        return max_interval * (min_interval / max_interval) ** importance
+
+    def remaining_budget(self) -> int:
+        """今日剩餘的請求數預算"""
+        state = self._load_state()
+        used = state.get("requests", 0) if state.get("date") == self._today() else 0
+        return max(self.settings["daily_request_budget"] - used, 0)
+
+    def record_usage(self, requests: int):
+        """記錄本次實際發出的請求數 (含重試)，跨日自動歸零"""
+        state = self._load_state()
+        if state.get("date") != self._today():
+            state = {"date": self._today(), "requests": 0}
+        state["requests"] += requests
+        write_json(self.state_path, state)
+
+    def _load_state(self) -> Dict:
+        if not self.state_path.exists():
+            return {}
+        return read_json(self.state_path)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def plan(self, budget: Optional[int] = None) -> List[Dict]:
+        """
+        產生本次要爬取的 AppID (依優先度由高至低，數量受請求數預算限制)
+        :param budget: 本次可用的請求數，預設為今日剩餘預算
+        """
+        if budget is None:
+            budget = self.remaining_budget()
+        max_apps = budget // self.requests_per_app
+        if max_apps <= 0:
+            logger.info(f"[{self.scraper_type}] 今日請求數預算已用完")
+            return []
+
+        now = time.time()
+        popularity = self._load_popularity()
+        fetched = self._load_fetched()
+
+        due_apps = []
+        candidate_count = 0
+        for app_id, last_modified in self._iter_candidates():
+            candidate_count += 1
+            total_reviews, release_timestamp = popularity.get(app_id, (0, None))
+            importance = self.importance(total_reviews, release_timestamp, now)
+            interval = self.interval_days(importance)
+
+            fetched_at = fetched.get(app_id)
+            if fetched_at is None:
+                staleness = NEVER_FETCHED_STALENESS
+            else:
+                staleness = (now - fetched_at) / DAY_SECONDS / interval
+                if (last_modified or 0) > fetched_at:
+                    # Steam 上的資料在上次爬取後有修改，立即到期
+                    staleness = max(staleness, 1.0)
+            if staleness < 1.0:
+                continue
+
+            due_apps.append({
+                "appid": app_id,
+                # 設為目前時間，確保檢查點中較舊的完成紀錄不會讓 AppID 被略過
+                "last_modified": int(now),
+                "priority": round(staleness * (1 + importance), 4),
+                "importance": round(importance, 4),
+                "interval_days": round(interval, 2),
+            })
+
+        due_apps.sort(key=lambda app: app["priority"], reverse=True)
+        logger.info(
+            f"[{self.scraper_type}] 候選 {candidate_count} 筆，到期 {len(due_apps)} 筆，"
+            f"本次預算 {budget} 次請求 (最多 {max_apps} 筆)")
+        return due_apps[:max_apps]
+
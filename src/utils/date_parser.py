@@ -0,0 +1,44 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Steam 商店頁的發售日期格式 (依出現頻率排序)：
+# "5 Oct, 2020" / "Oct 5, 2020" (依地區) / "October 5, 2020" / "Oct 2020" (只公布月份)
+RELEASE_DATE_FORMATS = (
+    '%d %b, %Y',
+    '%b %d, %Y',
+    '%d %B, %Y',
+    '%B %d, %Y',
+    '%b %Y',
+    '%B %Y',
+    '%Y-%m-%d',
+)
+
+# 空的發售日期欄位 (release_date, release_date_timestamp, release_date_year, release_date_month)
+EMPTY_RELEASE_DATE = (None, None, None, None)
+
+
+@lru_cache(maxsize=65536)
+def parse_release_date(date_str: str) -> Optional[datetime]:
+    """
+    依序嘗試 RELEASE_DATE_FORMATS 解析發售日期，只有月份時視為該月 1 日；
+    無法解析 (如 "Coming soon"、"Q1 2025") 時回傳 None。
+    同一日期字串在整個目錄中重複出現很多次，結果以 lru_cache 快取
+    """
+    date_str = " ".join(date_str.split())
+    for date_format in RELEASE_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=65536)
+def release_date_fields(date_str: Optional[str]) -> Tuple[Optional[str], Optional[int], Optional[int], Optional[int]]:
+    """回傳 (YYYY-MM-DD, timestamp, 年, 月)，無法解析時各欄位皆為 None"""
+    release_date_obj = parse_release_date(date_str) if date_str else None
+    if release_date_obj is None:
+        return EMPTY_RELEASE_DATE
+    return (release_date_obj.strftime('%Y-%m-%d'), int(release_date_obj.timestamp()),
+            release_date_obj.year, release_date_obj.month)
@@ -0,0 +1,107 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.record_io import append_jsonl
+
+
+class DeadLetterQueue:
+    """
+    爬取失敗 AppID 的 Dead-letter queue
+    以 SQLite 記錄各爬蟲類型失敗的 AppID、失敗原因與累積失敗次數，
+    成功寫入檔案後自動移除；由 SteamRetry.py 依退避策略重新爬取。
+    所有爬蟲共用同一個資料庫檔案，以 (scraper_type, appid) 區分。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: SQLite 檔案路徑
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 多個爬蟲程序可能同時寫入，等待鎖定而不是直接報錯；
+        # 非同步爬蟲在背景執行緒中寫入 (同一時間只有一個執行緒使用連線)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                scraper_type TEXT NOT NULL,
+                appid INTEGER NOT NULL,
+                reason TEXT,
+                attempts INTEGER NOT NULL DEFAULT 1,
+                first_failed_at REAL NOT NULL,
+                last_failed_at REAL NOT NULL,
+                PRIMARY KEY (scraper_type, appid)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def add(self, scraper_type: str, app_id: int, reason: str):
+        """記錄一次失敗；已存在時累加失敗次數並更新原因"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO dead_letters (scraper_type, appid, reason, attempts, first_failed_at, last_failed_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (scraper_type, appid) DO UPDATE SET
+                    reason = excluded.reason,
+                    attempts = attempts + 1,
+                    last_failed_at = excluded.last_failed_at
+                """,
+                (scraper_type, int(app_id), reason, now, now)
+            )
+
+    def remove(self, scraper_type: str, app_ids: Iterable[int]):
+        """移除已成功寫入的 AppID"""
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM dead_letters WHERE scraper_type = ? AND appid = ?",
+                [(scraper_type, int(app_id)) for app_id in app_ids]
+            )
+
+    def due(self, scraper_type: str, max_attempts: int, backoff_base: float,
+            backoff_max: float, limit: Optional[int] = None) -> List[Dict]:
+        """
+        取得已到重試時間的項目
+        第 n 次失敗後需等待 backoff_base * 2^(n-1) 秒 (最多 backoff_max 秒)；失敗次數達 max_attempts 者不再重試
+        """
+        rows = self.conn.execute(
+            "SELECT appid, reason, attempts, last_failed_at FROM dead_letters "
+            "WHERE scraper_type = ? AND attempts < ? ORDER BY last_failed_at",
+            (scraper_type, max_attempts)
+        )
+        now = time.time()
+        due_items = []
+        for app_id, reason, attempts, last_failed_at in rows:
+            backoff = min(backoff_base * 2 ** (attempts - 1), backoff_max)
+            if now - last_failed_at < backoff:
+                continue
+            due_items.append({"appid": app_id, "reason": reason, "attempts": attempts})
+            if limit is not None and len(due_items) >= limit:
+                break
+        return due_items
+
+    def count(self, scraper_type: str, min_attempts: int = 1) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM dead_letters WHERE scraper_type = ? AND attempts >= ?",
+            (scraper_type, min_attempts)
+        ).fetchone()
+        return row[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def write_retry_work_list(path: Path, items: Iterable[Dict]) -> int:
+    """
+    將待重試的項目寫成 work list (與增量爬取相同格式)，供一般爬蟲以 work_list 參數讀取
+    last_modified 設為目前時間，確保檢查點中較舊的完成紀錄不會讓 AppID 被略過
+    """
+    now = int(time.time())
+    records = [{"appid": item["appid"], "last_modified": now} for item in items]
+    append_jsonl(path, records)
+    return len(records)
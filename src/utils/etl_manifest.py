@@ -0,0 +1,200 @@
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    # 未安裝 zstandard 時以未壓縮的 JSON 保存輸出
+    zstandard = None
+
+from src.utils.fast_json import read_json, write_json
+from src.utils.raw_store import QUERY_BATCH_SIZE, decode_payload, encode_payload
+
+# ETL 階段名稱
+JSON_STAGE = "json"
+DOCUMENT_STAGE = "document"
+REVIEW_STAGE = "review"
+
+
+def content_hash(obj) -> str:
+    """
+    以排序後的 JSON 計算內容雜湊 (dict 的 key 順序不影響結果)
+    固定以標準函式庫 json 序列化，雜湊與是否安裝 msgspec 無關 (浮點數的指數格式兩者不同)
+    """
+    data = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EtlManifest:
+    """
+    增量 ETL 的 manifest
+    以 SQLite 記錄每個 ETL 階段 (json / document / review) 中每個 AppID 的輸入雜湊、輸出所在的檔案編號與輸出內容，
+    輸入雜湊未變動的資料直接沿用上次的輸出，不需重新轉換；檔案內所有資料都未變動時整檔略過不重寫。
+    每次執行都會更新 seen_at，執行結束後仍未出現的 AppID (已自輸入中移除) 以 prune 刪除。
+    """
+
+    def __init__(self, db_path: Path, read_only: bool = False):
+        """
+        :param db_path: SQLite 檔案路徑
+        :param read_only: 只讀模式 (檔案不存在時視為空的 manifest)
+        """
+        self.db_path = db_path
+        self.conn: Optional[sqlite3.Connection] = None
+        if read_only:
+            if db_path.exists():
+                self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 多個 ETL worker 程序可能同時寫入，等待鎖定而不是直接報錯
+            self.conn = sqlite3.connect(db_path, timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS etl_manifest (
+                    stage TEXT NOT NULL,
+                    appid INTEGER NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    output_file INTEGER NOT NULL,
+                    encoding TEXT,
+                    output BLOB,
+                    updated_at REAL NOT NULL,
+                    seen_at REAL NOT NULL,
+                    PRIMARY KEY (stage, appid)
+                );
+                CREATE INDEX IF NOT EXISTS idx_etl_manifest_file ON etl_manifest (stage, output_file);
+                """
+            )
+            self.conn.commit()
+
+        self._compressor = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def get_many(self, stage: str, app_ids: Iterable[int]) -> Dict[int, Tuple[str, int, Optional[Dict]]]:
+        """回傳 {appid: (input_hash, output_file, output)}，output 為 None 代表上次轉換後沒有輸出"""
+        results = {}
+        if self.conn is None:
+            return results
+        app_ids = [int(app_id) for app_id in app_ids]
+        for start in range(0, len(app_ids), QUERY_BATCH_SIZE):
+            batch = app_ids[start:start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT appid, input_hash, output_file, encoding, output FROM etl_manifest "
+                f"WHERE stage = ? AND appid IN ({placeholders})",
+                (stage, *batch)
+            )
+            for app_id, input_hash, output_file, encoding, output in rows:
+                decoded = decode_payload(encoding, output, self._decompressor) if output is not None else None
+                results[app_id] = (input_hash, output_file, decoded)
+        return results
+
+    def file_appids(self, stage: str, output_file: int) -> Set[int]:
+        """上次輸出至指定檔案、且有輸出內容的 AppID"""
+        if self.conn is None:
+            return set()
+        rows = self.conn.execute(
+            "SELECT appid FROM etl_manifest WHERE stage = ? AND output_file = ? AND output IS NOT NULL",
+            (stage, output_file)
+        )
+        return {row[0] for row in rows}
+
+    def update_file(self, stage: str, output_file: int, entries: List[Tuple[int, Optional[str], Optional[Dict], bool]],
+                    seen_at: float):
+        """
+        記錄單一輸出檔的結果
+        :param entries: [(appid, input_hash, output, changed)]；input_hash 為 None (轉換失敗) 時刪除紀錄，下次重新轉換；
+                        changed 為 False 的項目只更新 seen_at 與檔案編號
+        """
+        now = time.time()
+        changed_rows, unchanged_rows, failed_ids = [], [], []
+        for app_id, input_hash, output, changed in entries:
+            if input_hash is None:
+                failed_ids.append((stage, app_id))
+            elif changed:
+                encoding, data = encode_payload(output, self._compressor) if output is not None else (None, None)
+                changed_rows.append((stage, app_id, input_hash, output_file, encoding, data, now, seen_at))
+            else:
+                unchanged_rows.append((output_file, seen_at, stage, app_id))
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO etl_manifest (stage, appid, input_hash, output_file, encoding, output, updated_at, seen_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (stage, appid) DO UPDATE SET
+                    input_hash = excluded.input_hash,
+                    output_file = excluded.output_file,
+                    encoding = excluded.encoding,
+                    output = excluded.output,
+                    updated_at = excluded.updated_at,
+                    seen_at = excluded.seen_at
+                """,
+                changed_rows
+            )
+            self.conn.executemany(
+                "UPDATE etl_manifest SET output_file = ?, seen_at = ? WHERE stage = ? AND appid = ?",
+                unchanged_rows
+            )
+            self.conn.executemany("DELETE FROM etl_manifest WHERE stage = ? AND appid = ?", failed_ids)
+
+    def prune(self, stage: str, seen_before: float) -> Set[int]:
+        """刪除本次執行 (seen_at 早於 seen_before) 未出現的 AppID，回傳有輸出內容者 (需自下游移除)"""
+        with self.conn:
+            removed = {row[0] for row in self.conn.execute(
+                "SELECT appid FROM etl_manifest WHERE stage = ? AND seen_at < ? AND output IS NOT NULL",
+                (stage, seen_before))}
+            self.conn.execute("DELETE FROM etl_manifest WHERE stage = ? AND seen_at < ?", (stage, seen_before))
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        if self.conn is None:
+            return {}
+        return dict(self.conn.execute("SELECT stage, COUNT(*) FROM etl_manifest GROUP BY stage").fetchall())
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+
+def load_changes(path: Path) -> Optional[Dict]:
+    """
+    讀取待向量化的變動清單 {"changed": [...], "removed": [...]}，不存在時回傳 None
+    只有價格變動的 AppID 另列於 "repriced": {appid: 價格} (沒有時不含此欄位)
+    """
+    if not path.exists():
+        return None
+    changes = read_json(path)
+    if "repriced" in changes:
+        # JSON 物件的 key 為字串
+        changes["repriced"] = {int(app_id): patch for app_id, patch in changes["repriced"].items()}
+    return changes
+
+
+def emit_changes(path: Path, changed: Iterable[int], removed: Iterable[int],
+                 repriced: Optional[Dict[int, Dict]] = None) -> Dict:
+    """
+    將本次變動合併至待向量化的變動清單 (向量化完成後才刪除)，
+    前一次的變動尚未向量化時一併保留；之後又被移除的 AppID 只列在 removed，反之亦然
+    :param repriced: 只有價格變動的 {appid: 價格} (只需更新 metadata)；同時列在 changed / removed 者不保留
+    """
+    changes = load_changes(path) or {"changed": [], "removed": []}
+    changed, removed = set(changed), set(removed)
+    changes["changed"] = sorted((set(changes["changed"]) - removed) | changed)
+    changes["removed"] = sorted((set(changes["removed"]) - changed) | removed)
+    repriced = {**changes.pop("repriced", {}), **(repriced or {})}
+    rewritten = set(changes["changed"]) | set(changes["removed"])
+    repriced = {app_id: patch for app_id, patch in repriced.items() if app_id not in rewritten}
+    if repriced:
+        changes["repriced"] = dict(sorted(repriced.items()))
+    changes["generated_at"] = datetime.now().isoformat(timespec="seconds")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".part")
+    write_json(tmp_path, changes)
+    tmp_path.replace(path)
+    return changes
@@ -0,0 +1,96 @@
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    # 未安裝 msgspec 時改用標準函式庫 json (輸出格式相同，只是較慢，且無法依型別略過不需要的欄位)
+    msgspec = None
+
+# 爬蟲與 ETL 共用的 JSON 編碼 / 解碼：
+# 輸出一律為 UTF-8 (不轉義非 ASCII 字元)，精簡格式用於 JSONL 與資料庫，縮排格式 (indent=2) 用於整檔 JSON。
+# 解碼時可指定 src.utils.steam_schema 的型別，只建立型別中定義的欄位，其餘欄位在解析時直接略過。
+
+# 解析失敗時拋出的例外 (json.JSONDecodeError 與 msgspec.DecodeError 皆為 ValueError 的子類別)
+DecodeError = ValueError
+
+_encoder = msgspec.json.Encoder() if msgspec is not None else None
+_decoder = msgspec.json.Decoder() if msgspec is not None else None
+
+
+def msgspec_available() -> bool:
+    return msgspec is not None
+
+
+def _finite(obj: Any) -> Any:
+    """將 NaN / Infinity 轉為 None (json 模組會輸出不合法的 NaN，與 msgspec 的 null 不同)"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(item) for item in obj]
+    return obj
+
+
+def encode(obj: Any) -> bytes:
+    """編碼為精簡格式的 JSON (UTF-8 bytes)；NaN / Infinity 會輸出為 null"""
+    if _encoder is not None:
+        return _encoder.encode(obj)
+    return json.dumps(_finite(obj), ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def encode_line(obj: Any) -> bytes:
+    """編碼為 JSONL 的一行 (含換行)"""
+    return encode(obj) + b"\n"
+
+
+def encode_pretty(obj: Any, indent: int = 2) -> bytes:
+    """編碼為縮排格式的 JSON (與 json.dumps(indent=2, ensure_ascii=False) 相同的排版)；NaN / Infinity 會輸出為 null"""
+    if _encoder is not None:
+        return msgspec.json.format(_encoder.encode(obj), indent=indent)
+    return json.dumps(_finite(obj), ensure_ascii=False, indent=indent, allow_nan=False).encode("utf-8")
+
+
+def decode(data: Union[bytes, str]) -> Any:
+    """解碼為 dict / list 等內建型別"""
+    if _decoder is not None:
+        return _decoder.decode(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def typed_decoder(schema) -> Callable[[Union[bytes, str]], Any]:
+    """
+    依 schema (msgspec 的型別) 建立解碼函式，回傳只含 schema 欄位的內建型別 (dict / list)：
+    未定義的欄位在解析時略過、不會建立物件；原始資料缺少的欄位不會出現在結果中，null 則保留為 None。
+    資料不符合 schema 時 (例如 Steam 偶爾回傳型別不同的欄位) 改為完整解碼，與未指定型別時的結果相同；
+    未安裝 msgspec 時一律完整解碼
+    """
+    if msgspec is None:
+        return decode
+    decoder = msgspec.json.Decoder(schema)
+
+    def decode_typed(data: Union[bytes, str]) -> Any:
+        try:
+            return msgspec.to_builtins(decoder.decode(data))
+        except msgspec.ValidationError:
+            return decode(data)
+
+    return decode_typed
+
+
+def write_json(path: Path, obj: Any, pretty: bool = True):
+    """寫出整個 JSON 檔案 (預設為縮排格式)"""
+    with open(path, "wb") as f:
+        f.write(encode_pretty(obj) if pretty else encode(obj))
+
+
+def read_json(path: Path, schema: Optional[Any] = None) -> Any:
+    """讀取整個 JSON 檔案，指定 schema 時只建立其中定義的欄位"""
+    with open(path, "rb") as f:
+        data = f.read()
+    return typed_decoder(schema)(data) if schema is not None else decode(data)
@@ -0,0 +1,258 @@
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List, Optional
+
+"""
+HTML 轉純文字 (取代 BeautifulSoup(raw, "html.parser").get_text(separator=" "))
+
+沿用相同的 html.parser tokenizer，但只在事件中收集文字、不建立 DOM tree，
+輸出與原本 BeautifulSoup 的結果一致：
+- 每個 tag / 註解 / 宣告都是一個文字片段的邊界，片段之間以一個空白連接
+- 略過註解、DOCTYPE、宣告、processing instruction，以及 script / style / template / rt / rp 內的文字
+- 保留 CDATA 內容；實體與數字字元參照的解析規則同 BeautifulSoup
+- 沒有 "<" 與 "&" 的字串不需要解析，直接 strip 後回傳
+- 只含格式單純的標籤與實體 (Steam 商店頁描述幾乎都是如此) 時以單一 regex 切分，
+  其餘 (註解、script、不完整的標籤、裸露的 "<" 等) 才交由 html.parser 逐一處理
+"""
+
+# 不需要結束標籤的元素 (同 BeautifulSoup HTMLTreeBuilder.empty_element_tags)
+EMPTY_ELEMENT_TAGS = frozenset([
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image',
+    'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source',
+    'spacer', 'track', 'wbr'])
+
+# 內容不屬於一般文字的元素 (BeautifulSoup 以 Script / Stylesheet 等類別存放，get_text 不會輸出)
+NON_TEXT_CONTAINER_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# 實體名稱 (不含分號) 對應的字元
+HTML_ENTITY_TO_CHARACTER = {name.rstrip(";"): character for name, character in html5.items()}
+
+# 內容需由 html.parser 特別處理的元素 (文字容器，以及不同 Python 版本視為 raw text 的元素)，出現時不走 regex 快速路徑
+FULL_PARSER_TAGS = NON_TEXT_CONTAINER_TAGS | frozenset(
+    ['textarea', 'title', 'xmp', 'iframe', 'noembed', 'noframes', 'noscript', 'plaintext'])
+
+REPLACEMENT_CHARACTER = "\ufffd"
+_DECIMAL_REFERENCE_WITH_FOLLOWING_DATA = re.compile("^([0-9]+)(.*)")
+_HEX_REFERENCE_WITH_FOLLOWING_DATA = re.compile("^([0-9a-f]+)(.*)")
+_NEEDS_PARSING = re.compile("[<&]")
+# 格式單純的結束標籤 / 開始標籤 (屬性值不含 < > 與引號)，html.parser 對這些標籤的解析結果固定
+_SIMPLE_TAG = re.compile(
+    r"""<(?:/([a-zA-Z][a-zA-Z0-9]*)\s*"""
+    r"""|([a-zA-Z][a-zA-Z0-9]*)(?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*"""
+    r"""(?:\s*=\s*(?:"[^"<>]*"|'[^'<>]*'|[^\s"'<>=`]+))?)*\s*(/?))>""")
+# 以分號結尾的實體 / 數字字元參照，或後面不是英文字母與 # 的 "&" (html.parser 視為一般文字)
+_SIMPLE_REFERENCE = re.compile(r"&(?:#([xX][0-9a-fA-F]+|[0-9]+);|([a-zA-Z][-.a-zA-Z0-9]*);|(?=[^a-zA-Z#]))")
+
+
+def numeric_character(code_point: int) -> str:
+    """數字字元參照對應的字元 (依 HTML 規範：無效值換成 U+FFFD，0x80-0x9F 視為 Windows-1252)"""
+    if code_point == 0 or code_point > 0x10ffff or 0xd800 <= code_point <= 0xdfff:
+        return REPLACEMENT_CHARACTER
+    if 0x80 <= code_point <= 0x9f:
+        try:
+            return bytes([code_point]).decode("cp1252")
+        except UnicodeDecodeError:
+            pass
+    return chr(code_point)
+
+
+class _TextExtractor(HTMLParser):
+    """只收集文字片段的 HTMLParser (不建立 tree)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.strings: List[str] = []
+        self._data: List[str] = []
+        self._open_tags: List[str] = []
+        self._container_depth = 0
+        self._already_closed_empty_element: List[str] = []
+
+    def _flush(self, is_text: Optional[bool] = None):
+        """結束目前的文字片段；is_text 未指定時依是否位於 script / style 等元素內判斷"""
+        if not self._data:
+            return
+        if is_text is None:
+            is_text = self._container_depth == 0
+        if is_text:
+            self.strings.append("".join(self._data))
+        self._data = []
+
+    def _push(self, tag: str):
+        self._open_tags.append(tag)
+        if tag in NON_TEXT_CONTAINER_TAGS:
+            self._container_depth += 1
+
+    def _pop_to(self, tag: str):
+        if tag not in self._open_tags:
+            return
+        while self._open_tags:
+            popped = self._open_tags.pop()
+            if popped in NON_TEXT_CONTAINER_TAGS:
+                self._container_depth -= 1
+            if popped == tag:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        self._push(tag)
+        if tag in EMPTY_ELEMENT_TAGS:
+            # 空元素立即結束，之後多餘的結束標籤 (<br></br>) 直接忽略
+            self._flush()
+            self._pop_to(tag)
+            self._already_closed_empty_element.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+        self._push(tag)
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._already_closed_empty_element:
+            self._already_closed_empty_element.remove(tag)
+            return
+        self._flush()
+        self._pop_to(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_entityref(self, name):
+        character = HTML_ENTITY_TO_CHARACTER.get(name)
+        self._data.append(character if character is not None else "&" + name)
+
+    def handle_charref(self, name):
+        base, pattern = 10, _DECIMAL_REFERENCE_WITH_FOLLOWING_DATA
+        if name.startswith(("x", "X")):
+            name = name[1:]
+            base, pattern = 16, _HEX_REFERENCE_WITH_FOLLOWING_DATA
+
+        extra_data = ""
+        try:
+            code_point = int(name, base)
+        except ValueError:
+            # 缺少分號的參照 (例如 "&#65abc")：取前面的數字，其餘視為一般文字
+            match = pattern.search(name)
+            if match is None:
+                self._data.append(name)
+                return
+            code_point, extra_data = int(match.group(1), base), match.group(2)
+        self._data.append(numeric_character(code_point))
+        if extra_data:
+            self._data.append(extra_data)
+
+    def _handle_non_text(self, data):
+        self._flush()
+        self._data.append(data)
+        self._flush(is_text=False)
+
+    def handle_comment(self, data):
+        self._handle_non_text(data)
+
+    def handle_decl(self, decl):
+        self._handle_non_text(decl)
+
+    def handle_pi(self, data):
+        self._handle_non_text(data)
+
+    def unknown_decl(self, data):
+        if data.upper().startswith("CDATA["):
+            # CDATA 內容視為文字 (即使位於 script 內)
+            self._flush()
+            self._data.append(data[len("CDATA["):])
+            self._flush(is_text=True)
+        else:
+            self._handle_non_text(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _replace_reference(match: re.Match) -> str:
+    number, name = match.group(1), match.group(2)
+    if number is not None:
+        if number[0] in "xX":
+            return numeric_character(int(number[1:], 16))
+        return numeric_character(int(number))
+    if name is not None:
+        character = HTML_ENTITY_TO_CHARACTER.get(name)
+        return character if character is not None else "&" + name
+    return "&"
+
+
+def _decode_simple_references(text: str) -> Optional[str]:
+    """解析文字中的參照；有 html.parser 需特別處理的寫法 (缺少分號等) 時回傳 None"""
+    decoded, count = _SIMPLE_REFERENCE.subn(_replace_reference, text)
+    return decoded if count == text.count("&") else None
+
+
+def _simple_html_strings(raw_str: str) -> Optional[List[str]]:
+    """
+    regex 快速路徑：字串只含格式單純的標籤時直接切出文字片段 (片段邊界規則同 _TextExtractor)
+    遇到任何需要 html.parser 處理的內容時回傳 None
+    """
+    strings: List[str] = []
+    data: List[str] = []
+    already_closed_empty_element: List[str] = []
+    pos = 0
+    for match in _SIMPLE_TAG.finditer(raw_str):
+        if match.start() > pos:
+            text = raw_str[pos:match.start()]
+            if "<" in text:
+                return None
+            if "&" in text and (text := _decode_simple_references(text)) is None:
+                return None
+            data.append(text)
+        pos = match.end()
+
+        end_tag, start_tag, self_closing = match.group(1), match.group(2), match.group(3)
+        tag = (end_tag or start_tag).lower()
+        if tag in FULL_PARSER_TAGS:
+            return None
+        if end_tag:
+            if tag in already_closed_empty_element:
+                already_closed_empty_element.remove(tag)
+                continue
+        elif tag in EMPTY_ELEMENT_TAGS and not self_closing:
+            already_closed_empty_element.append(tag)
+        if data:
+            strings.append("".join(data))
+            data = []
+
+    text = raw_str[pos:]
+    if text:
+        if "<" in text:
+            return None
+        if "&" in text and (text := _decode_simple_references(text)) is None:
+            return None
+        data.append(text)
+    if data:
+        strings.append("".join(data))
+    return strings
+
+
+def html_to_text(raw_str: Optional[str]) -> str:
+    """
+    取出 HTML 字串中的文字，片段之間以空白連接並去除頭尾空白
+    (壓縮空白後等同 BeautifulSoup(raw_str, "html.parser").get_text(separator=" ").strip())
+    """
+    if not raw_str:
+        return ""
+    if _NEEDS_PARSING.search(raw_str) is None:
+        return raw_str.strip()
+
+    strings = _simple_html_strings(raw_str)
+    if strings is None:
+        parser = _TextExtractor()
+        parser.feed(raw_str)
+        parser.close()
+        strings = parser.strings
+    return " ".join(strings).strip()
+
+
+def clean_text(raw_str: Optional[str]) -> str:
+    """HTML 轉文字後壓縮空白、移除 "*" 並修正 " , " (ETL 各文字欄位共用的清理流程)"""
+    text = " ".join(html_to_text(raw_str).split())
+    return text.replace("*", "").replace(" , ", ", ").strip()
@@ -0,0 +1,156 @@
+import logging
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from src.config.constant import REQUEST_HEADERS, SCRAPER_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# appdetails 限流時回傳 200 與 null 內容，不是有效的回應，不寫入也不使用快取
+NULL_BODY = b"null"
+
+# 所有同步爬蟲共用的 Session (保留連線，避免每次請求重新進行 TLS 交握)
+_shared_session: Optional[requests.Session] = None
+
+
+def get_session(pool_size: int = SCRAPER_CONCURRENCY) -> requests.Session:
+    """取得共用的 requests.Session (連線池)，第一次呼叫時建立"""
+    global _shared_session
+    if _shared_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(REQUEST_HEADERS)
+        _shared_session = session
+    return _shared_session
+
+
+def create_async_client(concurrency: int = SCRAPER_CONCURRENCY) -> "httpx.AsyncClient":
+    """建立非同步爬蟲使用的 httpx.AsyncClient (連線池大小與同時請求數一致)"""
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(headers=REQUEST_HEADERS, timeout=10, limits=limits,
+                             follow_redirects=True)
+
+
+def _is_null_body(content: bytes) -> bool:
+    return content.strip() == NULL_BODY
+
+
+class ResponseCache:
+    """
+    以 URL 為 key 的硬碟回應快取 (SQLite)
+    儲存回應內容與 ETag / Last-Modified，下次請求時送出條件式請求 (If-None-Match / If-Modified-Since)；
+    伺服器回傳 304 時直接使用快取內容。max_age 內的快取則完全不發出請求。
+    null 內容 (限流) 不會寫入快取；舊版寫入的 null 內容在讀取時刪除並視為沒有快取。
+    """
+
+    def __init__(self, db_path: Path, max_age: float = 0):
+        """
+        :param db_path: SQLite 檔案路徑
+        :param max_age: 快取視為新鮮的秒數，期間內直接使用快取 (預設 0，代表每次都重新驗證)
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+        # 統計數據 (寫入爬蟲 metadata)
+        self.hits = 0          # max_age 內直接使用快取
+        self.revalidated = 0   # 伺服器回傳 304，使用快取
+        self.misses = 0        # 無快取或快取已失效，下載完整內容
+
+    def _get_row(self, url: str):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body, stored_at FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        if row is not None and _is_null_body(zlib.decompress(row[2])):
+            with self.conn:
+                self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            return None
+        return row
+
+    def get_fresh(self, url: str) -> Optional[bytes]:
+        """回傳 max_age 內的快取內容，無則回傳 None"""
+        if self.max_age <= 0:
+            return None
+        row = self._get_row(url)
+        if row is None or time.time() - row[3] > self.max_age:
+            return None
+        self.hits += 1
+        return zlib.decompress(row[2])
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """產生條件式請求標頭"""
+        row = self._get_row(url)
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def resolve(self, url: str, status_code: int, headers: Mapping[str, str], content: bytes) -> Optional[bytes]:
+        """
+        依回應狀態取得實際內容：304 時讀取快取；200 時更新快取
+        :return: 實際內容；304 但沒有快取時 (快取已被刪除或替換) 回傳 None，呼叫端需不帶條件式標頭重新請求
+        """
+        if status_code == 304:
+            row = self._get_row(url)
+            if row is None:
+                logger.warning(f"收到 304 但沒有快取內容，重新請求: {url}")
+                self.misses += 1
+                return None
+            self.revalidated += 1
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE responses SET stored_at = ? WHERE url = ?", (time.time(), url))
+            return zlib.decompress(row[2])
+
+        self.misses += 1
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        # 沒有驗證資訊且不使用 max_age 的回應，存了也無法重複利用
+        if status_code == 200 and not _is_null_body(content) and (etag or last_modified or self.max_age > 0):
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, zlib.compress(content), time.time())
+                )
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        return {"cache_hits": self.hits, "cache_revalidated": self.revalidated,
+                "cache_misses": self.misses}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,144 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # 未安裝 pyarrow 時只輸出 JSON，讀取端自動改用 json_data
+    pa = None
+    pq = None
+
+from src.config.constant import PROCESSED_DATA_PATH
+from src.utils.fast_json import encode, read_json
+from src.utils.steam_schema import DataFile, GameRecord
+
+# 與 json_data_N.json 同編號的 Parquet 檔案 (data/processed/game_table/game_table_N.parquet)
+TABLE_FOLDER = "game_table"
+
+# 欄位型別 ("string" / "int" / "float" / "bool" / "list")：METADATA_COLS、描述欄位與攤平後的硬體需求
+GAME_TABLE_COLUMNS = {
+    "steam_appid": "int",
+    "type": "string",
+    "name": "string",
+    "required_age": "int",
+    "is_free": "bool",
+    "supported_languages": "string",
+    "developers": "list",
+    "publishers": "list",
+    "price_initial": "float",
+    "price_currency": "string",
+    "platforms": "string",
+    "categories": "list",
+    "genres": "list",
+    "release_date": "string",
+    "release_date_timestamp": "int",
+    "release_date_year": "int",
+    "release_date_month": "int",
+    "review_score_desc": "string",
+    "total_positive": "int",
+    "total_negative": "int",
+    "total_reviews": "int",
+    "positive_rate": "float",
+    "rate_percentage": "string",
+    "languages": "list",
+    "tags": "list",
+    "metacritic_score": "int",
+    "detailed_description": "string",
+    "about_the_game": "string",
+    "short_description": "string",
+    "pc_requirements_minimum": "string",
+    "pc_requirements_recommended": "string",
+    "mac_requirements_minimum": "string",
+    "mac_requirements_recommended": "string",
+    "linux_requirements_minimum": "string",
+    "linux_requirements_recommended": "string",
+}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def _arrow_type(kind: str):
+    return {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "list": pa.list_(pa.string()),
+    }[kind]
+
+
+def game_table_schema():
+    return pa.schema([(col, _arrow_type(kind)) for col, kind in GAME_TABLE_COLUMNS.items()])
+
+
+def _coerce(kind: str, value):
+    """將 json_data 的值轉為欄位型別 (Steam 的 required_age 等欄位可能是字串)，無法轉換時為 None"""
+    if value is None:
+        return None
+    try:
+        if kind == "string":
+            return value if isinstance(value, str) else encode(value).decode("utf-8")
+        if kind == "int":
+            return int(value)
+        if kind == "float":
+            return float(value)
+        if kind == "bool":
+            return bool(value)
+        if kind == "list":
+            return [str(item) for item in value] if isinstance(value, list) else None
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def records_to_table(records: Iterable[Dict]):
+    """將 ETL_json 的輸出 (json_data 的 data) 轉為固定 schema 的 Arrow Table"""
+    records = list(records)
+    columns = {col: [_coerce(kind, record.get(col)) for record in records]
+               for col, kind in GAME_TABLE_COLUMNS.items()}
+    return pa.Table.from_pydict(columns, schema=game_table_schema())
+
+
+def table_path(root: Path, file_num: int) -> Path:
+    return root / PROCESSED_DATA_PATH.format(TABLE_FOLDER) / f"{TABLE_FOLDER}_{file_num}.parquet"
+
+
+def write_game_table(path: Path, records: Iterable[Dict], compression: Optional[str] = "zstd"):
+    """
+    寫出單一 Parquet 檔案 (先寫入暫存檔再取代，讀取端不會讀到寫到一半的檔案；
+    暫存檔以 "." 開頭，讀取整個資料夾時會被忽略)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.part")
+    pq.write_table(records_to_table(records), tmp_path, compression=compression)
+    tmp_path.replace(path)
+
+
+def read_game_table(root: Path, columns: Optional[List[str]] = None, filters=None):
+    """
+    以 memory map 讀取所有 game_table 檔案，只載入指定的欄位
+    :param filters: pyarrow 的篩選條件，例如 [("release_date_year", ">=", 2020), ("is_free", "=", False)]
+    """
+    folder = root / PROCESSED_DATA_PATH.format(TABLE_FOLDER)
+    return pq.read_table(folder, columns=columns, filters=filters, memory_map=True)
+
+
+def iter_processed_columns(root: Path, columns: List[str]) -> Iterator[Dict]:
+    """
+    依檔案編號逐筆讀取 processed 資料的指定欄位：有同編號且不比 JSON 舊的 Parquet 檔案時只讀取這些欄位，
+    否則 (未安裝 pyarrow 或舊資料) 讀取 json_data_N.json (只建立 GameRecord 定義的欄位)
+    """
+    json_folder = root / PROCESSED_DATA_PATH.format("json_data")
+    file_num = 1
+    while (json_path := json_folder / f"json_data_{file_num}.json").exists():
+        parquet_path = table_path(root, file_num)
+        if (parquet_available() and parquet_path.exists()
+                and parquet_path.stat().st_mtime >= json_path.stat().st_mtime):
+            yield from pq.read_table(parquet_path, columns=columns, memory_map=True).to_pylist()
+        else:
+            for record in read_json(json_path, DataFile[GameRecord]).get("data", []):
+                yield {col: record.get(col) for col in columns}
+        file_num += 1
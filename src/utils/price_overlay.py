@@ -0,0 +1,124 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from src.config.constant import PRICE_SOURCE_TYPES, RAW_METADATA_PATH
+from src.utils.checkpoint import CrawlCheckpoint
+
+
+def apply_price_to_record(record: Dict, price_patch: Dict) -> bool:
+    """將價格套用到 json_data 的單筆資料 (保持與 ETL_json 相同的欄位形狀)，回傳是否有變動"""
+    before = (record.get("price_initial"), record.get("price_currency"),
+              "price_overview" in record)
+
+    if price_patch["price_initial"] is None:
+        record.pop("price_initial", None)
+        record.pop("price_currency", None)
+        record["price_overview"] = None
+    else:
+        record.update(price_patch)
+        record.pop("price_overview", None)
+
+    after = (record.get("price_initial"), record.get("price_currency"),
+             "price_overview" in record)
+    return before != after
+
+
+def apply_price_to_metadata(metadata: Dict, price_patch: Dict) -> bool:
+    """將價格套用到 document 的 metadata (欄位固定存在，無價格時為 None)，回傳是否有變動"""
+    changed = any(metadata.get(k) != v for k, v in price_patch.items())
+    metadata.update(price_patch)
+    return changed
+
+
+class PriceOverlay:
+    """
+    價格批次更新結果的覆蓋層
+    SteamPriceRefresher 只下載價格，不寫入 raw 資料；以 SQLite 記錄每個 AppID 最新的價格與取得時間，
+    ETL_json 輸出時套用於 raw 資料轉換結果之上，重新執行 ETL 時價格不會被 raw 資料的舊價格覆蓋。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: SQLite 檔案路徑
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS price_overlay (
+                appid INTEGER PRIMARY KEY,
+                price_initial REAL,
+                price_currency TEXT,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def put_many(self, price_patches: Dict[int, Dict], fetched_at: Optional[float] = None):
+        """記錄一批價格 {appid: {"price_initial": ..., "price_currency": ...}}"""
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO price_overlay (appid, price_initial, price_currency, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(int(app_id), patch["price_initial"], patch["price_currency"], fetched_at)
+                 for app_id, patch in price_patches.items()]
+            )
+
+    def load(self) -> Dict[int, Tuple[Dict, float]]:
+        """讀取所有價格，回傳 {appid: (價格, 取得時間)}"""
+        rows = self.conn.execute("SELECT appid, price_initial, price_currency, fetched_at FROM price_overlay")
+        return {app_id: ({"price_initial": price_initial, "price_currency": price_currency}, fetched_at)
+                for app_id, price_initial, price_currency, fetched_at in rows}
+
+    def remove(self, app_ids: Iterable[int]):
+        with self.conn:
+            self.conn.executemany("DELETE FROM price_overlay WHERE appid = ?",
+                                  [(int(app_id),) for app_id in app_ids])
+
+    def close(self):
+        self.conn.close()
+
+
+def _load_source_fetched(root: Path) -> Dict[int, float]:
+    """各價格來源爬蟲 (PRICE_SOURCE_TYPES) 的檢查點中，每個 AppID 最近一次寫入 raw 資料的時間"""
+    fetched: Dict[int, float] = {}
+    for source_type in PRICE_SOURCE_TYPES:
+        checkpoint_path = root / RAW_METADATA_PATH.format(source_type) / "checkpoint.sqlite"
+        if not checkpoint_path.exists():
+            continue
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+        try:
+            for app_id, fetched_at in checkpoint.load_done().items():
+                fetched[app_id] = max(fetched_at, fetched.get(app_id, 0.0))
+        finally:
+            checkpoint.close()
+    return fetched
+
+
+def load_price_overlay(db_path: Path, root: Path) -> Tuple[Dict[int, Dict], Set[int]]:
+    """
+    讀取仍然有效的價格覆蓋層；價格取得之後 raw 資料又重新爬取的 AppID 以 raw 資料為準
+    :param db_path: 覆蓋層的 SQLite 檔案路徑
+    :param root: 專案根目錄 (讀取各爬蟲的檢查點)
+    :return: ({appid: 價格}, 已失效的 AppID)；失效的 AppID 輸出檔中仍是覆蓋層的價格，
+             需重新寫出，全部寫出後再以 PriceOverlay.remove 刪除
+    """
+    if not db_path.exists():
+        return {}, set()
+    overlay = PriceOverlay(db_path)
+    try:
+        entries = overlay.load()
+        if not entries:
+            return {}, set()
+        source_fetched = _load_source_fetched(root)
+        superseded = {app_id for app_id, (_, fetched_at) in entries.items()
+                      if source_fetched.get(app_id, 0.0) > fetched_at}
+    finally:
+        overlay.close()
+    return {app_id: patch for app_id, (patch, _) in entries.items() if app_id not in superseded}, superseded
@@ -0,0 +1,209 @@
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.config.constant import (GAME_PRICE_URL, PARQUET_COMPRESSION, PARQUET_OUTPUT_ENABLED,
+                                 PG_COLLECTION, PRICE_BATCH_SIZE, PRICE_OVERLAY_PATH, PROCESSED_DATA_PATH)
+from src.utils.fast_json import read_json, write_json
+from src.utils.parquet_store import parquet_available, table_path, write_game_table
+from src.utils.price_overlay import PriceOverlay, apply_price_to_metadata, apply_price_to_record
+from src.utils.record_io import iter_data_file
+from src.utils.scraper_base import SteamScraperBase
+from src.utils.steam_schema import DataFile, ProcessedAppId
+
+logger = logging.getLogger(__name__)
+
+
+def parse_price_overview(app_result: Dict) -> Optional[Dict]:
+    """
+    將 appdetails (filters=price_overview) 的單一 App 結果轉為價格欄位
+    與 ETL_json 相同：initial 除以 100，無價格 (免費或未販售) 時 price_initial 為 None
+    :return: {"price_initial": ..., "price_currency": ...}；success 為 false 時回傳 None (不更新)
+    """
+    if not isinstance(app_result, dict) or not app_result.get("success"):
+        return None
+
+    # 免費遊戲的 data 會是空列表
+    data = app_result.get("data")
+    price = data.get("price_overview") if isinstance(data, dict) else None
+    if not price or price.get("initial") is None:
+        return {"price_initial": None, "price_currency": None}
+
+    try:
+        price_initial = float(price["initial"]) / 100
+    except (ValueError, TypeError):
+        price_initial = 0.0
+    return {"price_initial": price_initial, "price_currency": price.get("currency")}
+
+
+class SteamPriceRefresher(SteamScraperBase):
+    """
+    Steam 價格批次更新爬蟲
+    以 appdetails 的 filters=price_overview 一次查詢多個 AppID，只下載價格欄位，
+    記錄於價格覆蓋層 (ETL_json 之後重新輸出時沿用)，再就地更新 processed 的 json_data / document 檔案
+    與向量資料庫的 metadata。
+    """
+
+    def __init__(self, batch_size: int = PRICE_BATCH_SIZE, update_vector_store: bool = True, **kwargs):
+        """
+        :param batch_size: 每次請求包含的 AppID 數量
+        :param update_vector_store: 是否一併更新向量資料庫的 metadata
+        :param kwargs: 其餘參數同 SteamScraperBase (use_async, concurrency...)
+        """
+        # 價格直接寫回 processed 資料，不寫入 raw 資料庫
+        kwargs.setdefault("use_raw_store", False)
+        super().__init__(scraper_type="game_price", url_type=GAME_PRICE_URL, **kwargs)
+        self.batch_size = batch_size
+        self.update_vector_store = update_vector_store
+        self.json_data_folder = self.root / PROCESSED_DATA_PATH.format("json_data")
+        self.document_folder = self.root / PROCESSED_DATA_PATH.format("document")
+
+        # {steam_appid: {"price_initial": ..., "price_currency": ...}}
+        self.price_updates: Dict[int, Dict] = {}
+        self.patched_counts: Dict[str, int] = {}
+        self.price_unavailable_count = 0
+
+    def _iter_processed_files(self, folder, prefix) -> Iterator:
+        """依編號順序列出 processed 資料夾中的檔案"""
+        file_num = 1
+        while (folder / f"{prefix}_{file_num}.json").exists():
+            yield folder / f"{prefix}_{file_num}.json"
+            file_num += 1
+
+    def _iter_app_ids(self) -> Iterator[Tuple[str, str]]:
+        """
+        從 processed json_data (或指定的 work list) 取得 AppID，每 batch_size 個組成一個以逗號分隔的請求
+        """
+        if self.work_list is not None:
+            logger.info(f"正在讀取清單檔案: {self.work_list.name}")
+            app_ids = [str(game["appid"])
+                       for game in iter_data_file(self.work_list) if game.get("appid")]
+            yield from self._batch_app_ids(self.work_list.name, app_ids)
+            return
+
+        for json_path in self._iter_processed_files(self.json_data_folder, "json_data"):
+            logger.info(f"正在讀取清單檔案: {json_path.name}")
+            # 只解碼 steam_appid，不建立描述等其他欄位
+            records = read_json(json_path, DataFile[ProcessedAppId]).get("data", [])
+
+            app_ids = [str(r["steam_appid"])
+                       for r in records if r.get("steam_appid")]
+            yield from self._batch_app_ids(json_path.name, app_ids)
+
+    def _batch_app_ids(self, list_filename: str, app_ids: List[str]) -> Iterator[Tuple[str, str]]:
+        for i in range(0, len(app_ids), self.batch_size):
+            yield list_filename, ",".join(app_ids[i: i + self.batch_size])
+
+    def _handle_result(self, app_id: str, single_data: Optional[Dict]):
+        """app_id 為逗號分隔的一批 AppID；逐一解析價格，失敗者記錄於 failed_list"""
+        batch_ids = [int(x) for x in app_id.split(",")]
+        reason = self.failure_reasons.pop(app_id, None)
+        if not single_data:
+            self.failed_count += len(batch_ids)
+            self.failed_list.extend(batch_ids)
+            for batch_id in batch_ids:
+                self.dead_letters.add(self.scraper_type, batch_id, reason or "未知原因")
+            self.metrics.record_items(failed=len(batch_ids))
+            self._update_metrics()
+            return
+
+        for batch_id in batch_ids:
+            price_patch = parse_price_overview(single_data.get(str(batch_id)))
+            if price_patch is None:
+                self.price_unavailable_count += 1
+                continue
+            self.price_updates[batch_id] = price_patch
+            self.data_count += 1
+        self.last_appid = batch_ids[-1]
+        self.metrics.record_items(ok=len(batch_ids))
+        self._update_metrics()
+
+    def _save_price_overlay(self):
+        """價格寫入覆蓋層，重新執行 ETL_json 時不會被 raw 資料的舊價格覆蓋"""
+        if not self.price_updates:
+            return
+        overlay = PriceOverlay(self.root / PRICE_OVERLAY_PATH)
+        try:
+            overlay.put_many(self.price_updates)
+        finally:
+            overlay.close()
+
+    def _patch_json_data(self) -> int:
+        """就地更新 json_data 檔案中的價格欄位，只重寫有變動的檔案"""
+        patched_count = 0
+        for json_path in self._iter_processed_files(self.json_data_folder, "json_data"):
+            json_data = read_json(json_path)
+
+            file_changed = 0
+            for record in json_data.get("data", []):
+                price_patch = self.price_updates.get(record.get("steam_appid"))
+                if price_patch and apply_price_to_record(record, price_patch):
+                    file_changed += 1
+
+            if file_changed:
+                write_json(json_path, json_data)
+                # 同編號的 Parquet 檔案一併更新，避免下游讀到舊價格
+                file_num = int(json_path.stem.rsplit("_", 1)[-1])
+                if PARQUET_OUTPUT_ENABLED and parquet_available():
+                    write_game_table(table_path(self.root, file_num), json_data.get("data", []),
+                                     compression=PARQUET_COMPRESSION)
+                logger.info(f"{json_path.name} 更新 {file_changed} 筆價格")
+            patched_count += file_changed
+        return patched_count
+
+    def _patch_documents(self) -> List[int]:
+        """就地更新 document 檔案的 metadata，回傳有變動的 AppID (供向量資料庫更新)"""
+        changed_appids = []
+        for doc_path in self._iter_processed_files(self.document_folder, "document"):
+            document_list = read_json(doc_path)
+
+            file_changed = 0
+            for doc in document_list:
+                metadata = doc.get("metadata", {})
+                appid = metadata.get("steam_appid")
+                price_patch = self.price_updates.get(appid)
+                if price_patch and apply_price_to_metadata(metadata, price_patch):
+                    changed_appids.append(appid)
+                    file_changed += 1
+
+            if file_changed:
+                write_json(doc_path, document_list)
+                logger.info(f"{doc_path.name} 更新 {file_changed} 筆價格")
+        return changed_appids
+
+    def _patch_vector_store(self, changed_appids: List[int]) -> int:
+        """只針對價格有變動的 AppID 更新向量資料庫 metadata"""
+        if not changed_appids:
+            return 0
+        # 延遲載入，未使用向量資料庫時不需要資料庫套件
+        from src.database import postgreSQL_conn as pgc
+
+        patches = {appid: self.price_updates[appid] for appid in changed_appids}
+        return pgc.patch_vector_metadata(patches, collection_name=PG_COLLECTION)
+
+    def run(self):
+        """抓取價格後就地更新 processed 資料與向量資料庫"""
+        logger.info(f"啟動 {self.scraper_type} 爬蟲 (每次請求 {self.batch_size} 個 AppID)...")
+
+        try:
+            self._run_engine()
+
+            logger.info(f"共取得 {len(self.price_updates)} 筆價格，開始更新 processed 資料...")
+            self._save_price_overlay()
+            self.patched_counts["json_data"] = self._patch_json_data()
+            changed_appids = self._patch_documents()
+            self.patched_counts["document"] = len(changed_appids)
+            if self.update_vector_store:
+                self.patched_counts["vector"] = self._patch_vector_store(
+                    changed_appids)
+            logger.info(f"價格更新完成: {self.patched_counts}")
+            # 價格已寫回 processed 資料，自 dead-letter queue 移除
+            self.dead_letters.remove(self.scraper_type, self.price_updates.keys())
+        finally:
+            self._save_metadata()
+            self.checkpoint.close()
+            self.dead_letters.close()
+
+    def _extra_metadata(self) -> Dict:
+        return {"price_count": len(self.price_updates),
+                "price_unavailable_count": self.price_unavailable_count,
+                "patched_counts": self.patched_counts}
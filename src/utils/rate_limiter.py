@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 視為限流 / 伺服器過載的狀態碼 (Steam 在大量請求後會以 403 暫時封鎖)
+THROTTLE_STATUS_CODES = {403, 429}
+
+
+def is_throttle_status(status_code: int) -> bool:
+    """判斷狀態碼是否代表限流或伺服器暫時無法處理 (429 / 403 / 5xx)"""
+    return status_code in THROTTLE_STATUS_CODES or status_code >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 標頭 (秒數或 HTTP 日期)，回傳需等待的秒數"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token Bucket 速率限制器
+    以固定速率補充 token，每次請求消耗一個 token；token 不足時回傳需等待的秒數。
+    同時支援同步 (time.sleep) 與非同步 (asyncio.sleep) 的等待方式。
+    pause 會將所有已預約、尚在等待的請求一併往後延，暫停結束後仍依原本的間隔送出，而不是同時送出。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        :param rate: 每秒補充的 token 數 (即長期平均的每秒請求數)
+        :param capacity: bucket 容量 (允許瞬間爆發的請求數)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        # 累計的暫停秒數：等待中的預約醒來時，依預約後增加的暫停秒數往後延
+        self.paused_total = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """預約一個 token，回傳呼叫端在送出請求前需要等待的秒數"""
+        with self._lock:
+            return self._reserve_locked()
+
+    def _reserve_locked(self) -> float:
+        now = time.monotonic()
+        # updated_at 可能位於未來 (被 pause 暫停)，此時不補充 token
+        if now > self.updated_at:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+        # 允許 token 變為負值，代表已被後續請求預約的額度
+        self.tokens -= 1
+        wait = max(0.0, self.updated_at - now)
+        if self.tokens < 0:
+            wait += -self.tokens / self.rate
+        return wait
+
+    def pause(self, seconds: float):
+        """
+        暫停整個 bucket 指定秒數 (例如伺服器回傳 Retry-After)
+        已預約的請求一併往後延相同的秒數 (重疊的暫停只延長超出的部分)
+        """
+        with self._lock:
+            now = time.monotonic()
+            resume_at = now + seconds
+            if now > self.updated_at:
+                # 先補充暫停前已累積的 token，避免多扣額度
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+            if resume_at > self.updated_at:
+                self.paused_total += resume_at - max(now, self.updated_at)
+                self.updated_at = resume_at
+                self.tokens = min(self.tokens, 0.0)
+
+    def _reserve_slot(self) -> Tuple[float, float]:
+        """預約一個 token，回傳 (可送出的時間點, 預約時的累計暫停秒數)"""
+        with self._lock:
+            return time.monotonic() + self._reserve_locked(), self.paused_total
+
+    def _remaining_wait(self, ready_at: float, paused_mark: float) -> Tuple[float, float, float]:
+        """計算預約還需等待的秒數 (加上預約後新增的暫停秒數)，回傳 (等待秒數, 新的時間點, 新的累計暫停秒數)"""
+        with self._lock:
+            ready_at += self.paused_total - paused_mark
+            return ready_at - time.monotonic(), ready_at, self.paused_total
+
+    def acquire(self):
+        """同步取得 token，必要時阻塞等待"""
+        ready_at, paused_mark = self._reserve_slot()
+        wait, ready_at, paused_mark = self._remaining_wait(ready_at, paused_mark)
+        while wait > 0:
+            time.sleep(wait)
+            wait, ready_at, paused_mark = self._remaining_wait(ready_at, paused_mark)
+
+    async def acquire_async(self):
+        """非同步取得 token，等待期間不阻塞 event loop"""
+        ready_at, paused_mark = self._reserve_slot()
+        wait, ready_at, paused_mark = self._remaining_wait(ready_at, paused_mark)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait, ready_at, paused_mark = self._remaining_wait(ready_at, paused_mark)
+
+
+class AimdTokenBucket(TokenBucket):
+    """
+    AIMD (加法增加、乘法減少) 自適應速率的 TokenBucket
+    回應正常時逐步提高速率，遇到限流時將速率減半並依 Retry-After 暫停，
+    讓爬蟲維持在伺服器實際允許的速率附近，而不是固定的猜測值。
+    同一波請求同時遭到限流時只算一次壅塞：減速後在暫停結束再加上 decrease_interval 秒內，不再減速。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, min_rate: Optional[float] = None,
+                 max_rate: Optional[float] = None, increase_step: float = 0.01,
+                 decrease_factor: float = 0.5, decrease_interval: float = 1.0):
+        """
+        :param rate: 初始速率 (每秒請求數)
+        :param capacity: bucket 容量
+        :param min_rate: 速率下限 (預設為初始速率的 1/10)
+        :param max_rate: 速率上限 (預設為初始速率的 2 倍)
+        :param increase_step: 每次成功回應增加的速率
+        :param decrease_factor: 遇到限流時速率乘上的倍數
+        :param decrease_interval: 兩次減速的最短間隔 (秒，約一次請求的往返時間；暫停期間另外計入)
+        """
+        super().__init__(rate=rate, capacity=capacity)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate * 2
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.throttle_count = 0
+        self.decrease_count = 0
+        # 在此時間點之前的限流視為同一次壅塞，不再減速
+        self._hold_decrease_until = float("-inf")
+
+    def _set_rate_locked(self, rate: float):
+        """改變速率；已預約的額度 (負的 token) 依比例換算，讓既有預約的送出時間不變"""
+        if self.tokens < 0:
+            self.tokens *= rate / self.rate
+        self.rate = rate
+
+    def on_success(self):
+        """回應正常：加法增加速率"""
+        with self._lock:
+            self._set_rate_locked(min(self.max_rate, self.rate + self.increase_step))
+
+    def on_throttle(self, retry_after: Optional[float] = None, fallback_pause: float = 0.0):
+        """
+        遭到限流：乘法減少速率 (同一次壅塞只減一次)，並暫停 bucket
+        :param retry_after: 伺服器指定的等待秒數 (Retry-After)
+        :param fallback_pause: 沒有 Retry-After 時的暫停秒數
+        """
+        pause_seconds = retry_after if retry_after is not None else fallback_pause
+        with self._lock:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if now >= self._hold_decrease_until:
+                self._set_rate_locked(max(self.min_rate, self.rate * self.decrease_factor))
+                self.decrease_count += 1
+                self._hold_decrease_until = now + max(pause_seconds, 0.0) + self.decrease_interval
+        if pause_seconds > 0:
+            self.pause(pause_seconds)
+
+
+class HostRateLimiter:
+    """
+    依主機名稱分別管理 AimdTokenBucket
+    例如 store.steampowered.com 與 steamspy.com 各自擁有獨立且自適應的速率。
+    """
+
+    def __init__(self, host_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_rate: float = 0.5, default_capacity: float = 1.0):
+        """
+        :param host_limits: {主機名稱: {"rate": 初始每秒請求數, "capacity": 爆發上限,
+                                         "min_rate": 速率下限, "max_rate": 速率上限}}
+        :param default_rate: 未列於 host_limits 之主機所使用的速率
+        :param default_capacity: 未列於 host_limits 之主機所使用的容量
+        """
+        self.host_limits = host_limits or {}
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self._buckets: Dict[str, AimdTokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url: str) -> AimdTokenBucket:
+        """取得 URL 所屬主機的 AimdTokenBucket (不存在則建立)"""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limit = self.host_limits.get(host, {})
+                bucket = AimdTokenBucket(
+                    rate=limit.get("rate", self.default_rate),
+                    capacity=limit.get("capacity", self.default_capacity),
+                    min_rate=limit.get("min_rate"),
+                    max_rate=limit.get("max_rate"))
+                self._buckets[host] = bucket
+            return bucket
+
+    def current_rates(self) -> Dict[str, float]:
+        """回傳各主機目前的速率 (每秒請求數)"""
+        with self._lock:
+            return {host: round(bucket.rate, 3) for host, bucket in self._buckets.items()}
+
+    def acquire(self, url: str):
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url: str):
+        await self.bucket_for(url).acquire_async()
@@ -0,0 +1,232 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    # 未安裝 zstandard 時以未壓縮的 JSON 儲存 (讀取時依 encoding 欄位判斷)
+    zstandard = None
+
+from src.utils.fast_json import decode, encode, typed_decoder
+from src.utils.steam_schema import RAW_RECORD_TYPES
+
+# 合併爬蟲的資料會拆成各資料類型分別儲存
+COMBINED_SOURCE = "game_combined"
+# 單次查詢的 AppID 數量 (SQLite 的參數個數有上限)
+QUERY_BATCH_SIZE = 500
+
+
+def encode_payload(payload: Dict, compressor=None) -> Tuple[str, bytes]:
+    """將資料序列化為 (encoding, bytes)，有 compressor 時以 zstd 壓縮"""
+    data = encode(payload)
+    if compressor is None:
+        return "json", data
+    return "zstd", compressor.compress(data)
+
+
+def decode_payload(encoding: str, data: bytes, decompressor=None, schema: Optional[Any] = None):
+    """還原 encode_payload 的資料，指定 schema 時只建立其中定義的欄位"""
+    if encoding == "zstd":
+        if decompressor is None:
+            raise ImportError("讀取壓縮的資料需要安裝 zstandard 套件")
+        data = decompressor.decompress(data)
+    return typed_decoder(schema)(data) if schema is not None else decode(data)
+
+
+def record_appid(record: Dict) -> Optional[int]:
+    """取得 raw 資料的 AppID (舊版 game_info 資料只有 {appid: {...}} 一個 key)"""
+    if record.get("appid") is not None:
+        return int(record["appid"])
+    first_key = next(iter(record), None)
+    return int(first_key) if first_key is not None and str(first_key).isdigit() else None
+
+
+def raw_store_entries(scraper_type: str, record: Dict) -> List[Tuple[str, int, Dict]]:
+    """
+    將一筆爬蟲資料轉為 [(source, appid, payload)]
+    合併爬蟲的 {"appid", "game_info", "game_review", "game_tag"} 拆成三筆，其餘爬蟲的資料原樣儲存
+    """
+    app_id = int(record["appid"])
+    if scraper_type == COMBINED_SOURCE:
+        return [(source, app_id, payload) for source, payload in record.items()
+                if source != "appid" and payload is not None]
+    return [(scraper_type, app_id, record)]
+
+
+class RawStore:
+    """
+    以 (appid, source) 為 key 的 raw 資料庫
+    爬蟲每批寫入檔案時同步 upsert 至此，每個 AppID 的每種資料只保留最新的一筆，
+    ETL 依 AppID 範圍分批讀取並以索引查詢同一 AppID 的其他資料類型，不受檔案切分方式影響，也不需整檔載入記憶體。
+    同一 (appid, source) 以 fetched_at 較新者為準，匯入舊檔案時不會覆蓋爬蟲已寫入的新資料。
+    """
+
+    def __init__(self, db_path: Path, compression_level: Optional[int] = 3, read_only: bool = False,
+                 typed: bool = False):
+        """
+        :param db_path: SQLite 檔案路徑
+        :param compression_level: payload 的 zstd 壓縮等級，None 代表不壓縮
+        :param read_only: 只讀模式 (ETL 的 worker 程序使用，檔案不存在時拋出 FileNotFoundError)
+        :param typed: 依 steam_schema.RAW_RECORD_TYPES 只解碼 ETL 會用到的欄位 (其他 source 仍完整解碼)
+        """
+        self.db_path = db_path
+        self.typed = typed
+        if read_only:
+            if not db_path.exists():
+                raise FileNotFoundError(f"找不到 raw 資料庫: {db_path}")
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+        else:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 多個爬蟲程序可能同時寫入，等待鎖定而不是直接報錯；
+            # 非同步爬蟲在背景執行緒中寫入 (同一時間只有一個執行緒使用連線)
+            self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS raw_records (
+                    appid INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    encoding TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (appid, source)
+                );
+                CREATE INDEX IF NOT EXISTS idx_raw_records_source ON raw_records (source, appid);
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                """
+            )
+            self.conn.commit()
+
+        self._compressor = None
+        if compression_level is not None and zstandard is not None:
+            self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def _encode(self, payload: Dict) -> Tuple[str, bytes]:
+        return encode_payload(payload, self._compressor)
+
+    def _decode(self, source: str, encoding: str, payload: bytes) -> Dict:
+        schema = RAW_RECORD_TYPES.get(source) if self.typed else None
+        return decode_payload(encoding, payload, self._decompressor, schema)
+
+    def put_many(self, entries: Iterable[Tuple[str, int, Dict]], fetched_at: Optional[float] = None) -> int:
+        """
+        寫入 [(source, appid, payload)]，已存在且較新的資料不會被覆蓋
+        :param fetched_at: 資料的取得時間 (預設為現在；匯入舊檔案時傳入檔案修改時間)
+        :return: 寫入的筆數
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows = [(int(app_id), source, fetched_at, *self._encode(payload))
+                for source, app_id, payload in entries]
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO raw_records (appid, source, fetched_at, encoding, payload)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (appid, source) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    encoding = excluded.encoding,
+                    payload = excluded.payload
+                WHERE excluded.fetched_at >= raw_records.fetched_at
+                """,
+                rows
+            )
+        return len(rows)
+
+    def get(self, source: str, app_id: int) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT encoding, payload FROM raw_records WHERE appid = ? AND source = ?",
+            (int(app_id), source)
+        ).fetchone()
+        return self._decode(source, *row) if row else None
+
+    def get_many(self, source: str, app_ids: Iterable[int]) -> Dict[int, Dict]:
+        """以主鍵批次查詢多個 AppID 的資料，回傳 {appid: payload} (不存在者不列入)"""
+        app_ids = [int(app_id) for app_id in app_ids]
+        results = {}
+        for start in range(0, len(app_ids), QUERY_BATCH_SIZE):
+            batch = app_ids[start:start + QUERY_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT appid, encoding, payload FROM raw_records "
+                f"WHERE source = ? AND appid IN ({placeholders})",
+                (source, *batch)
+            )
+            for app_id, encoding, payload in rows:
+                results[app_id] = self._decode(source, encoding, payload)
+        return results
+
+    def chunk_range(self, source: str, chunk_num: int, chunk_size: int) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        依 appid 排序後第 chunk_num 個分批 (從 1 開始，每批 chunk_size 筆) 的 AppID 範圍
+        :return: (起始 appid, 下一批的起始 appid (最後一批為 None))；超出範圍時回傳 None
+        """
+        query = "SELECT appid FROM raw_records WHERE source = ? ORDER BY appid LIMIT 1 OFFSET ?"
+        first = self.conn.execute(query, (source, (chunk_num - 1) * chunk_size)).fetchone()
+        if first is None:
+            return None
+        following = self.conn.execute(query, (source, chunk_num * chunk_size)).fetchone()
+        return first[0], following[0] if following else None
+
+    def iter_range(self, source: str, start_appid: int,
+                   end_appid: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+        """依 appid 順序逐筆讀取 start_appid <= appid < end_appid 的資料"""
+        end_appid = end_appid if end_appid is not None else 2 ** 63 - 1
+        rows = self.conn.execute(
+            "SELECT appid, encoding, payload FROM raw_records "
+            "WHERE source = ? AND appid >= ? AND appid < ? ORDER BY appid",
+            (source, start_appid, end_appid)
+        )
+        for app_id, encoding, payload in rows:
+            yield app_id, self._decode(source, encoding, payload)
+
+    def count(self, source: Optional[str] = None) -> int:
+        if source is None:
+            return self.conn.execute("SELECT COUNT(*) FROM raw_records").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM raw_records WHERE source = ?", (source,)).fetchone()[0]
+
+    def stats(self) -> Dict:
+        counts = dict(self.conn.execute(
+            "SELECT source, COUNT(*) FROM raw_records GROUP BY source ORDER BY source").fetchall())
+        return {"records": counts, "backfilled_at": self.get_meta("backfilled_at")}
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def is_backfilled(self) -> bool:
+        """既有的 raw 檔案是否已匯入 (未匯入前資料庫只有之後爬取的資料，ETL 不應以此為來源)"""
+        return self.get_meta("backfilled_at") is not None
+
+    def close(self):
+        self.conn.close()
+
+
+def open_raw_store(db_path: Path) -> Optional[RawStore]:
+    """以只讀模式開啟已匯入既有資料的 raw 資料庫，不存在或尚未匯入時回傳 None"""
+    if not db_path.exists():
+        return None
+    store = RawStore(db_path, read_only=True)
+    try:
+        if store.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'store_meta'").fetchone() \
+                and store.is_backfilled():
+            return store
+    except sqlite3.Error:
+        pass
+    store.close()
+    return None
@@ -0,0 +1,267 @@
+import io
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    # 未安裝 zstandard 時僅能讀寫未壓縮的檔案
+    zstandard = None
+
+from src.utils.fast_json import DecodeError, decode, encode_line, read_json, typed_decoder
+from src.utils.steam_schema import DataFile
+
+logger = logging.getLogger(__name__)
+
+# 支援的資料檔副檔名 (依讀取優先順序)
+DATA_FILE_SUFFIXES = (".jsonl.zst", ".jsonl", ".json")
+ZSTD_SUFFIX = ".jsonl.zst"
+
+
+def data_file_suffix(path: Path) -> str:
+    """回傳資料檔的副檔名 (.jsonl.zst 視為一個副檔名)"""
+    return ZSTD_SUFFIX if path.name.endswith(ZSTD_SUFFIX) else path.suffix
+
+
+class JsonlWriter:
+    """
+    Append-only 的 JSONL 寫入器 (一行一筆資料)
+    每次寫入只附加新的資料並 fsync，寫入成本與批次大小成正比，不會隨檔案變大而變慢。
+    單檔達到筆數或大小上限時，自動切換至下一個編號的檔案 ({prefix}_{N}.jsonl)。
+    指定 compression_level 時改為輸出 {prefix}_{N}.jsonl.zst：每批資料壓縮為一個獨立的 zstd frame 附加至檔案，
+    中斷時已寫入的 frame 仍可完整讀取。
+    """
+
+    def __init__(self, folder: Path, prefix: str, max_records_per_file: int,
+                 max_bytes_per_file: Optional[int] = None, start_file_num: int = 1,
+                 overwrite: bool = False, exclusive: bool = False,
+                 compression_level: Optional[int] = None):
+        """
+        :param folder: 輸出資料夾
+        :param prefix: 檔名前綴 (如 'game_info')
+        :param max_records_per_file: 單檔筆數上限
+        :param max_bytes_per_file: 單檔大小上限 (bytes)，None 代表不限制
+        :param start_file_num: 起始檔案編號
+        :param overwrite: 是否覆寫既有同名檔案 (預設為附加)
+        :param exclusive: 只寫入自己建立的新檔案，編號已被使用時改用下一個編號
+                          (多個程序同時輸出至同一資料夾時使用)
+        :param compression_level: zstd 壓縮等級，None 代表不壓縮
+        """
+        self.folder = folder
+        self.prefix = prefix
+        self.max_records_per_file = max_records_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.file_num = start_file_num
+        self.overwrite = overwrite
+        self.exclusive = exclusive
+
+        self._compressor = None
+        if compression_level is not None:
+            if zstandard is None:
+                logger.warning("未安裝 zstandard，改為輸出未壓縮的 JSONL。")
+            else:
+                self._compressor = zstandard.ZstdCompressor(level=compression_level)
+
+        self.current_count = 0
+        self.current_bytes = 0
+        self._file = None
+
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def current_path(self) -> Path:
+        suffix = ZSTD_SUFFIX if self._compressor is not None else ".jsonl"
+        return self.folder / f"{self.prefix}_{self.file_num}{suffix}"
+
+    def _open(self):
+        """開啟目前編號的檔案 (以 bytes 寫入)，附加模式下會接續既有的筆數與大小"""
+        if self.exclusive:
+            self._open_exclusive()
+            return
+
+        path = self.current_path
+        mode = "wb" if self.overwrite else "ab"
+        self._file = open(path, mode)
+        if mode == "ab" and path.stat().st_size > 0:
+            self.current_bytes = path.stat().st_size
+            self.current_count = sum(1 for _ in iter_jsonl(path))
+        else:
+            self.current_count = 0
+            self.current_bytes = 0
+
+    def _open_exclusive(self):
+        """以 'x' 模式建立檔案，確保不會與其他程序寫入同一個檔案"""
+        while True:
+            try:
+                self._file = open(self.current_path, "xb")
+                break
+            except FileExistsError:
+                self.file_num += 1
+        self.current_count = 0
+        self.current_bytes = 0
+
+    def _sync_and_close(self):
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def _write_chunk(self, lines: list):
+        """將同一檔案的一批資料寫入 (壓縮模式下為一個 zstd frame)"""
+        if not lines:
+            return
+        chunk = b"".join(lines)
+        if self._compressor is not None:
+            chunk = self._compressor.compress(chunk)
+        self._file.write(chunk)
+        self.current_bytes += len(chunk)
+
+    def write_batch(self, records: Iterable[Dict]):
+        """附加一批資料，寫入完成後 fsync 確保資料落地"""
+        lines = []
+        pending_bytes = 0
+        for record in records:
+            if self._file is None:
+                self._open()
+            # 大小上限以未壓縮的大小估計尚未寫入的部分，換檔前先寫出目前檔案的資料
+            if self.current_count >= self.max_records_per_file or (
+                    self.max_bytes_per_file is not None
+                    and self.current_bytes + pending_bytes >= self.max_bytes_per_file):
+                self._write_chunk(lines)
+                lines, pending_bytes = [], 0
+                logger.info(f"{self.current_path.name} 已達單檔上限，切換至新檔案。")
+                self._sync_and_close()
+                self.file_num += 1
+                self._open()
+
+            line = encode_line(record)
+            lines.append(line)
+            self.current_count += 1
+            pending_bytes += len(line)
+
+        if self._file is not None:
+            self._write_chunk(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._sync_and_close()
+
+
+def append_jsonl(path: Path, records: Iterable[Dict]):
+    """將資料附加至單一 JSONL 檔案並 fsync (不做換檔)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "ab") as f:
+        for record in records:
+            f.write(encode_line(record))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def data_file_pattern(prefix: str) -> re.Pattern:
+    """{prefix}_{N}.json / .jsonl / .jsonl.zst 的檔名 (group 1 為編號)"""
+    return re.compile(rf"^{re.escape(prefix)}_(\d+)\.(json|jsonl|jsonl\.zst)$")
+
+
+def next_file_num(folder: Path, prefix: str) -> int:
+    """找出資料夾中 {prefix}_{N}.json / .jsonl / .jsonl.zst 的最大編號，回傳下一個可用編號"""
+    pattern = data_file_pattern(prefix)
+    existing_nums = [int(m.group(1)) for path in folder.iterdir()
+                     if (m := pattern.match(path.name))]
+    return max(existing_nums, default=0) + 1
+
+
+def find_data_file(folder: Path, prefix: str, file_num: int) -> Optional[Path]:
+    """依編號尋找資料檔，優先使用壓縮的 JSONL，其次為 JSONL 與舊版 JSON；找不到則回傳 None"""
+    for suffix in DATA_FILE_SUFFIXES:
+        path = folder / f"{prefix}_{file_num}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def open_jsonl(path: Path) -> io.TextIOBase:
+    """以文字模式開啟 JSONL 檔案；.jsonl.zst 會以串流方式解壓縮 (跨越所有 zstd frame)"""
+    if data_file_suffix(path) != ZSTD_SUFFIX:
+        return open(path, "r", encoding="utf-8")
+    if zstandard is None:
+        raise ImportError(f"讀取 {path.name} 需要安裝 zstandard 套件")
+    raw_file = open(path, "rb")
+    reader = zstandard.ZstdDecompressor().stream_reader(
+        raw_file, read_across_frames=True, closefd=True)
+    return io.TextIOWrapper(reader, encoding="utf-8")
+
+
+def iter_jsonl(path: Path, schema: Optional[Any] = None) -> Iterator[Dict]:
+    """
+    逐行串流讀取 JSONL 檔案；無法解析的行 (例如寫入中斷的最後一行或 frame) 會被略過
+    :param schema: src.utils.steam_schema 的型別，指定時只建立其中定義的欄位
+    """
+    decode_line = typed_decoder(schema) if schema is not None else decode
+    with open_jsonl(path) as f:
+        line_num = 0
+        try:
+            for line_num, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield decode_line(line)
+                except DecodeError as e:
+                    logger.warning(f"{path.name} 第 {line_num} 行無法解析，已略過: {e}")
+        except Exception as e:
+            if zstandard is None or not isinstance(e, zstandard.ZstdError):
+                raise
+            logger.warning(f"{path.name} 第 {line_num} 行之後的壓縮資料不完整，已略過: {e}")
+
+
+def iter_data_file(path: Path, schema: Optional[Any] = None) -> Iterator[Dict]:
+    """
+    逐筆讀取資料檔：JSONL (含壓縮) 以串流方式讀取，舊版 JSON 則讀取其中的 data 列表
+    :param schema: 每筆資料的型別 (見 iter_jsonl)
+    """
+    if data_file_suffix(path) in (".jsonl", ZSTD_SUFFIX):
+        yield from iter_jsonl(path, schema)
+        return
+
+    data = read_json(path, DataFile[schema] if schema is not None else None)
+    yield from data.get("data", [])
+
+
+def compress_data_file(path: Path, level: int = 10, keep_original: bool = False) -> Path:
+    """
+    將既有的 JSON / JSONL 資料檔轉為同編號的 .jsonl.zst (以串流方式處理，不需將整個檔案載入記憶體)
+    寫入暫存檔並核對筆數後才改為正式檔名，確認無誤才刪除原始檔
+    :return: 壓縮後的檔案路徑
+    """
+    if zstandard is None:
+        raise ImportError("壓縮資料檔需要安裝 zstandard 套件")
+
+    stem = path.name[: -len(data_file_suffix(path))]
+    output_path = path.with_name(stem + ZSTD_SUFFIX)
+    # 暫存檔保留 .jsonl.zst 副檔名以便核對時解壓縮，且不符合 {prefix}_{N} 的命名，不會被當成資料檔讀取
+    part_path = path.with_name(stem + ".part" + ZSTD_SUFFIX)
+
+    record_count = 0
+    with open(part_path, "wb") as f:
+        with zstandard.ZstdCompressor(level=level).stream_writer(f, closefd=False) as writer:
+            for record in iter_data_file(path):
+                writer.write(encode_line(record))
+                record_count += 1
+        f.flush()
+        os.fsync(f.fileno())
+
+    written_count = sum(1 for _ in iter_jsonl(part_path))
+    if written_count != record_count:
+        part_path.unlink()
+        raise ValueError(f"{path.name} 壓縮後筆數不符 ({record_count} -> {written_count})")
+
+    part_path.replace(output_path)
+    if not keep_original:
+        path.unlink()
+    return output_path
@@ -0,0 +1,183 @@
+import logging
+import math
+import time
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set
+from urllib.parse import quote
+
+from src.config.constant import GAME_REVIEW_TEXT_URL, REVIEW_TEXT_SETTINGS
+from src.utils.scraper_base import SteamScraperBase
+
+logger = logging.getLogger(__name__)
+
+# 保留的評論欄位 (作者資訊只保留遊玩時數)
+REVIEW_TEXT_COLS = ['recommendationid', 'language', 'review', 'voted_up', 'votes_up', 'votes_funny',
+                    'weighted_vote_score', 'comment_count', 'steam_purchase', 'received_for_free',
+                    'written_during_early_access', 'timestamp_created', 'timestamp_updated']
+
+# Steam 單頁評論數上限
+MAX_NUM_PER_PAGE = 100
+
+
+def trim_review(review: Dict) -> Dict:
+    """只保留 ETL 需要的評論欄位"""
+    trimmed = {col: review.get(col) for col in REVIEW_TEXT_COLS}
+    author = review.get("author") or {}
+    trimmed["playtime_forever"] = author.get("playtime_forever")
+    trimmed["playtime_at_review"] = author.get("playtime_at_review")
+    return trimmed
+
+
+class SteamReviewTextScraper(SteamScraperBase):
+    """
+    Steam 評論內文爬蟲
+    依 appreviews API 的 cursor 分頁，以 generator 逐頁串流讀取每個 AppID 的評論內文：
+    各語言分別分頁，達到評論數 / 頁數上限、cursor 重複或沒有更多評論時停止；
+    不同 AppID 之間沿用基底類別的 worker 同時爬取 (同時請求數即 concurrency)。
+    每個 AppID 寫成一筆資料：{"appid": 10, "languages": {...}, "reviews": [...]}
+    任一頁請求失敗時整筆視為失敗，交由 dead-letter queue 重試，避免寫入不完整的評論。
+    """
+
+    def __init__(self, scraper_type: str = "game_review_text", settings: Optional[Dict] = None, **kwargs):
+        """
+        :param scraper_type: 爬蟲類型 (用於資料夾命名)
+        :param settings: 覆寫 REVIEW_TEXT_SETTINGS 中的設定 (languages, max_reviews_per_app...)
+        :param kwargs: 其餘參數同 SteamScraperBase (max_input_files, use_async, work_list...)
+        """
+        self.settings = {**REVIEW_TEXT_SETTINGS, **(settings or {})}
+        super().__init__(scraper_type=scraper_type, url_type=GAME_REVIEW_TEXT_URL, **kwargs)
+        # 每筆資料包含數百則評論，縮小單檔筆數與存檔間隔
+        self.max_results_per_file = 500
+        self.max_data_per_save = 5
+        self.review_count = 0
+
+    def _page_url(self, app_id: int, language: str, cursor: str, num_per_page: int) -> str:
+        return self.url_type.format(
+            appid=app_id, language=language, filter=self.settings["filter"],
+            review_type=self.settings["review_type"], purchase_type=self.settings["purchase_type"],
+            day_range=self.settings["day_range"], num_per_page=num_per_page,
+            cursor=quote(cursor, safe=""))
+
+    def _min_timestamp(self) -> Optional[float]:
+        max_age_days = self.settings["max_review_age_days"]
+        return time.time() - max_age_days * 24 * 3600 if max_age_days else None
+
+    def _accept_reviews(self, page: Dict, seen_ids: Set[str], limit: int,
+                        min_timestamp: Optional[float]) -> List[Dict]:
+        """過濾單頁評論 (重複、過短、認同數不足、過舊)，最多回傳 limit 則"""
+        accepted = []
+        for review in page.get("reviews") or []:
+            review_id = review.get("recommendationid")
+            if review_id in seen_ids:
+                continue
+            seen_ids.add(review_id)
+            if len((review.get("review") or "").strip()) < self.settings["min_review_length"]:
+                continue
+            if (review.get("votes_up") or 0) < self.settings["min_votes_up"]:
+                continue
+            if min_timestamp is not None and (review.get("timestamp_created") or 0) < min_timestamp:
+                continue
+            accepted.append(trim_review(review))
+            if len(accepted) >= limit:
+                break
+        return accepted
+
+    def _next_cursor(self, page: Dict, cursor: str, seen_cursors: Set[str],
+                     min_timestamp: Optional[float]) -> Optional[str]:
+        """判斷是否繼續分頁，回傳下一頁的 cursor (None 代表停止)"""
+        reviews = page.get("reviews") or []
+        next_cursor = page.get("cursor")
+        if not reviews or not next_cursor or next_cursor == cursor or next_cursor in seen_cursors:
+            return None
+        if (min_timestamp is not None and self.settings["filter"] == "recent"
+                and (reviews[-1].get("timestamp_created") or 0) < min_timestamp):
+            # 依時間排序時，之後的評論只會更舊
+            return None
+        seen_cursors.add(next_cursor)
+        return next_cursor
+
+    def iter_review_pages(self, app_id: int, language: str, limit: int) -> Iterator[Optional[Dict]]:
+        """
+        同步模式：逐頁產生單一語言的評論 (已過濾)，產生 None 代表請求失敗並停止
+        每頁為 {"query_summary": {...} (僅第一頁), "reviews": [...]}
+        """
+        cursor, seen_cursors, seen_ids = "*", {"*"}, set()
+        min_timestamp = self._min_timestamp()
+        for _ in range(self.settings["max_pages_per_language"]):
+            num_per_page = min(self.settings["num_per_page"], MAX_NUM_PER_PAGE)
+            page = self._fetch_url(self._page_url(app_id, language, cursor, num_per_page), app_id)
+            if page is None:
+                yield None
+                return
+            reviews = self._accept_reviews(page, seen_ids, limit, min_timestamp)
+            limit -= len(reviews)
+            yield {"query_summary": page.get("query_summary"), "reviews": reviews}
+
+            cursor = self._next_cursor(page, cursor, seen_cursors, min_timestamp)
+            if cursor is None or limit <= 0:
+                return
+
+    async def iter_review_pages_async(self, client, app_id: int, language: str,
+                                      limit: int) -> AsyncIterator[Optional[Dict]]:
+        """非同步模式：與 iter_review_pages 相同，以 async generator 逐頁產生"""
+        cursor, seen_cursors, seen_ids = "*", {"*"}, set()
+        min_timestamp = self._min_timestamp()
+        for _ in range(self.settings["max_pages_per_language"]):
+            num_per_page = min(self.settings["num_per_page"], MAX_NUM_PER_PAGE)
+            page = await self._fetch_url_async(
+                client, self._page_url(app_id, language, cursor, num_per_page), app_id)
+            if page is None:
+                yield None
+                return
+            reviews = self._accept_reviews(page, seen_ids, limit, min_timestamp)
+            limit -= len(reviews)
+            yield {"query_summary": page.get("query_summary"), "reviews": reviews}
+
+            cursor = self._next_cursor(page, cursor, seen_cursors, min_timestamp)
+            if cursor is None or limit <= 0:
+                return
+
+    def _language_limit(self, collected: int, language_index: int) -> int:
+        """剩餘的評論數上限平均分配給尚未爬取的語言 (較少評論的語言用不完的額度由後面的語言使用)"""
+        languages_left = len(self.settings["languages"]) - language_index
+        return math.ceil((self.settings["max_reviews_per_app"] - collected) / languages_left)
+
+    def _add_page(self, record: Dict, language: str, page: Dict):
+        summary = record["languages"].setdefault(language, {"total_reviews": None, "fetched": 0})
+        if page["query_summary"] and summary["total_reviews"] is None:
+            summary["total_reviews"] = page["query_summary"].get("total_reviews")
+        summary["fetched"] += len(page["reviews"])
+        record["reviews"].extend(page["reviews"])
+
+    def _finish_record(self, app_id: int, record: Dict) -> Dict:
+        self.review_count += len(record["reviews"])
+        logger.info(f"AppID {app_id} 取得 {len(record['reviews'])} 則評論")
+        return record
+
+    def _fetch_single_data(self, app_id: int) -> Optional[Dict]:
+        """同步模式：依語言逐頁讀取評論"""
+        record = {"appid": app_id, "languages": {}, "reviews": []}
+        for index, language in enumerate(self.settings["languages"]):
+            limit = self._language_limit(len(record["reviews"]), index)
+            if limit <= 0:
+                break
+            for page in self.iter_review_pages(app_id, language, limit):
+                if page is None:
+                    return None
+                self._add_page(record, language, page)
+        return self._finish_record(app_id, record)
+
+    async def _fetch_single_data_async(self, client, app_id: int) -> Optional[Dict]:
+        """非同步模式：依語言逐頁讀取評論 (同一 AppID 的分頁需依 cursor 依序請求)"""
+        record = {"appid": app_id, "languages": {}, "reviews": []}
+        for index, language in enumerate(self.settings["languages"]):
+            limit = self._language_limit(len(record["reviews"]), index)
+            if limit <= 0:
+                break
+            async for page in self.iter_review_pages_async(client, app_id, language, limit):
+                if page is None:
+                    return None
+                self._add_page(record, language, page)
+        return self._finish_record(app_id, record)
+
+    def _extra_metadata(self) -> Dict:
+        return {"review_count": self.review_count, "review_settings": self.settings}
@@ -1,49 +1,185 @@
-import json
+import argparse
+import asyncio
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 
-import requests
+try:
+    import httpx
+except ImportError:
+    # 未安裝 httpx 時僅能使用同步模式
+    httpx = None
+
+from src.utils.checkpoint import CrawlCheckpoint
+from src.utils.crawl_metrics import CrawlMetrics
+from src.utils.dead_letter import DeadLetterQueue
+from src.utils.fast_json import decode, write_json
+from src.utils.http_client import ResponseCache, create_async_client, get_session
+from src.utils.rate_limiter import HostRateLimiter, is_throttle_status, parse_retry_after
+from src.utils.raw_store import RawStore, raw_store_entries
+from src.utils.record_io import JsonlWriter, find_data_file, iter_data_file, next_file_num
+from src.utils.work_queue import PENDING, LeaseHeartbeat, default_worker_id
 
 # 假設 constant 都在這裡，若無則需要確認路徑
 try:
-    from src.config.constant import RAW_DATA_PATH, RAW_METADATA_PATH, PROJECT_ROOT
+    from src.config.constant import (RAW_DATA_PATH, RAW_METADATA_PATH, PROJECT_ROOT,
+                                     HOST_RATE_LIMITS, SCRAPER_CONCURRENCY,
+                                     RAW_OUTPUT_FORMAT, RAW_MAX_BYTES_PER_FILE, RAW_COMPRESSION_LEVEL,
+                                     RAW_WORK_LIST_SUBFOLDER, HTTP_CACHE_PATH, HTTP_CACHE_MAX_AGE,
+                                     METRICS_PATH, METRICS_SNAPSHOT_INTERVAL, DEAD_LETTER_PATH,
+                                     WORK_QUEUE_SETTINGS, RAW_STORE_PATH, RAW_STORE_ENABLED,
+                                     RAW_STORE_COMPRESSION_LEVEL)
 except ImportError:
     # 提供預設值以防單檔測試時報錯
     RAW_DATA_PATH = "data/raw/{}"
     RAW_METADATA_PATH = "data/metadata/{}"
     PROJECT_ROOT = Path(__file__).resolve().parents[2]
+    HOST_RATE_LIMITS = {}
+    SCRAPER_CONCURRENCY = 8
+    RAW_OUTPUT_FORMAT = "jsonl"
+    RAW_MAX_BYTES_PER_FILE = 256 * 1024 * 1024
+    RAW_COMPRESSION_LEVEL = 10
+    RAW_WORK_LIST_SUBFOLDER = "data/raw/game_id/worklist"
+    HTTP_CACHE_PATH = "data/cache/http_cache.sqlite"
+    HTTP_CACHE_MAX_AGE = 0
+    METRICS_PATH = "data/metrics"
+    METRICS_SNAPSHOT_INTERVAL = 30
+    DEAD_LETTER_PATH = "data/raw/dead_letter.sqlite"
+    WORK_QUEUE_SETTINGS = {"default": {"batch_size": 50, "concurrency": 8,
+                                       "lease_seconds": 600, "heartbeat_interval": 60}}
+    RAW_STORE_PATH = "data/raw/raw_store.sqlite"
+    RAW_STORE_ENABLED = True
+    RAW_STORE_COMPRESSION_LEVEL = 3
 
 
 logger = logging.getLogger(__name__)
 
 
+class CacheMissError(Exception):
+    """伺服器回傳 304，但回應快取中已沒有對應的內容"""
+
+
+def is_unavailable_response(data) -> bool:
+    """判斷是否為 Steam 的 {"success": false} 回應 (例如 appdetails 的 {appid: {"success": false}})"""
+    if not isinstance(data, dict):
+        return False
+    if data.get("success") is False:
+        return True
+    return any(isinstance(value, dict) and value.get("success") is False
+               for value in data.values())
+
+
+def list_work_lists(root: Path = PROJECT_ROOT) -> List[Path]:
+    """取得增量爬取產生的所有 work list 路徑 (由舊到新)"""
+    work_list_folder = root / RAW_WORK_LIST_SUBFOLDER
+    if not work_list_folder.exists():
+        return []
+    # 檔名內含時間戳記 (worklist_YYYYmmdd_HHMMSS.jsonl)，依名稱排序即為時間順序
+    return sorted(work_list_folder.glob("worklist_*.jsonl"))
+
+
+def pending_work_lists(consumed: Set[str], root: Path = PROJECT_ROOT) -> List[Path]:
+    """
+    尚未處理的 work list (由新到舊)
+    增量爬取可能在爬蟲讀取前執行多次，且目錄已提交的變動不會再次出現在之後的 work list，
+    因此需讀取所有尚未處理的清單，而不是只讀取最新一份
+    """
+    return [path for path in reversed(list_work_lists(root)) if path.name not in consumed]
+
+
+def parse_scraper_args(description: str) -> Dict:
+    """解析爬蟲腳本共用的命令列參數，回傳要傳給 SteamScraperBase 的額外參數"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--incremental", action="store_true",
+                        help="只爬取尚未處理的 work list 中的 AppID (需先執行 SteamGameID.py --incremental)")
+    parser.add_argument("--cache", action="store_true",
+                        help="啟用硬碟回應快取，以條件式請求重新爬取未變動的資料")
+    args = parser.parse_args()
+
+    scraper_kwargs = {"use_cache": args.cache}
+    if args.incremental:
+        if not list_work_lists():
+            raise SystemExit(
+                "找不到 work list，請先執行 python -m src.crawler.SteamGameID --incremental")
+        scraper_kwargs["incremental"] = True
+    return scraper_kwargs
+
+
 class SteamScraperBase:
     """
     Steam 通用爬蟲基底類別
     負責讀取遊戲 ID，根據傳入的 URL 模板訪問 Steam API 並儲存資料。
+    預設以 asyncio 同時發出多個請求，並依主機分別套用 Token Bucket 速率限制；
+    未安裝 httpx 或指定 use_async=False 時，退回逐筆請求的同步模式。
+    已寫入檔案的 AppID 會記錄於檢查點，重新執行時自動略過，不需手動調整檔案編號。
+    輸出格式預設為 append-only 的 JSONL，每批只附加新資料；亦可指定 'json' 使用舊版整檔覆寫格式。
+    指定 work_list 時只爬取清單中的 AppID，incremental 時爬取所有尚未處理的增量 work list (聯集)，
+    否則依序讀取所有 game_id 檔案；
+    指定 work_queue 時則作為 worker，從共用工作佇列租用 AppID，可同時執行多個程序或多台主機。
+    所有請求共用連線池；啟用 use_cache 時會以 ETag / Last-Modified 送出條件式請求。
+    每批資料寫入檔案時同步 upsert 至以 (appid, source) 為 key 的 raw 資料庫，供 ETL 依 AppID 合併各類資料。
+    失敗的 AppID 會連同原因記錄於 dead-letter queue，由 SteamRetry.py 另行重試。
+    執行期間會定期將請求速率、延遲、狀態碼與 ETA 等指標輸出至 data/metrics/<type>.json / .prom。
     """
 
-    def __init__(self, scraper_type: str, url_type: str, max_input_files: Optional[int] = None):
+    def __init__(self, scraper_type: str, url_type: str, max_input_files: Optional[int] = None,
+                 use_async: bool = True, concurrency: int = SCRAPER_CONCURRENCY,
+                 output_format: str = RAW_OUTPUT_FORMAT, work_list: Optional[Path] = None,
+                 use_cache: bool = False, work_queue=None, use_raw_store: bool = RAW_STORE_ENABLED,
+                 incremental: bool = False):
         """
         初始化爬蟲
         :param scraper_type: 爬蟲類型 (用於資料夾命名，如 'game_review', 'game_tag')
         :param url_type: API URL 模板 (需包含 {} 以供 format 使用)
         :param max_input_files: 指定要爬取幾個 Input ID 檔案 (預設為 None，代表爬完所有檔案)
+        :param use_async: 是否使用非同步爬取引擎 (預設為 True)
+        :param concurrency: 非同步模式下同時進行中的請求數
+        :param output_format: 輸出格式，'jsonl' (預設) 或 'json'
+        :param work_list: 指定的 work list 路徑 (預設為 None，代表讀取所有 game_id 檔案)
+        :param use_cache: 是否啟用硬碟回應快取 (預設為 False)
+        :param work_queue: 共用工作佇列 (SqliteWorkQueue / PostgresWorkQueue)，預設為 None (單一程序)
+        :param use_raw_store: 是否同步寫入 raw 資料庫 (RAW_STORE_PATH)
+        :param incremental: 讀取所有尚未處理的增量 work list (完成後記錄於檢查點，下次不再讀取)
         """
         self.root = PROJECT_ROOT
         self.scraper_type = scraper_type
         self.url_type = url_type
         self.max_input_files = max_input_files  # 新增參數儲存
+        self.use_async = use_async
+        self.concurrency = concurrency
+        self.output_format = output_format
+        self.work_list = work_list
+        self.work_queue = work_queue
         self._init_paths()
 
+        # Worker 模式：租約設定依爬蟲類型讀取 WORK_QUEUE_SETTINGS；各 worker 的指標與 metadata 分開輸出
+        self.worker_id = default_worker_id()
+        self.queue_settings = {**WORK_QUEUE_SETTINGS["default"],
+                               **WORK_QUEUE_SETTINGS.get(scraper_type, {})}
+        self.run_name = scraper_type if work_queue is None else f"{scraper_type}_{self.worker_id}"
+        if work_queue is not None and output_format != "jsonl":
+            raise ValueError("工作佇列模式僅支援 JSONL 輸出 (多個 worker 需各自寫入獨立檔案)")
+
         # 設定參數
         self.max_results_per_file = 2000
+        self.max_bytes_per_file = RAW_MAX_BYTES_PER_FILE  # 僅 JSONL 模式使用
+        self.compression_level = RAW_COMPRESSION_LEVEL    # 僅 JSONL 模式使用
         self.max_retries = 5
         self.retry_delay_base = 15
-        self.max_data_per_save = 200
+        # JSONL 每批只附加新資料，可以更頻繁地存檔以縮小中斷時的損失
+        self.max_data_per_save = 20 if output_format == "jsonl" else 200
+
+        # 依主機分別限制請求速率 (取代固定的 time.sleep)
+        self.rate_limiter = HostRateLimiter(HOST_RATE_LIMITS)
+
+        # 共用連線池與回應快取
+        self.session = get_session(self.concurrency)
+        self.response_cache: Optional[ResponseCache] = None
+        if use_cache:
+            self.response_cache = ResponseCache(
+                self.root / HTTP_CACHE_PATH, max_age=HTTP_CACHE_MAX_AGE)
 
         # 執行狀態追蹤
         self.id_file_num = 1
@@ -51,10 +187,44 @@ class SteamScraperBase:
         self.data_count = 0
         self.failed_list: List[int] = []
         self.failed_count = 0
+        self.skipped_count = 0
+        self.throttled_count = 0
+        self.unavailable_count = 0
         self.last_appid: Optional[int] = None
 
-        # 暫存容器
+        # 即時指標 (總數於 run() 開始時計算)
+        self.metrics = CrawlMetrics(
+            self.run_name, self.root / METRICS_PATH,
+            snapshot_interval=METRICS_SNAPSHOT_INTERVAL)
+
+        # 暫存容器 (JSONL 模式下只保存尚未寫入的一批資料)
         self.current_data_list: List[Dict] = []
+        self.jsonl_writer: Optional[JsonlWriter] = None
+        # 已加入暫存、但尚未寫入檔案的 AppID (寫入後才標記至檢查點)
+        self.pending_appids: List[int] = []
+
+        # 檢查點：記錄已完成的 AppID
+        self.checkpoint = CrawlCheckpoint(
+            self.metadata_folder / "checkpoint.sqlite")
+        self.done_appids: Dict[int, float] = {}
+
+        # 本次讀取的清單：指定的 work list，或所有尚未處理的增量 work list (由新到舊)
+        self.incremental_lists: List[Path] = []
+        self.work_lists: Optional[List[Path]] = [work_list] if work_list is not None else None
+        if incremental and work_list is None:
+            self.incremental_lists = pending_work_lists(self.checkpoint.consumed_work_lists(), self.root)
+            self.work_lists = self.incremental_lists
+            logger.info(f"尚未處理的 work list: {[path.name for path in self.incremental_lists]}")
+
+        # Dead-letter queue：記錄失敗的 AppID 與最後一次的失敗原因
+        self.dead_letters = DeadLetterQueue(self.root / DEAD_LETTER_PATH)
+        self.failure_reasons: Dict[int, str] = {}
+
+        # raw 資料庫：以 (appid, source) 保存每個 AppID 最新的資料
+        self.raw_store: Optional[RawStore] = None
+        if use_raw_store:
+            self.raw_store = RawStore(
+                self.root / RAW_STORE_PATH, compression_level=RAW_STORE_COMPRESSION_LEVEL)
 
         # 時間記錄
         self.start_time = datetime.now().strftime("%H:%M:%S")
@@ -73,40 +243,192 @@ class SteamScraperBase:
 
     def _fetch_single_data(self, app_id: int) -> Optional[Dict]:
         """
-        對單一 AppID 執行 API 請求
+        對單一 AppID 執行 API 請求 (同步模式)
         """
         # 使用初始化的 url_template
-        url = self.url_type.format(app_id)
-        tries = 1
+        return self._fetch_url(self.url_type.format(app_id), app_id)
 
-        while tries <= self.max_retries:
-            try:
-                # 建議加入 headers 模擬瀏覽器，降低被擋機率 (Optional but recommended)
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-                res = requests.get(url, headers=headers, timeout=10)
+    async def _fetch_single_data_async(self, client: "httpx.AsyncClient", app_id: int) -> Optional[Dict]:
+        """
+        對單一 AppID 執行 API 請求 (非同步模式)
+        """
+        return await self._fetch_url_async(client, self.url_type.format(app_id), app_id)
 
-                # 特定 API 可能回傳 200 但內容是 null，需視情況處理
-                if res.status_code != 200:
-                    logger.warning(f"AppID {app_id} 回傳狀態碼: {res.status_code}")
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        if self.response_cache is None:
+            return {}
+        return self.response_cache.conditional_headers(url)
 
-                # 這裡假設回傳的一定是 JSON
-                return res.json()
+    def _parse_response(self, url: str, res) -> Optional[Dict]:
+        """
+        解析回應 JSON；啟用快取時 304 會改用快取內容，200 則更新快取
+        304 但快取已不存在時拋出 CacheMissError (conditional_headers 已不會再帶條件式標頭，重新請求即可)
+        """
+        if self.response_cache is None:
+            return res.json()
+        content = self.response_cache.resolve(
+            url, res.status_code, res.headers, res.content)
+        if content is None:
+            raise CacheMissError(url)
+        return decode(content)
+
+    def _get_fresh_cache(self, url: str) -> Optional[Dict]:
+        """max_age 內的快取直接使用，不發出請求"""
+        if self.response_cache is None:
+            return None
+        cached = self.response_cache.get_fresh(url)
+        return decode(cached) if cached is not None else None
+
+    def _classify_response(self, url: str, app_id: int, res, failure_reasons: Dict[int, str],
+                           fallback_pause: float) -> Tuple[str, Optional[Dict]]:
+        """
+        判斷回應結果並回饋給該主機的 AIMD 速率控制 (限流時依 Retry-After 暫停整個主機的 bucket)
+        :param failure_reasons: 記錄失敗原因的字典 (見 _fetch_url)
+        :param fallback_pause: 限流但沒有 Retry-After 時的暫停秒數
+        :return: (結果, 資料)；結果為 'ok' / 'retry' / 'refetch' / 'fail'
+                 ('refetch' 為 304 但快取已不存在，不帶條件式標頭立即重新請求)
+        """
+        bucket = self.rate_limiter.bucket_for(url)
+
+        if is_throttle_status(res.status_code):
+            retry_after = parse_retry_after(res.headers.get("Retry-After"))
+            bucket.on_throttle(retry_after, fallback_pause)
+            self.throttled_count += 1
+            self.metrics.record_event("throttled")
+            failure_reasons[app_id] = f"HTTP {res.status_code}"
+            logger.warning(
+                f"AppID {app_id} 遭到限流 (狀態碼: {res.status_code}, Retry-After: {retry_after})，"
+                f"速率降為 {bucket.rate:.2f} 次/秒")
+            return "retry", None
+
+        if res.status_code not in (200, 304):
+            # 其他 4xx 重試也不會成功，且內容不是 JSON，直接視為失敗
+            failure_reasons[app_id] = f"HTTP {res.status_code}"
+            logger.warning(f"AppID {app_id} 回傳狀態碼: {res.status_code}，不再重試")
+            return "fail", None
+
+        try:
+            data = self._parse_response(url, res)
+        except CacheMissError:
+            failure_reasons[app_id] = "HTTP 304 (無快取內容)"
+            return "refetch", None
+        if data is None:
+            # appdetails 限流時可能回傳 200 與 null 內容，同樣視為限流
+            bucket.on_throttle(None, fallback_pause)
+            self.throttled_count += 1
+            self.metrics.record_event("throttled")
+            failure_reasons[app_id] = "空內容 (null)"
+            logger.warning(f"AppID {app_id} 回傳空內容，視為限流，速率降為 {bucket.rate:.2f} 次/秒")
+            return "retry", None
+
+        bucket.on_success()
+        if is_unavailable_response(data):
+            # {"success": false} 代表該 App 無資料 (下架、地區限制等)，不是限流，保留結果供 ETL 略過
+            self.unavailable_count += 1
+            self.metrics.record_event("unavailable")
+        return "ok", data
+
+    def _fetch_url(self, url: str, app_id: int, failure_reasons: Optional[Dict[int, str]] = None) -> Optional[Dict]:
+        """
+        請求單一 URL 並解析 JSON，包含重試機制 (同步模式)
+        限流時依 Retry-After 暫停整個主機的 bucket (下一次 acquire 會一併等待)；連線錯誤則等待後重試
+        :param failure_reasons: 記錄失敗原因的字典 (預設為 self.failure_reasons；同一 AppID 同時請求多個端點時各自傳入)
+        """
+        if failure_reasons is None:
+            failure_reasons = self.failure_reasons
+        cached_data = self._get_fresh_cache(url)
+        if cached_data is not None:
+            return cached_data
+
+        for tries in range(1, self.max_retries + 1):
+            if tries > 1:
+                self.metrics.record_retry(url)
+            try:
+                # 依主機速率限制等待可用的請求額度
+                self.rate_limiter.acquire(url)
+                request_start = time.perf_counter()
+                try:
+                    res = self.session.get(
+                        url, headers=self._conditional_headers(url), timeout=10)
+                except Exception:
+                    self.metrics.record_request(
+                        url, "error", time.perf_counter() - request_start)
+                    raise
+                self.metrics.record_request(
+                    url, res.status_code, time.perf_counter() - request_start, len(res.content))
+                outcome, data = self._classify_response(
+                    url, app_id, res, failure_reasons, fallback_pause=tries * self.retry_delay_base)
 
             except Exception as e:
+                failure_reasons[app_id] = f"{type(e).__name__}: {e}"
                 logger.warning(f"爬取 AppID {app_id} 發生錯誤 (第 {tries} 次): {e}")
                 if tries < self.max_retries:
                     sleep_time = tries * self.retry_delay_base
                     logger.info(f"等待 {sleep_time} 秒後重試...")
                     time.sleep(sleep_time)
-                    tries += 1
-                else:
-                    logger.error(f"已達重試上限，跳過 AppID {app_id}")
-                    return None
+                continue
+
+            if outcome == "refetch":
+                continue
+            if outcome != "retry":
+                return data
+
+        logger.error(f"已達重試上限，跳過 AppID {app_id}")
+        failure_reasons[app_id] = f"已達重試上限 ({failure_reasons.get(app_id)})"
+        return None
+
+    async def _fetch_url_async(self, client: "httpx.AsyncClient", url: str, app_id: int,
+                               failure_reasons: Optional[Dict[int, str]] = None) -> Optional[Dict]:
+        """
+        請求單一 URL 並解析 JSON (非同步模式)，重試邏輯與同步模式相同
+        """
+        if failure_reasons is None:
+            failure_reasons = self.failure_reasons
+        cached_data = self._get_fresh_cache(url)
+        if cached_data is not None:
+            return cached_data
+
+        for tries in range(1, self.max_retries + 1):
+            if tries > 1:
+                self.metrics.record_retry(url)
+            try:
+                await self.rate_limiter.acquire_async(url)
+                request_start = time.perf_counter()
+                try:
+                    res = await client.get(url, headers=self._conditional_headers(url))
+                except Exception:
+                    self.metrics.record_request(
+                        url, "error", time.perf_counter() - request_start)
+                    raise
+                self.metrics.record_request(
+                    url, res.status_code, time.perf_counter() - request_start, len(res.content))
+                outcome, data = self._classify_response(
+                    url, app_id, res, failure_reasons, fallback_pause=tries * self.retry_delay_base)
+
+            except Exception as e:
+                failure_reasons[app_id] = f"{type(e).__name__}: {e}"
+                logger.warning(f"爬取 AppID {app_id} 發生錯誤 (第 {tries} 次): {e}")
+                if tries < self.max_retries:
+                    sleep_time = tries * self.retry_delay_base
+                    logger.info(f"等待 {sleep_time} 秒後重試...")
+                    await asyncio.sleep(sleep_time)
+                continue
+
+            if outcome == "refetch":
+                continue
+            if outcome != "retry":
+                return data
+
+        logger.error(f"已達重試上限，跳過 AppID {app_id}")
+        failure_reasons[app_id] = f"已達重試上限 ({failure_reasons.get(app_id)})"
         return None
 
     def _save_batch_data(self):
         """儲存目前的資料列表到 JSON 檔案"""
+        if self.output_format == "jsonl":
+            self._append_batch_data()
+            return
+
         now_time = datetime.now().strftime("%H:%M:%S")
         data_structure = {
             "update_date": self.now_date,
@@ -117,12 +439,59 @@ class SteamScraperBase:
         filename = f"{self.scraper_type}_{self.output_file_num}.json"
         save_path = self.data_folder / filename
 
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(data_structure, f, ensure_ascii=False, indent=2)
+        write_json(save_path, data_structure)
+
+        # 整檔覆寫模式下，尚未寫入的資料為列表最後 len(pending_appids) 筆
+        if self.pending_appids:
+            self._store_batch(self.current_data_list[-len(self.pending_appids):])
+        # 資料確實寫入後才更新檢查點，確保中斷時不會漏資料
+        self._mark_written()
 
         logger.info(
             f"資料已更新至: {filename} (目前累積 {len(self.current_data_list)} 筆)")
 
+    def _append_batch_data(self):
+        """JSONL 模式：僅將尚未寫入的一批資料附加到檔案 (由 writer 負責 fsync 與換檔)"""
+        if self.jsonl_writer is None:
+            self.jsonl_writer = JsonlWriter(
+                folder=self.data_folder,
+                prefix=self.scraper_type,
+                max_records_per_file=self.max_results_per_file,
+                max_bytes_per_file=self.max_bytes_per_file,
+                start_file_num=self.output_file_num,
+                exclusive=self.work_queue is not None,
+                compression_level=self.compression_level)
+
+        batch_size = len(self.current_data_list)
+        self.jsonl_writer.write_batch(self.current_data_list)
+        self._store_batch(self.current_data_list)
+        self.current_data_list.clear()
+        self.output_file_num = self.jsonl_writer.file_num
+
+        self._mark_written()
+
+        logger.info(
+            f"已附加 {batch_size} 筆資料至: {self.jsonl_writer.current_path.name} (累積 {self.data_count} 筆)")
+
+    def _store_batch(self, records: List[Dict]):
+        """將一批資料 upsert 至 raw 資料庫 (合併爬蟲的資料依類型拆開)"""
+        if self.raw_store is None or not records:
+            return
+        self.raw_store.put_many(
+            entry for record in records for entry in raw_store_entries(self.scraper_type, record))
+
+    def _mark_written(self):
+        """資料寫入檔案後：更新檢查點、自 dead-letter queue 移除，並回報工作佇列已完成"""
+        self.checkpoint.mark_done(self.pending_appids)
+        self.dead_letters.remove(self.scraper_type, self.pending_appids)
+        if self.work_queue is not None:
+            self.work_queue.complete(self.scraper_type, self.pending_appids)
+        self.pending_appids.clear()
+
+    def _extra_metadata(self) -> Dict:
+        """子類別可覆寫，加入額外的執行報告欄位"""
+        return {}
+
     def _save_metadata(self):
         """儲存最終的執行報告"""
         end_time = datetime.now().strftime("%H:%M:%S")
@@ -135,86 +504,298 @@ class SteamScraperBase:
             "failed_count": self.failed_count,
             "failed_list": self.failed_list,
             "data_count": self.data_count,
+            "skipped_count": self.skipped_count,
+            "throttled_count": self.throttled_count,
+            "unavailable_count": self.unavailable_count,
+            "dead_letter_count": self.dead_letters.count(self.scraper_type),
+            "final_rates": self.rate_limiter.current_rates(),
+            "work_lists": [path.name for path in self.work_lists] if self.work_lists is not None else None,
+            "worker_id": self.worker_id if self.work_queue is not None else None,
             "last_appid": self.last_appid
         }
+        if self.response_cache is not None:
+            metadata.update(self.response_cache.stats())
+        metadata.update(self._extra_metadata())
+        metadata["metrics"] = self._update_metrics(force=True)
 
-        filename = f"{now_date_filename}_metadata_{self.scraper_type}.json"
+        filename = f"{now_date_filename}_metadata_{self.run_name}.json"
         save_path = self.metadata_folder / filename
 
-        with open(save_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        write_json(save_path, metadata)
 
         logger.info(f"Metadata 已儲存至: {save_path}")
 
-    def run(self):
-        """執行爬蟲的主流程"""
-        logger.info(f"啟動 {self.scraper_type} 爬蟲...")
+    def _is_up_to_date(self, game: Dict) -> bool:
+        """檢查點中已完成、且完成時間晚於 Steam 最後修改時間的 AppID 不需重新爬取"""
+        fetched_at = self.done_appids.get(game["appid"])
+        return fetched_at is not None and fetched_at >= game.get("last_modified", 0)
 
-        # 新增變數：記錄目前已處理了幾個檔案
-        files_processed_count = 0
-
-        while True:
-            # 新增邏輯：檢查是否已達到指定的 input 檔案數量上限
-            if self.max_input_files is not None and files_processed_count >= self.max_input_files:
-                logger.info(
-                    f"已達到設定的讀取檔案數量上限 ({self.max_input_files} 個檔案)，停止爬蟲。")
-                break
+    def _iter_game_list(self, list_path: Path, seen: Optional[Set[int]] = None) -> Iterator[Tuple[str, int]]:
+        """
+        逐筆讀取單一清單檔案，略過檢查點中已是最新的 AppID
+        :param seen: 讀取多個 work list 時已出現過的 AppID (每個 AppID 只以最新清單中的資料判斷一次)
+        """
+        list_filename = list_path.name
+        logger.info(f"正在讀取清單檔案: {list_filename}")
 
-            id_filename = f"game_id_{self.id_file_num}.json"
-            id_file_path = self.id_folder / id_filename
+        skipped_before = self.skipped_count
 
-            if not id_file_path.exists():
-                logger.info(f"找不到檔案 {id_filename}，視為所有清單處理完畢。")
+        for game in iter_data_file(list_path):
+            app_id = game.get("appid")
+            if not app_id:
+                continue
+            if seen is not None:
+                if app_id in seen:
+                    continue
+                seen.add(app_id)
+            if self._is_up_to_date(game):
+                self.skipped_count += 1
+                continue
+            yield list_filename, app_id
+
+        if self.skipped_count > skipped_before:
+            logger.info(
+                f"[{list_filename}] 略過 {self.skipped_count - skipped_before} 筆已完成的 AppID")
+
+    def _list_paths(self) -> List[Path]:
+        """本次要讀取的清單檔案 (work list，或依編號排列的 game_id 檔案，最多 max_input_files 個)"""
+        if self.work_lists is not None:
+            return self.work_lists
+
+        list_paths = []
+        file_num = self.id_file_num
+        # 檢查是否已達到指定的 input 檔案數量上限
+        while self.max_input_files is None or len(list_paths) < self.max_input_files:
+            id_file_path = find_data_file(self.id_folder, "game_id", file_num)
+            if id_file_path is None:
                 break
-
-            logger.info(f"正在讀取清單檔案: {id_filename}")
-
-            with open(id_file_path, 'r', encoding='utf-8') as f:
-                game_list_data = json.load(f)
-
-            game_list = game_list_data.get("data", [])
-
-            for game in game_list:
+            list_paths.append(id_file_path)
+            file_num += 1
+        return list_paths
+
+    def _estimate_total(self) -> Optional[int]:
+        """計算本次需要爬取的數量 (只讀取清單，不發出請求)，用於指標中的 ETA"""
+        if self.work_queue is not None:
+            # 佇列中剩餘的項目由所有 worker 共同處理
+            return self.work_queue.counts(self.scraper_type).get(PENDING, 0)
+        total = 0
+        seen: Set[int] = set()
+        for list_path in self._list_paths():
+            for game in iter_data_file(list_path):
                 app_id = game.get("appid")
-                if not app_id:
-                    continue
-
-                logger.info(
-                    f"[{id_filename}] 開始處理第 {self.data_count + 1} 筆資料 (AppID: {app_id})...")
-
-                # 呼叫 API 抓取
-                single_data = self._fetch_single_data(app_id)
-
-                # 先檢查是否抓取成功，再進行字典操作
-                if single_data:
-                    # 有些 API 回傳是 List 而非 Dict (如 Tag)，需做防呆
-                    if isinstance(single_data, dict):
-                        single_data["appid"] = app_id
-                    elif isinstance(single_data, list):
-                        # 如果 API 回傳 list，將其包裝成 dict 以便加入 appid
-                        single_data = {"appid": app_id, "results": single_data}
-
-                    self.current_data_list.append(single_data)
-                    self.last_appid = app_id
-                    self.data_count += 1
+                if app_id and app_id not in seen:
+                    seen.add(app_id)
+                    total += not self._is_up_to_date(game)
+        return total
+
+    def _iter_app_ids(self) -> Iterator[Tuple[str, int]]:
+        """依序讀取 game_id 清單檔案 (或 work list / 工作佇列)，逐筆產生 (清單檔名, AppID)"""
+        if self.work_queue is not None:
+            yield from self._iter_leased_app_ids()
+            return
+
+        if self.work_lists is not None:
+            seen: Set[int] = set()
+            for list_path in self.work_lists:
+                yield from self._iter_game_list(list_path, seen)
+            return
+
+        list_paths = self._list_paths()
+        for id_file_path in list_paths:
+            yield from self._iter_game_list(id_file_path)
+            # 檔案處理完畢，計數器 +1
+            self.id_file_num += 1
 
-                    if self.data_count % self.max_data_per_save == 0:
-                        self._save_batch_data()
+        if self.max_input_files is not None and len(list_paths) >= self.max_input_files:
+            logger.info(
+                f"已達到設定的讀取檔案數量上限 ({self.max_input_files} 個檔案)，停止爬蟲。")
+        else:
+            logger.info(
+                f"找不到檔案 game_id_{self.id_file_num}，視為所有清單處理完畢。")
 
-                    if len(self.current_data_list) >= self.max_results_per_file:
-                        logger.info(
-                            f"單檔達到 {self.max_results_per_file} 筆上限，切換至新檔案。")
-                        self.output_file_num += 1
-                        self.current_data_list.clear()
+    def _iter_leased_app_ids(self) -> Iterator[Tuple[str, int]]:
+        """Worker 模式：反覆向工作佇列租用一批 AppID，直到佇列中沒有可處理的項目"""
+        while True:
+            app_ids = self.work_queue.lease(
+                self.scraper_type, self.worker_id,
+                batch_size=self.queue_settings["batch_size"],
+                lease_seconds=self.queue_settings["lease_seconds"])
+            if not app_ids:
+                logger.info("工作佇列中已沒有待處理的 AppID。")
+                return
+            logger.info(f"[{self.worker_id}] 租用 {len(app_ids)} 筆 AppID ({app_ids[0]} ~ {app_ids[-1]})")
+            for app_id in app_ids:
+                yield "work_queue", app_id
+
+    def enqueue_pending(self) -> int:
+        """將 game_id 檔案 (或 work list) 中需要爬取的 AppID 加入工作佇列，供 worker 取用"""
+        self.done_appids = self.checkpoint.load_done()
+        work_queue, self.work_queue = self.work_queue, None
+        try:
+            app_ids = [app_id for _, app_id in self._iter_app_ids()]
+        finally:
+            self.work_queue = work_queue
+        enqueued_count = self.work_queue.enqueue(self.scraper_type, app_ids)
+        # 已加入佇列的 AppID 改由 worker 處理，work list 視為已處理完畢
+        self._mark_work_lists_consumed()
+        logger.info(f"已將 {enqueued_count} 筆 AppID 加入 {self.scraper_type} 工作佇列")
+        return enqueued_count
+
+    def _mark_work_lists_consumed(self):
+        if self.incremental_lists:
+            self.checkpoint.mark_work_lists_consumed(path.name for path in self.incremental_lists)
+            logger.info(f"已處理完畢的 work list: {[path.name for path in self.incremental_lists]}")
+
+    def _update_metrics(self, force: bool = False) -> Optional[Dict]:
+        """更新各主機目前速率並輸出指標 (force=False 時依 snapshot_interval 節流)"""
+        self.metrics.set_gauge("rate_limit", self.rate_limiter.current_rates(), label="host")
+        return self.metrics.write() if force else self.metrics.maybe_write()
+
+    def _add_dead_letter(self, app_id: int):
+        """將失敗的 AppID 連同最後一次的失敗原因記錄至 dead-letter queue"""
+        reason = self.failure_reasons.pop(app_id, None) or "未知原因"
+        self.dead_letters.add(self.scraper_type, app_id, reason)
+        # 失敗者改由 SteamRetry.py 重試，工作佇列不再重新分派
+        if self.work_queue is not None:
+            self.work_queue.fail(self.scraper_type, [app_id])
+
+    def _handle_result(self, app_id: int, single_data: Optional[Dict]):
+        """將單筆 API 結果加入暫存，並處理分批存檔與換檔"""
+        # 先檢查是否抓取成功，再進行字典操作
+        if not single_data:
+            self.failed_count += 1
+            self.failed_list.append(app_id)
+            self._add_dead_letter(app_id)
+            self.metrics.record_items(failed=1)
+            self._update_metrics()
+            return
+
+        # 有些 API 回傳是 List 而非 Dict (如 Tag)，需做防呆
+        if isinstance(single_data, dict):
+            single_data["appid"] = app_id
+        elif isinstance(single_data, list):
+            # 如果 API 回傳 list，將其包裝成 dict 以便加入 appid
+            single_data = {"appid": app_id, "results": single_data}
+
+        self.failure_reasons.pop(app_id, None)
+        self.current_data_list.append(single_data)
+        self.pending_appids.append(app_id)
+        self.last_appid = app_id
+        self.data_count += 1
+        self.metrics.record_items(ok=1)
+        self._update_metrics()
+
+        if self.data_count % self.max_data_per_save == 0:
+            self._save_batch_data()
+
+        if len(self.current_data_list) >= self.max_results_per_file:
+            logger.info(
+                f"單檔達到 {self.max_results_per_file} 筆上限，切換至新檔案。")
+            self.output_file_num += 1
+            self.current_data_list.clear()
+
+    def _run_sync(self):
+        """同步模式：逐筆請求，速率由 rate_limiter 控制"""
+        for id_filename, app_id in self._iter_app_ids():
+            logger.info(
+                f"[{id_filename}] 開始處理第 {self.data_count + 1} 筆資料 (AppID: {app_id})...")
+
+            # 呼叫 API 抓取
+            single_data = self._fetch_single_data(app_id)
+            self._handle_result(app_id, single_data)
+
+    async def _run_async(self):
+        """
+        非同步模式：以固定數量的 worker 同時請求，速率由各主機的 Token Bucket 控制
+        任一 worker 發生例外時，TaskGroup 會取消其他 worker 與放入佇列的迴圈 (避免佇列已滿時永遠等待)
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        # 結果處理 (寫檔 fsync、檢查點、raw 資料庫) 在背景執行緒中逐筆執行，不阻塞進行中的請求
+        result_lock = asyncio.Lock()
+
+        async with create_async_client(self.concurrency) as client:
+
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+
+                    id_filename, app_id = item
+                    logger.info(
+                        f"[{id_filename}] 開始處理 AppID: {app_id} (已完成 {self.data_count} 筆)...")
+
+                    single_data = await self._fetch_single_data_async(client, app_id)
+                    async with result_lock:
+                        await asyncio.to_thread(self._handle_result, app_id, single_data)
+
+            async with asyncio.TaskGroup() as task_group:
+                workers = [task_group.create_task(worker())
+                           for _ in range(self.concurrency)]
+
+                for item in self._iter_app_ids():
+                    await queue.put(item)
+
+                # 送出結束訊號，每個 worker 各一個
+                for _ in workers:
+                    await queue.put(None)
+
+    def _run_engine(self):
+        """依設定選擇非同步或同步模式爬取所有 AppID"""
+        if self.use_async and httpx is not None:
+            logger.info(f"使用非同步模式 (同時請求數: {self.concurrency})")
+            asyncio.run(self._run_async())
+        else:
+            if self.use_async:
+                logger.warning("未安裝 httpx，改用同步模式執行。")
+            self._run_sync()
 
-                    time.sleep(2)
-                else:
-                    self.failed_count += 1
-                    self.failed_list.append(app_id)
+    def run(self):
+        """執行爬蟲的主流程"""
+        logger.info(f"啟動 {self.scraper_type} 爬蟲...")
 
-            # 檔案處理完畢，計數器 +1
-            files_processed_count += 1
-            self.id_file_num += 1
+        # 從檢查點載入已完成的 AppID，並接續在既有檔案之後輸出，避免覆寫
+        self.done_appids = self.checkpoint.load_done()
+        self.output_file_num = max(
+            self.output_file_num, next_file_num(self.data_folder, self.scraper_type))
+        logger.info(
+            f"檢查點已記錄 {len(self.done_appids)} 筆完成的 AppID，輸出自 {self.scraper_type}_{self.output_file_num} 開始")
+        self.metrics.total = self._estimate_total()
+        logger.info(f"本次預計爬取 {self.metrics.total} 筆，即時指標輸出至 {self.metrics.json_path}")
+
+        heartbeat = None
+        if self.work_queue is not None:
+            heartbeat = LeaseHeartbeat(
+                self.work_queue, self.scraper_type, self.worker_id,
+                lease_seconds=self.queue_settings["lease_seconds"],
+                interval=self.queue_settings["heartbeat_interval"])
+            heartbeat.start()
+
+        completed = False
+        try:
+            self._run_engine()
+            completed = True
+        finally:
+            # 無論正常結束或中斷，都將尚未寫入的資料存檔
+            if self.pending_appids:
+                self._save_batch_data()
+            # 只有完整跑完時才記錄 work list 已處理 (中斷時下次仍讀取，已完成的 AppID 由檢查點略過)
+            if completed:
+                self._mark_work_lists_consumed()
+            if self.jsonl_writer is not None:
+                self.jsonl_writer.close()
+            if heartbeat is not None:
+                heartbeat.stop()
+                # 已寫入者已標記完成，其餘租約交還給其他 worker
+                released_count = self.work_queue.release(self.scraper_type, self.worker_id)
+                if released_count:
+                    logger.info(f"已交還 {released_count} 筆未完成的租約")
+            self._save_metadata()
+            self.checkpoint.close()
+            if self.raw_store is not None:
+                self.raw_store.close()
+            self.dead_letters.close()
+            if self.response_cache is not None:
+                self.response_cache.close()
 
-        self._save_metadata()
         logger.info("爬蟲任務全部完成！")
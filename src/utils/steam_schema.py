@@ -0,0 +1,142 @@
+from typing import Any, Dict, Generic, List, TypeVar, Union
+
+try:
+    from msgspec import UNSET, Struct, UnsetType
+except ImportError:
+    # 未安裝 msgspec 時以下型別只作為文件 (fast_json.typed_decoder 改為完整解碼)
+    class Struct:
+        pass
+
+    UNSET, UnsetType = None, type(None)
+
+# raw / processed 資料的型別 (搭配 src.utils.fast_json.typed_decoder 使用)
+# 只定義 ETL 會用到的欄位：appdetails 的 screenshots、movies、package_groups 等大型欄位在解析時直接略過。
+# 欄位預設為 UNSET：原始資料缺少的欄位不會出現在解碼結果中，與以 dict 過濾欄位的結果相同 (null 仍保留為 None)。
+# 欄位內容不檢查型別 (Any)，Steam 回傳的格式不一致時 (例如硬體需求為 [] 或 dict) 照原樣保留。
+# 解碼結果的欄位依這裡定義的順序排列，因此與 API 回應的欄位順序一致，轉換後的欄位順序不變。
+
+T = TypeVar("T")
+
+# 可能缺少的欄位
+Field = Union[Any, UnsetType]
+
+
+class GameInfoData(Struct):
+    """appdetails 的 data (欄位與 constant.py 的 INFO_MAIN_COLS 相同，依 API 回應的順序排列)"""
+    type: Field = UNSET
+    name: Field = UNSET
+    steam_appid: Field = UNSET
+    required_age: Field = UNSET
+    is_free: Field = UNSET
+    detailed_description: Field = UNSET
+    about_the_game: Field = UNSET
+    short_description: Field = UNSET
+    supported_languages: Field = UNSET
+    pc_requirements: Field = UNSET
+    mac_requirements: Field = UNSET
+    linux_requirements: Field = UNSET
+    developers: Field = UNSET
+    publishers: Field = UNSET
+    price_overview: Field = UNSET
+    platforms: Field = UNSET
+    metacritic: Field = UNSET
+    categories: Field = UNSET
+    genres: Field = UNSET
+    release_date: Field = UNSET
+
+
+class AppDetails(Struct):
+    """appdetails 單一 App 的結果 ({"success": ..., "data": {...}})；免費或下架的 App 的 data 可能是空列表"""
+    success: Field = UNSET
+    data: Union[GameInfoData, List[Any], None, UnsetType] = UNSET
+
+
+# game_info 的一筆資料：{"<appid>": AppDetails, "appid": <appid>}
+GameInfoRecord = Dict[str, Union[AppDetails, int, str, None]]
+
+
+class GameReviewRecord(Struct):
+    """appreviews 的結果 (欄位與 REVIEW_MAIN_COLS 相同)，略過評論內文"""
+    query_summary: Field = UNSET
+    appid: Field = UNSET
+
+
+class GameTagRecord(Struct):
+    """SteamSpy appdetails 的結果 (欄位與 TAG_MAIN_COLS 相同)，略過擁有者數、同時在線人數等欄位"""
+    appid: Field = UNSET
+    name: Field = UNSET
+    languages: Field = UNSET
+    tags: Field = UNSET
+
+
+class GameCombinedRecord(Struct):
+    """合併爬蟲 (game_combined) 的一筆資料"""
+    appid: Field = UNSET
+    game_info: Union[GameInfoRecord, None, UnsetType] = UNSET
+    game_review: Union[GameReviewRecord, None, UnsetType] = UNSET
+    game_tag: Union[GameTagRecord, None, UnsetType] = UNSET
+
+
+class DataFile(Struct, Generic[T]):
+    """舊版整檔 JSON 的資料檔 ({"update_date": ..., "update_time": ..., "data": [...]})"""
+    data: List[T] = []
+
+
+# raw 資料類型對應的型別 (raw 資料庫的 source 名稱與資料夾名稱相同)
+RAW_RECORD_TYPES = {
+    "game_info": GameInfoRecord,
+    "game_review": GameReviewRecord,
+    "game_tag": GameTagRecord,
+    "game_combined": GameCombinedRecord,
+}
+
+
+class GameRecord(Struct):
+    """
+    ETL_json 輸出的一筆資料 (processed json_data)
+    硬體需求依 Steam 提供的規格攤平為 {平台}_requirements_{規格}，只定義 minimum / recommended
+    (需要完整欄位的 ETL_document 不使用此型別)
+    """
+    type: Field = UNSET
+    name: Field = UNSET
+    steam_appid: Field = UNSET
+    required_age: Field = UNSET
+    is_free: Field = UNSET
+    detailed_description: Field = UNSET
+    about_the_game: Field = UNSET
+    short_description: Field = UNSET
+    supported_languages: Field = UNSET
+    mac_requirements: Field = UNSET
+    linux_requirements: Field = UNSET
+    developers: Field = UNSET
+    publishers: Field = UNSET
+    price_overview: Field = UNSET
+    platforms: Field = UNSET
+    categories: Field = UNSET
+    genres: Field = UNSET
+    languages: Field = UNSET
+    tags: Field = UNSET
+    pc_requirements_minimum: Field = UNSET
+    pc_requirements_recommended: Field = UNSET
+    mac_requirements_minimum: Field = UNSET
+    mac_requirements_recommended: Field = UNSET
+    linux_requirements_minimum: Field = UNSET
+    linux_requirements_recommended: Field = UNSET
+    price_initial: Field = UNSET
+    price_currency: Field = UNSET
+    metacritic_score: Field = UNSET
+    release_date: Field = UNSET
+    release_date_timestamp: Field = UNSET
+    release_date_year: Field = UNSET
+    release_date_month: Field = UNSET
+    review_score_desc: Field = UNSET
+    total_positive: Field = UNSET
+    total_negative: Field = UNSET
+    total_reviews: Field = UNSET
+    positive_rate: Field = UNSET
+    rate_percentage: Field = UNSET
+
+
+class ProcessedAppId(Struct):
+    """只讀取 processed json_data 的 AppID (價格更新的清單)"""
+    steam_appid: Field = UNSET
@@ -0,0 +1,165 @@
+import re
+import zlib
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import tiktoken
+except ImportError:
+    # 未安裝 tiktoken 時以字元數估計 token 數 (只用於統計)
+    tiktoken = None
+
+# 斷詞：中日韓文字每個字為一個 token，其他文字以連續的字母 / 數字為一個 token
+_CJK_CHARS = "぀-ヿ㐀-䶿一-鿿가-힯"
+TOKEN_PATTERN = re.compile(rf"[{_CJK_CHARS}]|[^\W{_CJK_CHARS}]+")
+
+# 未安裝 tiktoken 時，每個 token 約對應的字元數 (英文文字)
+CHARS_PER_TOKEN = 4
+
+# MinHash 的雜湊函式 (a * x + b) mod p，x 與 a 皆小於 2^32，乘積不會超出 uint64
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+_tokenizer = None
+
+
+def text_tokens(text: str) -> List[str]:
+    """將文字轉為小寫的 token 列表 (忽略標點與空白)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def shingles(tokens: List[str], size: int) -> FrozenSet[Tuple[str, ...]]:
+    """
+    連續 size 個 token 為一個 shingle；token 數不足 size 時整段為一個 shingle
+    沒有 token 時回傳空集合
+    """
+    if len(tokens) <= size:
+        return frozenset([tuple(tokens)]) if tokens else frozenset()
+    return frozenset(tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+
+
+def coverage(part: FrozenSet, whole: FrozenSet) -> float:
+    """part 的 shingle 有多少比例出現在 whole 中 (part 為空時回傳 0)"""
+    if not part:
+        return 0.0
+    return len(part & whole) / len(part)
+
+
+def redundant_fields(fields: Dict[str, Optional[str]], shingle_size: int, threshold: float) -> Dict[str, str]:
+    """
+    找出內容重複的欄位：依 token 數由多到少 (相同時依欄位順序) 逐一保留，
+    與已保留的欄位相同或 shingle 重疊比例達 threshold 者視為重複
+    (短於 shingle_size 個 token 的欄位改以其 token 數為 shingle 大小，即是否整段出現在已保留的欄位中)
+    例如 about_the_game 與 detailed_description 相同時保留 detailed_description，
+    short_description 為 detailed_description 的其中一句時亦視為重複
+    :param fields: {欄位名稱: 文字}，None 或空白的欄位不列入比較
+    :return: {重複的欄位: 涵蓋其內容的欄位}
+    """
+    candidates = []
+    for position, (col, text) in enumerate(fields.items()):
+        tokens = text_tokens(text) if isinstance(text, str) else []
+        if tokens:
+            candidates.append((-len(tokens), position, col, text, tokens))
+    candidates.sort()
+
+    kept: List[Tuple[str, str, List[str], Dict[int, FrozenSet]]] = []
+    dropped: Dict[str, str] = {}
+    for _, _, col, text, tokens in candidates:
+        size = min(shingle_size, len(tokens))
+        col_shingles = shingles(tokens, size)
+        for kept_col, kept_text, kept_tokens, kept_shingles in kept:
+            if size not in kept_shingles:
+                kept_shingles[size] = shingles(kept_tokens, size)
+            if text == kept_text or coverage(col_shingles, kept_shingles[size]) >= threshold:
+                dropped[col] = kept_col
+                break
+        else:
+            kept.append((col, text, tokens, {size: col_shingles}))
+    return dropped
+
+
+def count_tokens(text: str) -> int:
+    """以 cl100k_base (與文件切割相同的 tokenizer) 計算 token 數；未安裝 tiktoken 時以字元數估計"""
+    global _tokenizer
+    if tiktoken is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    if _tokenizer is None:
+        _tokenizer = tiktoken.get_encoding("cl100k_base")
+    return len(_tokenizer.encode(text, disallowed_special=()))
+
+
+class MinHasher:
+    """
+    MinHash 簽章：以 num_perm 個雜湊函式近似 shingle 集合的 Jaccard 相似度
+    相同 seed 的簽章可互相比較 (shingle 以 crc32 雜湊，不受 PYTHONHASHSEED 影響)
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Iterable[Tuple[str, ...]]) -> np.ndarray:
+        """回傳 uint32 的簽章 (長度 num_perm)；空集合的簽章全為最大值"""
+        hashes = np.fromiter((zlib.crc32(" ".join(shingle).encode("utf-8")) for shingle in shingle_set),
+                             dtype=np.uint64)
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        values = (hashes[:, None] * self.a + self.b) % MERSENNE_PRIME & MAX_HASH
+        return values.min(axis=0).astype(np.uint32)
+
+
+def estimated_jaccard(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """以兩個簽章相同位置的比例估計 Jaccard 相似度"""
+    return float(np.count_nonzero(signature_a == signature_b)) / len(signature_a)
+
+
+def lsh_clusters(keys: Sequence[Hashable], signatures: np.ndarray, bands: int, threshold: float) -> List[List]:
+    """
+    以 LSH 將簽章分群：簽章切為 bands 段，任一段完全相同者為候選，
+    候選所在的群組與另一群組的每一對成員估計的 Jaccard 相似度皆達 threshold 才合併
+    (complete linkage：群內任兩筆都相似，A≈B、B≈C 但 A 與 C 不相似時不會經由 B 串成同一群)
+    每筆只與同一 bucket 中先前成員所在的群組比較，近似重複的成員合併後只需比較一次
+    :param keys: 每個簽章的識別值 (如 AppID)
+    :param signatures: (len(keys), num_perm) 的簽章陣列，num_perm 需可被 bands 整除
+    :return: 兩筆以上的群組 (依 keys 的順序)
+    """
+    parents = list(range(len(keys)))
+    # 每個群組 (以 root 為 key) 的成員索引
+    group_members: Dict[int, List[int]] = {i: [i] for i in range(len(keys))}
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    def all_similar(root_a: int, root_b: int) -> bool:
+        sig_a = signatures[group_members[root_a]]
+        sig_b = signatures[group_members[root_b]]
+        matches = np.count_nonzero(sig_a[:, None, :] == sig_b[None, :, :], axis=2)
+        return matches.min() / signatures.shape[1] >= threshold
+
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        band_values = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(len(keys)):
+            buckets.setdefault(band_values[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for position, other in enumerate(members[1:], 1):
+                root_other = find(other)
+                for root in dict.fromkeys(find(member) for member in members[:position]):
+                    if root != root_other and all_similar(root, root_other):
+                        parents[root_other] = root
+                        group_members[root].extend(group_members.pop(root_other))
+                        break
+
+    groups: Dict[int, List] = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(find(i), []).append(key)
+    return [members for members in groups.values() if len(members) > 1]
@@ -0,0 +1,329 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+# 工作項目狀態
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def default_worker_id() -> str:
+    """以主機名稱與程序編號識別 worker"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SqliteWorkQueue:
+    """
+    單機使用的爬取工作佇列 (SQLite)
+    多個 worker 程序以租約 (lease) 方式取得一批 AppID，需定期 heartbeat 延長租約；
+    worker 當機時租約到期，項目會自動被其他 worker 重新取得。
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        :param db_path: SQLite 檔案路徑
+        """
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # heartbeat 在背景執行緒中執行，以鎖保護共用連線
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self._lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_work_items (
+                scraper_type TEXT NOT NULL,
+                appid INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (scraper_type, appid)
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_work_items_status "
+            "ON crawl_work_items (scraper_type, status, appid)")
+
+    @contextmanager
+    def _transaction(self):
+        """IMMEDIATE 交易會先取得寫入鎖，避免兩個 worker 取得同一批項目"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def enqueue(self, scraper_type: str, app_ids: Iterable[int]) -> int:
+        """加入待爬取的 AppID；已完成或失敗的項目會重設為待處理，租約中的項目不受影響"""
+        now = time.time()
+        rows = [(scraper_type, int(app_id), PENDING, now) for app_id in app_ids]
+        with self._transaction() as conn:
+            conn.executemany(
+                f"""
+                INSERT INTO crawl_work_items (scraper_type, appid, status, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (scraper_type, appid) DO UPDATE SET
+                    status = '{PENDING}', worker_id = NULL, lease_until = NULL,
+                    updated_at = excluded.updated_at
+                WHERE status IN ('{DONE}', '{FAILED}')
+                """,
+                rows
+            )
+        return len(rows)
+
+    def lease(self, scraper_type: str, worker_id: str, batch_size: int,
+              lease_seconds: float) -> List[int]:
+        """取得一批待處理 (或租約已過期) 的 AppID，並設定租約到期時間"""
+        now = time.time()
+        with self._transaction() as conn:
+            app_ids = [row[0] for row in conn.execute(
+                f"""
+                SELECT appid FROM crawl_work_items
+                WHERE scraper_type = ?
+                  AND (status = '{PENDING}' OR (status = '{LEASED}' AND lease_until < ?))
+                ORDER BY appid LIMIT ?
+                """,
+                (scraper_type, now, batch_size))]
+            conn.executemany(
+                f"""
+                UPDATE crawl_work_items
+                SET status = '{LEASED}', worker_id = ?, lease_until = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE scraper_type = ? AND appid = ?
+                """,
+                [(worker_id, now + lease_seconds, now, scraper_type, app_id) for app_id in app_ids])
+        return app_ids
+
+    def heartbeat(self, scraper_type: str, worker_id: str, lease_seconds: float) -> int:
+        """延長此 worker 所有租約中項目的到期時間，回傳延長的項目數"""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                UPDATE crawl_work_items SET lease_until = ?, updated_at = ?
+                WHERE scraper_type = ? AND worker_id = ? AND status = '{LEASED}'
+                """,
+                (now + lease_seconds, now, scraper_type, worker_id))
+        return cursor.rowcount
+
+    def _set_status(self, scraper_type: str, app_ids: Iterable[int], status: str):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE crawl_work_items SET status = ?, lease_until = NULL, updated_at = ? "
+                "WHERE scraper_type = ? AND appid = ?",
+                [(status, now, scraper_type, int(app_id)) for app_id in app_ids])
+
+    def complete(self, scraper_type: str, app_ids: Iterable[int]):
+        """標記為已完成 (需在資料確實寫入檔案後呼叫)"""
+        self._set_status(scraper_type, app_ids, DONE)
+
+    def fail(self, scraper_type: str, app_ids: Iterable[int]):
+        """標記為失敗 (失敗原因另記錄於 dead-letter queue，不再由佇列重新分派)"""
+        self._set_status(scraper_type, app_ids, FAILED)
+
+    def release(self, scraper_type: str, worker_id: str) -> int:
+        """正常結束或中斷時，將此 worker 尚未完成的租約交還給其他 worker"""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                f"""
+                UPDATE crawl_work_items
+                SET status = '{PENDING}', worker_id = NULL, lease_until = NULL, updated_at = ?
+                WHERE scraper_type = ? AND worker_id = ? AND status = '{LEASED}'
+                """,
+                (now, scraper_type, worker_id))
+        return cursor.rowcount
+
+    def counts(self, scraper_type: str) -> Dict[str, int]:
+        """各狀態的項目數"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM crawl_work_items WHERE scraper_type = ? GROUP BY status",
+                (scraper_type,)).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresWorkQueue:
+    """
+    多台主機共用的爬取工作佇列 (PostgreSQL)
+    以 SELECT ... FOR UPDATE SKIP LOCKED 取得租約，多個 worker 同時取用時不會互相阻塞或重複取得；
+    介面與 SqliteWorkQueue 相同。
+    """
+
+    def __init__(self):
+        # 延遲載入，單機使用 SQLite 時不需要資料庫套件
+        from src.database.postgreSQL_conn import get_pg_connection
+
+        self.conn = get_pg_connection()
+        self._lock = threading.Lock()
+        with self.conn, self.conn.cursor() as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS crawl_work_items (
+                    scraper_type TEXT NOT NULL,
+                    appid BIGINT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker_id TEXT,
+                    lease_until DOUBLE PRECISION,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at DOUBLE PRECISION NOT NULL,
+                    PRIMARY KEY (scraper_type, appid)
+                )
+                """
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_work_items_status "
+                "ON crawl_work_items (scraper_type, status, appid)")
+
+    def _execute(self, query: str, params=None, fetch: bool = False):
+        with self._lock, self.conn, self.conn.cursor() as cur:
+            cur.execute(query, params)
+            return cur.fetchall() if fetch else cur.rowcount
+
+    def enqueue(self, scraper_type: str, app_ids: Iterable[int]) -> int:
+        from psycopg2.extras import execute_values
+
+        now = time.time()
+        rows = [(scraper_type, int(app_id), PENDING, now) for app_id in app_ids]
+        with self._lock, self.conn, self.conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"""
+                INSERT INTO crawl_work_items (scraper_type, appid, status, updated_at)
+                VALUES %s
+                ON CONFLICT (scraper_type, appid) DO UPDATE SET
+                    status = '{PENDING}', worker_id = NULL, lease_until = NULL,
+                    updated_at = EXCLUDED.updated_at
+                WHERE crawl_work_items.status IN ('{DONE}', '{FAILED}')
+                """,
+                rows, page_size=1000)
+        return len(rows)
+
+    def lease(self, scraper_type: str, worker_id: str, batch_size: int,
+              lease_seconds: float) -> List[int]:
+        now = time.time()
+        rows = self._execute(
+            f"""
+            UPDATE crawl_work_items AS w
+            SET status = '{LEASED}', worker_id = %s, lease_until = %s,
+                attempts = w.attempts + 1, updated_at = %s
+            FROM (
+                SELECT scraper_type, appid FROM crawl_work_items
+                WHERE scraper_type = %s
+                  AND (status = '{PENDING}' OR (status = '{LEASED}' AND lease_until < %s))
+                ORDER BY appid LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ) AS picked
+            WHERE w.scraper_type = picked.scraper_type AND w.appid = picked.appid
+            RETURNING w.appid
+            """,
+            (worker_id, now + lease_seconds, now, scraper_type, now, batch_size), fetch=True)
+        return sorted(row[0] for row in rows)
+
+    def heartbeat(self, scraper_type: str, worker_id: str, lease_seconds: float) -> int:
+        now = time.time()
+        return self._execute(
+            f"""
+            UPDATE crawl_work_items SET lease_until = %s, updated_at = %s
+            WHERE scraper_type = %s AND worker_id = %s AND status = '{LEASED}'
+            """,
+            (now + lease_seconds, now, scraper_type, worker_id))
+
+    def _set_status(self, scraper_type: str, app_ids: Iterable[int], status: str):
+        app_ids = [int(app_id) for app_id in app_ids]
+        if not app_ids:
+            return
+        self._execute(
+            "UPDATE crawl_work_items SET status = %s, lease_until = NULL, updated_at = %s "
+            "WHERE scraper_type = %s AND appid = ANY(%s)",
+            (status, time.time(), scraper_type, app_ids))
+
+    def complete(self, scraper_type: str, app_ids: Iterable[int]):
+        self._set_status(scraper_type, app_ids, DONE)
+
+    def fail(self, scraper_type: str, app_ids: Iterable[int]):
+        self._set_status(scraper_type, app_ids, FAILED)
+
+    def release(self, scraper_type: str, worker_id: str) -> int:
+        return self._execute(
+            f"""
+            UPDATE crawl_work_items
+            SET status = '{PENDING}', worker_id = NULL, lease_until = NULL, updated_at = %s
+            WHERE scraper_type = %s AND worker_id = %s AND status = '{LEASED}'
+            """,
+            (time.time(), scraper_type, worker_id))
+
+    def counts(self, scraper_type: str) -> Dict[str, int]:
+        rows = self._execute(
+            "SELECT status, COUNT(*) FROM crawl_work_items WHERE scraper_type = %s GROUP BY status",
+            (scraper_type,), fetch=True)
+        return dict(rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def create_work_queue(backend: str, db_path: Path):
+    """
+    依設定建立工作佇列
+    :param backend: 'sqlite' (單機多程序) 或 'postgres' (多台主機)
+    :param db_path: SQLite 檔案路徑 (postgres 時不使用)
+    """
+    if backend == "sqlite":
+        return SqliteWorkQueue(db_path)
+    if backend == "postgres":
+        return PostgresWorkQueue()
+    raise ValueError(f"不支援的工作佇列類型: {backend}")
+
+
+class LeaseHeartbeat:
+    """
+    在背景執行緒定期延長租約
+    即使主執行緒因限流暫停或長時間重試，租約也不會到期而被其他 worker 取走。
+    """
+
+    def __init__(self, work_queue, scraper_type: str, worker_id: str,
+                 lease_seconds: float, interval: float):
+        self.work_queue = work_queue
+        self.scraper_type = scraper_type
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.work_queue.heartbeat(
+                    self.scraper_type, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"延長租約失敗: {e}")
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()